@@ -0,0 +1,166 @@
+"""
+Compare the two-stage (IntentAgent -> ActionAgent) pipeline with the single-shot
+CombinedAgent on a labeled home-control corpus, using the configured provider.
+
+    python -m jarvis_assistant.agent_benchmark corpus.jsonl --entities entities.json
+
+Each corpus line is {"text": ..., "actions": [{"entity_id": ..., "service": ...}, ...]}.
+Reports end-to-end latency (median / p90) and action accuracy for both modes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any
+
+from .intent_utils import parse_entities, validate_actions
+from .output_schema import structured_output_active
+from .prompt_compiler import CompiledPrompt, PromptContext, compile_prompt
+from .utils import extract_json
+
+
+class _SyncLLM:
+    """Runs LLMWorker._run_generate inline and returns its text (raises on error)."""
+
+    def __init__(self):
+        from .llm_client import LLMWorker
+
+        self._worker = LLMWorker()
+        self._result: tuple[str, str] | None = None
+        self._worker.finished.connect(lambda text: setattr(self, "_result", ("ok", text)))
+        self._worker.error.connect(lambda msg: setattr(self, "_result", ("error", msg)))
+
+    def __call__(self, messages: list[dict], format: str = "json", options: dict | None = None) -> str:
+        self._result = None
+        self._worker._run_generate(messages, format, options)
+        status, text = self._result or ("error", "no response")
+        if status != "ok":
+            raise RuntimeError(text)
+        return text
+
+
+def _action_keys(actions: list[dict] | None) -> set[tuple[str, str]]:
+    keys = set()
+    for action in actions or []:
+        ids = action.get("entity_id")
+        for eid in ids if isinstance(ids, list) else [ids]:
+            keys.add((str(eid), str(action.get("service") or "")))
+    return keys
+
+
+def _extract_actions(payload: Any) -> list[dict]:
+    if isinstance(payload, dict) and isinstance(payload.get("actions"), list):
+        return [a for a in payload["actions"] if isinstance(a, dict)]
+    if isinstance(payload, dict) and payload.get("service"):
+        return [payload]
+    return []
+
+
+def _action_prompt(intent: dict, text: str, entities_context: str, time_context: str) -> CompiledPrompt:
+    ctx = PromptContext(entities_context=entities_context, time_context=time_context)
+    return compile_prompt("action", ctx, text, extra=f"Intent: {json.dumps(intent)}", structured=structured_output_active("action"))
+
+
+def _intent_prompt(text: str, entities_context: str, time_context: str, combined: bool) -> CompiledPrompt:
+    ctx = PromptContext(entities_context=entities_context, time_context=time_context)
+    return compile_prompt("intent", ctx, text, combined=combined, structured=structured_output_active("intent"))
+
+
+def _call(llm, prompt: CompiledPrompt) -> Any:
+    return extract_json(llm(prompt.messages, options=prompt.options))
+
+
+def run_two_stage(llm, text: str, entities_context: str, time_context: str) -> list[dict]:
+    intent = _call(llm, _intent_prompt(text, entities_context, time_context, combined=False)) or {}
+    if intent.get("intent") != "home_control":
+        return []
+    return _extract_actions(_call(llm, _action_prompt(intent, text, entities_context, time_context)))
+
+
+def run_combined(llm, text: str, entities_context: str, time_context: str, entities: list[dict]) -> tuple[list[dict], bool]:
+    """Returns (actions, fell_back); falls back to ActionAgent like the controller does."""
+    intent = _call(llm, _intent_prompt(text, entities_context, time_context, combined=True)) or {}
+    if intent.get("intent") != "home_control":
+        return [], False
+    validated = validate_actions(intent.get("actions"), entities)
+    if validated is not None:
+        return validated, False
+    return _extract_actions(_call(llm, _action_prompt(intent, text, entities_context, time_context))), True
+
+
+def _summary(label: str, latencies: list[float], correct: int, total: int) -> str:
+    if not latencies:
+        return f"{label:<10} no results"
+    ordered = sorted(latencies)
+    p90 = ordered[min(len(ordered) - 1, int(round(0.9 * (len(ordered) - 1))))]
+    return (
+        f"{label:<10} median={statistics.median(ordered):7.0f}ms  p90={p90:7.0f}ms  "
+        f"accuracy={correct}/{total} ({correct / max(1, total):.1%})"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark two-stage vs combined intent+action prompting.")
+    parser.add_argument("corpus", help="JSONL with text / actions per utterance")
+    parser.add_argument("--entities", help="JSON list of {name, entity_id, state}; default: live Home Assistant")
+    args = parser.parse_args(argv)
+
+    from .config import cfg
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    if args.entities:
+        with open(args.entities, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        entities_context = "\n".join(
+            f"- Name: '{e.get('name') or e['entity_id']}', Entity: '{e['entity_id']}', State: '{e.get('state') or 'unknown'}'"
+            for e in raw
+        )
+        time_context = f"Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    else:
+        from .ha_client import HomeAssistantClient
+
+        ha = HomeAssistantClient()
+        entities_context = ha.get_relevant_entities()
+        time_context = ha.get_time_context()
+    entities = parse_entities(entities_context)
+
+    llm = _SyncLLM()
+    results: dict[str, dict[str, Any]] = {
+        "two-stage": {"latencies": [], "correct": 0},
+        "combined": {"latencies": [], "correct": 0, "fallbacks": 0},
+    }
+    for item in corpus:
+        text = item["text"]
+        expected = _action_keys(item.get("actions"))
+        for mode, stats in results.items():
+            started = time.perf_counter()
+            try:
+                if mode == "two-stage":
+                    actions = run_two_stage(llm, text, entities_context, time_context)
+                else:
+                    actions, fell_back = run_combined(llm, text, entities_context, time_context, entities)
+                    stats["fallbacks"] += int(fell_back)
+            except Exception as e:
+                print(f"  {mode} error: {text!r}: {e}")
+                continue
+            stats["latencies"].append((time.perf_counter() - started) * 1000)
+            if _action_keys(actions) == expected:
+                stats["correct"] += 1
+            else:
+                print(f"  {mode} wrong: {text!r} -> {sorted(_action_keys(actions))}")
+
+    print(f"provider: {cfg.api_provider}  utterances: {len(corpus)}")
+    for mode, stats in results.items():
+        print(_summary(mode, stats["latencies"], stats["correct"], len(corpus)))
+    print(f"combined fallbacks to ActionAgent: {results['combined']['fallbacks']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
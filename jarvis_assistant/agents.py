@@ -9,6 +9,108 @@ class AgentResult:
     data: Any
     error: Optional[str] = None
 
+# Labeled example utterances per intent (EN + DE). Seeds the embedding router in
+# semantic_router.py; the IntentAgent prompt keeps its own shorter example list.
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "conversation": [
+        "Hello", "How are you?", "Thanks", "Good morning", "Good night", "Tell me a joke",
+        "Who are you?", "What's the capital of France?", "Thank you very much", "See you later",
+        "Hallo", "Wie geht es dir?", "Danke", "Guten Morgen", "Gute Nacht", "Erzähl mir einen Witz",
+        "Wer bist du?", "Was ist die Hauptstadt von Frankreich?", "Bis später",
+    ],
+    "memory_read": [
+        "What is my name?", "Do you know my favorite color?", "What did I tell you about my car?",
+        "Do you remember where I work?", "What's my wife's birthday?",
+        "Wie heiße ich?", "Weißt du meine Lieblingsfarbe?", "Was habe ich dir über mein Auto erzählt?",
+        "Erinnerst du dich, wo ich arbeite?",
+    ],
+    "help": [
+        "What can you do?", "Help", "How do I use you?", "What commands do you know?",
+        "Was kannst du?", "Hilfe", "Wie benutze ich dich?", "Welche Befehle kennst du?",
+    ],
+    "refresh_entities": [
+        "Refresh devices", "Check for new lights", "Reload my devices", "Discover new devices",
+        "Geräte aktualisieren", "Suche nach neuen Lampen", "Lade meine Geräte neu",
+    ],
+    "web_search": [
+        "Search the web for best smart thermostats", "Google the weather in Berlin",
+        "Look it up online", "Search online for pasta recipes", "Find on the internet who won the match",
+        "Suche im Internet nach den besten Thermostaten", "Google das Wetter in Berlin",
+        "Schau online nach Nudelrezepten",
+    ],
+    "home_control": [
+        "Turn on the switch", "Turn off the light", "Toggle the fan", "Set the heater to 5",
+        "Turn off the lamp in 10 minutes", "Switch on the kitchen light",
+        "Schalte das Licht an", "Mach die Lampe aus", "Stell die Heizung auf 21",
+    ],
+    "memory_write": [
+        "Remember that I like blue", "My name is Bobby", "Remember my car is parked on level 2",
+        "Merk dir, dass ich Blau mag", "Ich heiße Bobby",
+    ],
+    "todo_add": [
+        "Remind me to buy milk tomorrow at 5pm", "Add pay electricity bill to my reminders",
+        "Erinnere mich morgen daran, Milch zu kaufen",
+    ],
+    "todo_remove": [
+        "Remove buy milk from my reminders", "Delete the reminder about the bill",
+        "Lösche die Erinnerung Milch kaufen",
+    ],
+    "helper_create": ["Create a helper named Movie Time", "Erstelle einen Helfer namens Filmabend"],
+    "helper_delete": ["Delete the Movie Time helper", "Lösche den Helfer Filmabend"],
+    "telegram_send": ["Message me on Telegram: I am home", "Schick mir auf Telegram: Ich bin zuhause"],
+}
+
+# Few-shot examples for the IntentAgent prompt: (intent, user, expected output).
+# Conversation outputs are the reply text; IntentAgent renders them as plain text or as
+# {"intent": "conversation", "reply": ...} depending on the output mode.
+# Listed in priority order; prompt_compiler ships the first N per intent.
+INTENT_PROMPT_EXAMPLES: List[tuple] = [
+    ("conversation", "Hello", "Hello! How can I help you today?"),
+    ("conversation", "What time is it?", "It's [current time from context]."),
+    ("conversation", "How are you?", "I'm doing well, thanks for asking!"),
+    ("conversation", "Thanks", "You're welcome!"),
+    ("conversation", "Good morning", "Good morning! How can I help?"),
+    ("home_control", "Turn on the switch", '{"intent": "home_control", "target": "switch", "action": "turn_on"}'),
+    ("home_control", "Turn it off", '(after switch context) {"intent": "home_control", "target": "switch", "action": "turn_off"}'),
+    ("home_control", "Toggle the fan", '{"intent": "home_control", "target": "fan", "action": "toggle"}'),
+    ("home_control", "Turn on the light", '{"intent": "home_control", "target": "light", "action": "turn_on"}'),
+    ("memory_write", "Remember that I like blue", '{"intent": "memory_write", "target": null, "action": "remember"}'),
+    ("memory_write", "My name is Bobby", '{"intent": "memory_write", "target": null, "action": "remember"}'),
+    ("memory_read", "What is my name?", '{"intent": "memory_read", "target": null, "action": "recall"}'),
+    ("help", "What can you do?", '{"intent": "help", "target": null, "action": "help"}'),
+    ("refresh_entities", "Refresh devices", '{"intent": "refresh_entities", "target": null, "action": "refresh"}'),
+    ("helper_create", "Create a helper named Movie Time", '{"intent": "helper_create", "helper_type": "input_boolean", "helper_name": "Movie Time", "action": "create_helper"}'),
+    ("helper_delete", "Delete the Movie Time helper", '{"intent": "helper_delete", "helper_name": "Movie Time", "action": "delete_helper"}'),
+    ("todo_add", "Remind me to buy milk tomorrow at 5pm", '{"intent": "todo_add", "todo_title": "buy milk", "todo_due": "2026-01-05T17:00:00", "action": "add_todo"}'),
+    ("todo_remove", "Remove buy milk from my reminders", '{"intent": "todo_remove", "todo_title": "buy milk", "action": "remove_todo"}'),
+    ("telegram_send", "Message me on Telegram: I am home", '{"intent": "telegram_send", "message": "I am home", "action": "send_message"}'),
+    ("web_search", "Search the web for best smart thermostats", '{"intent": "web_search", "query": "best smart thermostats"}'),
+]
+
+DEVICE_CONTROL_WORDS = (
+    "turn on, turn off, toggle, switch, light, fan, device, activate, deactivate, "
+    "enable, disable, set, adjust, dim, brighten, power, start, stop"
+)
+
+
+def _language_instruction() -> str:
+    if cfg.language == "en":
+        return "You MUST speak in English, regardless of the user's language."
+    if cfg.language == "de":
+        return "You MUST speak in German (Deutsch), regardless of the user's language."
+    return "You speak in short conversational paragraphs, in English or German, matching the user."
+
+
+def _slow_context(capabilities: str = "", entities_context: str = "") -> str:
+    """Slow-changing sections appended after the static instructions; empty ones are left out."""
+    parts = []
+    if capabilities:
+        parts.append(f"Your Capabilities:\n{capabilities}")
+    if entities_context:
+        parts.append(f"Available Devices:\n{entities_context}")
+    return "".join(f"\n\n{p}" for p in parts)
+
+
 class BaseAgent:
     def __init__(self):
         pass
@@ -19,30 +121,48 @@ class BaseAgent:
 class IntentAgent(BaseAgent):
     """
     Determines the user's intent and resolves context (e.g., "it" -> "switch").
+
+    The system prompt holds only static instructions followed by slow context
+    (device names, capabilities); time, device states and memory go into the
+    final user message (see prompt_layout).
     """
-    def get_system_prompt(self, entities_context: str = "", memory_context: str = "", capabilities: str = "", time_context: str = "") -> str:
-        lang_instruction = "You speak in short conversational paragraphs, in English or German, matching the user."
-        if cfg.language == "en":
-            lang_instruction = "You MUST speak in English, regardless of the user's language."
-        elif cfg.language == "de":
-            lang_instruction = "You MUST speak in German (Deutsch), regardless of the user's language."
+    def get_system_prompt(
+        self,
+        entities_context: str = "",
+        capabilities: str = "",
+        examples_per_intent: int | None = None,
+        structured: bool = False,
+    ) -> str:
+        """structured: the provider enforces output_schema.IntentOutput, so conversation is JSON too."""
+        seen: Dict[str, int] = {}
+        examples = []
+        for intent, user, output in INTENT_PROMPT_EXAMPLES:
+            seen[intent] = seen.get(intent, 0) + 1
+            if examples_per_intent is None or seen[intent] <= examples_per_intent:
+                if intent == "conversation":
+                    output = json.dumps({"intent": "conversation", "reply": output}) if structured else f"'{output}'"
+                examples.append(f"User: '{user}' -> {output}")
 
+        if structured:
+            conversation_mode = "reply with {\"intent\": \"conversation\", \"reply\": \"<short, natural answer>\"}.\n"
+            intent_field = "one of the intents above"
+            critical = "CRITICAL: Output ONLY a valid JSON object. For conversation, put your answer in \"reply\"."
+        else:
+            conversation_mode = "reply directly in short, natural plain text (no JSON).\n"
+            intent_field = "one of the intents above except 'conversation'"
+            critical = (
+                "CRITICAL: For conversation intent, output plain text only. For all other intents, "
+                "output ONLY a valid JSON object. No explanations, no markdown, no extra text."
+            )
         return (
             f"You are {cfg.assistant_name}, a voice-controlled Smart Home Assistant.\n"
-            f"{lang_instruction}\n\n"
-            f"Your Capabilities:\n{capabilities}\n\n"
-            f"Current Time:\n{time_context}\n\n"
-            f"Available Devices:\n{entities_context}\n\n"
-            "Memory & Context:\n"
-            f"{memory_context}\n"
-            "IMPORTANT: The 'User Facts' listed above describe the USER, not you. If a fact says 'my favorite color', it means the USER'S favorite color.\n\n"
-            "You have TWO modes of operation:\n\n"
-            "1. CONVERSATION MODE: If the user's intent is 'conversation', reply directly to the user.\n"
-            "   - Answer questions naturally\n"
-            "   - Be helpful and conversational\n"
-            "   - Keep replies short and natural\n"
-            "   - Output plain text only (no JSON)\n\n"
-            "2. INTENT CLASSIFICATION MODE: For all other intents, output JSON classification.\n\n"
+            f"{_language_instruction()}\n\n"
+            "The user message starts with per-turn context (Current Time, Device States, Memory & Context) followed by 'User Input'.\n"
+            "IMPORTANT: The 'User Facts' under Memory & Context describe the USER, not you. If a fact says 'my favorite color', it means the USER'S favorite color.\n\n"
+            "You have TWO modes of operation:\n"
+            "1. CONVERSATION MODE: if the user is just chatting, greeting, asking general questions, or saying thanks/goodbye, "
+            + conversation_mode
+            + "2. INTENT CLASSIFICATION MODE: for all other intents, output a single JSON object.\n\n"
             "Available Intents:\n"
             "- 'home_control': User wants to control a device (turn on, turn off, toggle).\n"
             "- 'conversation': User is just chatting, asking questions, or greeting.\n"
@@ -56,82 +176,79 @@ class IntentAgent(BaseAgent):
             "- 'todo_remove': User wants to remove a reminder/to-do item.\n"
             "- 'telegram_send': User wants to send a Telegram message.\n"
             "- 'web_search': User wants you to search the web (e.g., 'search the web for...', 'google...', 'look it up online').\n\n"
-            "Context Resolution:\n"
-            "- You MUST resolve pronouns like 'it', 'that', 'the switch' to specific targets based on history.\n"
-            f"- Available devices:\n{entities_context}\n\n"
-            "Output Format:\n"
-            "CRITICAL: First determine the user's intent:\n"
-            "- If the user mentions ANY device control words (turn on, turn off, toggle, switch, light, fan, switch, device, activate, deactivate, enable, disable, set, adjust, dim, brighten), you MUST output JSON with 'home_control' intent\n"
-            "- If the user wants to REMEMBER/RECALL facts, you MUST output JSON\n"
-            "- If the user asks for HELP or wants to REFRESH devices, you MUST output JSON\n"
-            "- If the user wants to create/delete helpers or manage todos, you MUST output JSON\n"
-            "- If the user asks to search the web or look something up online, you MUST output JSON\n"
-            "- ONLY if the user is just chatting, greeting, asking general questions, or saying thanks/goodbye, output plain text\n\n"
-            "DEVICE CONTROL WORDS THAT REQUIRE JSON: turn on, turn off, toggle, switch, light, fan, device, activate, deactivate, enable, disable, set, adjust, dim, brighten, power, start, stop\n\n"
-            "For CONVERSATION ONLY: Reply directly in plain text, no JSON.\n"
-            "For ALL OTHER INTENTS: Return a single JSON object:\n"
-            "{\n"
-            "  \"intent\": \"home_control\", \"memory_write\", \"memory_read\", \"help\", \"refresh_entities\", \"helper_create\", \"helper_delete\", \"todo_add\", \"todo_remove\", \"telegram_send\", or \"web_search\",\n"
-            "  \"target\": \"test_switch\" or null,\n"
-            "  \"action\": \"turn_on\", \"turn_off\", \"toggle\", \"remember\", \"recall\", \"help\", \"refresh\", \"create_helper\", \"delete_helper\", \"add_todo\", \"remove_todo\", \"send_message\" or null,\n"
-            "  \"query\": \"search terms\" or null,\n"
-            "  \"helper_type\": \"input_boolean\", \"input_number\", \"input_text\" or null,\n"
-            "  \"helper_name\": \"Living Room\" or null,\n"
-            "  \"helper_value\": number/string if provided, else null,\n"
-            "  \"todo_title\": \"Pay electricity bill\" or null,\n"
-            "  \"todo_due\": ISO8601 timestamp string or null,\n"
-            "  \"message\": \"Text to send\" or null,\n"
-            "  \"confirm\": true/false if the user clearly confirmed or rejected,\n"
-            "  \"confidence\": 0.0 to 1.0\n"
-            "}\n\n"
+            "Rules:\n"
+            f"- Device control words ({DEVICE_CONTROL_WORDS}) ALWAYS mean 'home_control' JSON.\n"
+            "- Remember/recall, help, refresh, helpers, todos, Telegram and web search ALWAYS mean JSON.\n"
+            "- You MUST resolve pronouns like 'it', 'that', 'the switch' to specific targets based on history; targets must be devices listed under Available Devices.\n\n"
+            "JSON fields (null when not applicable):\n"
+            f"{{\"intent\": {intent_field}, \"target\": \"test_switch\", "
+            "\"action\": \"turn_on\"|\"turn_off\"|\"toggle\"|\"remember\"|\"recall\"|\"help\"|\"refresh\"|\"create_helper\"|\"delete_helper\"|\"add_todo\"|\"remove_todo\"|\"send_message\", "
+            "\"query\": \"search terms\", \"helper_type\": \"input_boolean\"|\"input_number\"|\"input_text\", \"helper_name\": \"Living Room\", "
+            "\"helper_value\": number/string, \"todo_title\": \"Pay electricity bill\", \"todo_due\": ISO8601 timestamp, "
+            "\"message\": \"Text to send\", \"confirm\": true/false if the user clearly confirmed or rejected, \"confidence\": 0.0 to 1.0}\n\n"
             "Examples:\n"
-            "CONVERSATION (plain text replies):\n"
-            "User: 'Hello' -> 'Hello! How can I help you today?'\n"
-            "User: 'How are you?' -> 'I'm doing well, thanks for asking!'\n"
-            "User: 'What time is it?' -> 'It's [current time from context].'\n"
-            "User: 'Thanks' -> 'You're welcome!'\n"
-            "User: 'Good morning' -> 'Good morning! How can I help?'\n\n"
-            "ACTIONS (JSON replies):\n"
-            "User: 'Turn on the switch' -> {\"intent\": \"home_control\", \"target\": \"switch\", \"action\": \"turn_on\"}\n"
-            "User: 'Turn it off' (after switch context) -> {\"intent\": \"home_control\", \"target\": \"switch\", \"action\": \"turn_off\"}\n"
-            "User: 'Turn on the light' -> {\"intent\": \"home_control\", \"target\": \"light\", \"action\": \"turn_on\"}\n"
-            "User: 'Toggle the fan' -> {\"intent\": \"home_control\", \"target\": \"fan\", \"action\": \"toggle\"}\n"
-            "User: 'Remember that I like blue' -> {\"intent\": \"memory_write\", \"target\": null, \"action\": \"remember\"}\n"
-            "User: 'My name is Bobby' -> {\"intent\": \"memory_write\", \"target\": null, \"action\": \"remember\"}\n"
-            "User: 'What is my name?' -> {\"intent\": \"memory_read\", \"target\": null, \"action\": \"recall\"}\n"
-            "User: 'What can you do?' -> {\"intent\": \"help\", \"target\": null, \"action\": \"help\"}\n"
-            "User: 'Refresh devices' -> {\"intent\": \"refresh_entities\", \"target\": null, \"action\": \"refresh\"}\n"
-            "User: 'Create a helper named Movie Time' -> {\"intent\": \"helper_create\", \"helper_type\": \"input_boolean\", \"helper_name\": \"Movie Time\", \"action\": \"create_helper\"}\n"
-            "User: 'Delete the Movie Time helper' -> {\"intent\": \"helper_delete\", \"helper_name\": \"Movie Time\", \"action\": \"delete_helper\"}\n"
-            "User: 'Remind me to buy milk tomorrow at 5pm' -> {\"intent\": \"todo_add\", \"todo_title\": \"buy milk\", \"todo_due\": \"2026-01-05T17:00:00\", \"action\": \"add_todo\"}\n"
-            "User: 'Remove buy milk from my reminders' -> {\"intent\": \"todo_remove\", \"todo_title\": \"buy milk\", \"action\": \"remove_todo\"}\n"
-            "User: 'Message me on Telegram: I am home' -> {\"intent\": \"telegram_send\", \"message\": \"I am home\", \"action\": \"send_message\"}\n\n"
-            "User: 'Search the web for best smart thermostats' -> {\"intent\": \"web_search\", \"query\": \"best smart thermostats\"}\n\n"
-            "CRITICAL: For conversation intent, output plain text only. For all other intents, output ONLY a valid JSON object. No explanations, no markdown, no extra text."
+            + "\n".join(examples)
+            + "\n\n"
+            + critical
+            + _slow_context(capabilities, entities_context)
         )
 
+class CombinedAgent(IntentAgent):
+    """
+    Single-shot variant of IntentAgent: for home_control it also returns the
+    concrete service calls, so no separate ActionAgent request is needed.
+    """
+    ACTIONS_SECTION = (
+        "\n\nHOME CONTROL ACTIONS:\n"
+        "For 'home_control' you MUST also include an \"actions\" list with the exact service calls, e.g.\n"
+        "{\"intent\": \"home_control\", \"target\": \"kitchen light\", \"action\": \"turn_on\", "
+        "\"actions\": [{\"domain\": \"light\", \"service\": \"turn_on\", \"entity_id\": \"light.kitchen\"}]}\n"
+        "- Use ONLY entity_ids listed under Available Devices.\n"
+        "- Services: 'turn_on', 'turn_off', 'toggle', 'set_value' ('set_value' only for input_number, with numeric \"value\").\n"
+        "- For requests to do something later (e.g. 'in 30 minutes', 'at 10:45'), add \"delay_seconds\" using Current Time.\n"
+        "- If you cannot resolve a device, return \"actions\": []."
+    )
+
+    def get_system_prompt(
+        self,
+        entities_context: str = "",
+        capabilities: str = "",
+        examples_per_intent: int | None = None,
+        structured: bool = False,
+    ) -> str:
+        # Keep the extra static instructions ahead of the slow context block.
+        static = super().get_system_prompt(examples_per_intent=examples_per_intent, structured=structured)
+        return static + self.ACTIONS_SECTION + _slow_context(capabilities, entities_context)
+
 class ActionAgent(BaseAgent):
     """
     Generates the specific Home Assistant service call.
     """
-    def get_system_prompt(self, entities_context: str = "", time_context: str = "") -> str:
+    def get_system_prompt(self, entities_context: str = "", structured: bool = False) -> str:
+        """structured: the provider enforces output_schema.ActionOutput, i.e. always {"actions": [...]}."""
+        if structured:
+            output_format = "Return {\"actions\": [...]} with one entry per service call:\n"
+            empty = "{\"actions\": []}"
+        else:
+            output_format = (
+                "Return a JSON object representing the service call. For multiple commands, return {\"actions\": [...]}:\n"
+                "{\n"
+                "  \"domain\": \"input_boolean\", \"switch\", \"light\", or \"input_number\",\n"
+                "  \"service\": \"turn_on\", \"turn_off\", \"toggle\", or \"set_value\",\n"
+                "  \"entity_id\": \"input_boolean.switch\",\n"
+                "  \"value\": 5,\n"
+                "  \"delay_seconds\": 1800\n"
+                "}\n"
+                "or\n"
+            )
+            empty = "empty JSON: {}"
         return (
             "You are a Home Assistant Action Generator. Your job is to convert a resolved intent "
-            "into a specific Home Assistant service call JSON.\n\n"
-            f"Current Time:\n{time_context}\n\n"
-            "Available Devices:\n"
-            f"{entities_context}\n\n"
+            "into a specific Home Assistant service call JSON.\n"
+            "The user message starts with Current Time and Device States, followed by the intent and 'User Input'.\n\n"
             "Output Format:\n"
-            "Return a JSON object representing the service call. For multiple commands, return {\"actions\": [...]}:\n"
-            "{\n"
-            "  \"domain\": \"input_boolean\", \"switch\", \"light\", or \"input_number\",\n"
-            "  \"service\": \"turn_on\", \"turn_off\", \"toggle\", or \"set_value\",\n"
-            "  \"entity_id\": \"input_boolean.switch\",\n"
-            "  \"value\": 5,\n"
-            "  \"delay_seconds\": 1800\n"
-            "}\n"
-            "or\n"
-            "{\n"
+            + output_format
+            + "{\n"
             "  \"actions\": [\n"
             "    {\"domain\": \"light\", \"service\": \"turn_on\", \"entity_id\": \"light.kitchen\"},\n"
             "    {\"domain\": \"light\", \"service\": \"turn_off\", \"entity_id\": \"light.bedroom\"},\n"
@@ -143,36 +260,26 @@ class ActionAgent(BaseAgent):
             "- Use 'set_value' ONLY with domain 'input_number', and include numeric \"value\".\n"
             "- For boolean helpers like input_boolean or binary switches, map 'open' to 'turn_on' and 'close' to 'turn_off'.\n"
             "- Do NOT invent services like 'set', 'dim', 'color' unless explicitly supported (currently NOT supported).\n"
-            "- If the user asks for something impossible or you cannot infer a value, return empty JSON: {}\n"
+            f"- If the user asks for something impossible or you cannot infer a value, return {empty}\n"
             "- If the user asks to do something later (e.g. 'in 30 minutes'), include \"delay_seconds\".\n"
             "- If the user gives a specific time (e.g. 'at 10:45'), convert it to \"delay_seconds\" using Current Time.\n"
             "- When multiple commands are present, include all valid actions in order.\n\n"
             "CRITICAL: You MUST output ONLY a valid JSON object. No explanations, no markdown, no extra text.\n"
             "Start your response with { and end with }."
+            + _slow_context(entities_context=entities_context)
         )
 
 class ResponseAgent(BaseAgent):
     """
     Generates a natural language response.
     """
-    def get_system_prompt(self, memory_context: str = "", entities_context: str = "", capabilities: str = "", time_context: str = "") -> str:
-        lang_instruction = "You speak in short conversational paragraphs, in English or German, matching the user."
-        if cfg.language == "en":
-            lang_instruction = "You MUST speak in English, regardless of the user's language."
-        elif cfg.language == "de":
-            lang_instruction = "You MUST speak in German (Deutsch), regardless of the user's language."
-
+    def get_system_prompt(self, entities_context: str = "", capabilities: str = "") -> str:
         return (
             f"You are {cfg.assistant_name}, a voice-controlled Smart Home Assistant.\n"
-            f"{lang_instruction}\n\n"
-            f"Your Capabilities:\n{capabilities}\n\n"
-            f"Current Time:\n{time_context}\n\n"
-            f"Available Devices:\n{entities_context}\n\n"
-            "Memory & Context:\n"
-            f"{memory_context}\n"
-            "IMPORTANT: The 'User Facts' listed above describe the USER, not you. If a fact says 'my favorite color', it means the USER'S favorite color.\n\n"
+            f"{_language_instruction()}\n\n"
+            "IMPORTANT: The 'User Facts' under Memory & Context describe the USER, not you. If a fact says 'my favorite color', it means the USER'S favorite color.\n\n"
             "Context:\n"
-            "- You will be provided with 'System Context' (Intent, Action Result) and 'User Input'.\n"
+            "- The user message provides Current Time, Device States, Memory & Context, 'System Context' (Intent, Action Result) and 'User Input'.\n"
             "- 'Action Result' tells you EXACTLY what happened. If it says 'None', NO action was taken.\n"
             "- CRITICAL: Do NOT claim to have performed an action unless 'Action Result' confirms it.\n"
             "- If you do NOT see a confirmed action result, do NOT say you are doing it now. Ask the user to retry or say you could not execute it.\n"
@@ -192,4 +299,5 @@ class ResponseAgent(BaseAgent):
             "- Do NOT offer extra help or multiple questions. One concise reply only.\n"
             "- Output plain text only: no markdown, no bullet symbols, no asterisks, no emojis.\n"
             "- Do NOT output JSON. Output only the text response."
+            + _slow_context(capabilities, entities_context)
         )
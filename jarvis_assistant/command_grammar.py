@@ -0,0 +1,155 @@
+"""
+Small-vocabulary command recognizer that runs next to Whisper.
+
+The grammar is generated from the Home Assistant entity list and the enabled
+quick-command phrases, so the decoder can only output known commands. A
+confident match maps straight to a safe Home Assistant action, which lets the
+controller act before Whisper has finished the same audio.
+
+Recognition uses Vosk (optional dependency) with a small Kaldi model whose
+directory is configured as cfg.grammar_model_path. Kept free of Qt imports.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from .quick_commands import (
+    QuickCommand,
+    _normalize_text,
+    generate_commands_from_entities,
+    is_safe_auto_action,
+)
+from .utils import logger
+
+try:
+    from vosk import KaldiRecognizer, Model, SetLogLevel
+
+    SetLogLevel(-1)
+    vosk_available = True
+except ImportError:
+    vosk_available = False
+
+UNKNOWN_TOKEN = "[unk]"
+
+# Extra verb forms on top of the "<name> on" / "turn on <name>" phrases that
+# generate_commands_from_entities already produces.
+_EXTRA_TEMPLATES = {
+    "turn_on": ("switch on {name}", "switch {name} on", "mach {name} an", "schalte {name} ein"),
+    "turn_off": ("switch off {name}", "switch {name} off", "mach {name} aus"),
+    "toggle": ("toggle {name}", "schalte {name} um"),
+}
+
+
+@dataclass
+class GrammarMatch:
+    phrase: str
+    action: dict[str, Any]
+    confidence: float
+    elapsed: float = 0.0
+
+
+@dataclass
+class CommandGrammar:
+    """Normalized phrase -> action. Phrases that map to conflicting actions are dropped."""
+
+    phrases: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def vocabulary(self) -> list[str]:
+        return sorted(self.phrases) + [UNKNOWN_TOKEN]
+
+    def lookup(self, text: str) -> dict[str, Any] | None:
+        action = self.phrases.get(_normalize_text(text))
+        return dict(action) if action else None
+
+
+def _entity_name_map(entities: list[dict[str, Any]]) -> dict[str, str]:
+    return {
+        str(e.get("entity_id") or ""): _normalize_text(str(e.get("name") or ""))
+        for e in entities
+        if e.get("entity_id") and e.get("name")
+    }
+
+
+def build_command_grammar(
+    entities: list[dict[str, Any]],
+    quick_commands: list[QuickCommand],
+) -> CommandGrammar:
+    """Collect phrases for every safe on/off/toggle action the assistant already knows."""
+    candidates: dict[str, list[dict[str, Any]]] = {}
+
+    def add(phrase: str, action: dict[str, Any]) -> None:
+        norm = _normalize_text(phrase)
+        if norm and is_safe_auto_action(action):
+            candidates.setdefault(norm, []).append(action)
+
+    names = _entity_name_map(entities)
+    commands = [c for c in quick_commands if c.enabled and c.safety != "requires_confirm"]
+    commands += generate_commands_from_entities(entities)
+    for cmd in commands:
+        action = {k: cmd.action.get(k) for k in ("domain", "service", "entity_id")}
+        for phrase in cmd.phrases:
+            add(phrase, action)
+
+    for entity_id, name in names.items():
+        domain = entity_id.split(".", 1)[0]
+        for service, templates in _EXTRA_TEMPLATES.items():
+            action = {"domain": domain, "service": service, "entity_id": entity_id}
+            for template in templates:
+                add(template.format(name=name), action)
+
+    grammar = CommandGrammar()
+    for phrase, actions in candidates.items():
+        unique = {json.dumps(a, sort_keys=True) for a in actions}
+        if len(unique) == 1:
+            grammar.phrases[phrase] = actions[0]
+    return grammar
+
+
+class GrammarRecognizer:
+    """Vosk decoder restricted to a CommandGrammar."""
+
+    SAMPLE_RATE = 16000
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self._model = None
+
+    def is_available(self) -> bool:
+        return vosk_available and bool(self.model_path) and os.path.isdir(self.model_path)
+
+    def _ensure_model(self):
+        if self._model is None:
+            self._model = Model(self.model_path)
+        return self._model
+
+    def recognize(self, audio: np.ndarray, grammar: CommandGrammar, min_confidence: float) -> GrammarMatch | None:
+        if not len(grammar) or not self.is_available():
+            return None
+        recognizer = KaldiRecognizer(self._ensure_model(), self.SAMPLE_RATE, json.dumps(grammar.vocabulary()))
+        recognizer.SetWords(True)
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        recognizer.AcceptWaveform(pcm)
+        result = json.loads(recognizer.FinalResult() or "{}")
+
+        text = str(result.get("text") or "").strip()
+        words = result.get("result") or []
+        if not text or UNKNOWN_TOKEN in text or not words:
+            return None
+        action = grammar.lookup(text)
+        if action is None:
+            return None
+        # The weakest word decides: one misheard entity token must not pass.
+        confidence = min(float(w.get("conf", 0.0)) for w in words)
+        if confidence < min_confidence:
+            logger.info("grammar_stt low_confidence text=%r conf=%.2f", text, confidence)
+            return None
+        return GrammarMatch(phrase=text, action=action, confidence=confidence)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from . import app_paths
+from .quick_commands import (
+    QuickCommand,
+    _normalize_text,
+    _tokenize,
+    is_safe_auto_action,
+    new_quick_command_id,
+)
+
+# Utterances that only make sense with conversation context are never learned.
+CONTEXT_WORDS = {"it", "that", "this", "them", "those", "again", "es", "ihn", "dies", "diese", "wieder"}
+ACTION_KEYS = ("domain", "service", "entity_id", "value")
+
+
+def _learning_file(profile: str) -> Path:
+    safe = (profile or "default").strip() or "default"
+    root = Path(app_paths.data_root()) / "quick_commands"
+    root.mkdir(parents=True, exist_ok=True)
+    return root / f"{safe}.learning.json"
+
+
+def _canonical_action(action: dict[str, Any]) -> dict[str, Any]:
+    return {k: action[k] for k in ACTION_KEYS if action.get(k) is not None}
+
+
+class CommandLearner:
+    """
+    Records (normalized utterance -> verified action) pairs resolved by the LLM
+    pipeline and promotes a pair into a quick command once it has been seen
+    promote_after times with the same action.
+
+    Observations are capped (least recently seen evicted first); learned quick
+    commands are capped separately by the caller via evict_learned().
+    """
+
+    def __init__(self, profile: str, promote_after: int = 3, max_observations: int = 200):
+        self.path = _learning_file(profile)
+        self.promote_after = max(1, promote_after)
+        self.max_observations = max(1, max_observations)
+        self._observations: dict[str, dict[str, Any]] = self._load()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and isinstance(data.get("observations"), dict):
+                return data["observations"]
+        except Exception:
+            pass
+        return {}
+
+    def _save(self) -> None:
+        payload = {"observations": self._observations}
+        self.path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
+
+    @staticmethod
+    def learnable(utterance: str) -> bool:
+        tokens = _tokenize(utterance)
+        return 2 <= len(tokens) <= 10 and not (set(tokens) & CONTEXT_WORDS)
+
+    def observe(self, utterance: str, action: dict[str, Any], known_commands: list[QuickCommand]) -> QuickCommand | None:
+        """Record one verified action. Returns a new learned QuickCommand when the pair is promoted."""
+        norm = _normalize_text(utterance)
+        if not self.learnable(norm):
+            return None
+        for cmd in known_commands:
+            if any(_normalize_text(p) == norm for p in cmd.phrases):
+                return None
+
+        canonical = _canonical_action(action)
+        now = datetime.now().isoformat(timespec="seconds")
+        entry = self._observations.get(norm)
+        if entry is None or entry.get("action") != canonical:
+            # New phrasing, or the same phrasing resolved differently: start counting again.
+            entry = {"action": canonical, "hits": 0, "first_seen": now}
+        entry["hits"] = int(entry.get("hits", 0)) + 1
+        entry["last_seen"] = now
+        self._observations[norm] = entry
+
+        promoted = None
+        if entry["hits"] >= self.promote_after:
+            del self._observations[norm]
+            promoted = QuickCommand(
+                id=new_quick_command_id(f"learned_{norm}"),
+                phrases=[norm],
+                action=dict(canonical),
+                safety="safe_auto" if is_safe_auto_action(canonical) else "requires_confirm",
+                enabled=True,
+                meta={"source": "learned", "hits": entry["hits"], "promoted_at": now, "last_used": now},
+            )
+
+        if len(self._observations) > self.max_observations:
+            oldest = sorted(self._observations, key=lambda k: self._observations[k].get("last_seen", ""))
+            for key in oldest[: len(self._observations) - self.max_observations]:
+                del self._observations[key]
+        self._save()
+        return promoted
+
+
+def evict_learned(commands: list[QuickCommand], max_learned: int) -> list[QuickCommand]:
+    """Drop the least recently used learned commands beyond max_learned; other commands are kept."""
+    learned = [c for c in commands if (c.meta or {}).get("source") == "learned"]
+    if len(learned) <= max_learned:
+        return commands
+    learned.sort(key=lambda c: str((c.meta or {}).get("last_used") or (c.meta or {}).get("promoted_at") or ""))
+    drop = {c.id for c in learned[: len(learned) - max_learned]}
+    return [c for c in commands if c.id not in drop]
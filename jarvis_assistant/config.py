@@ -1,5 +1,6 @@
 import json
 import os
+from typing import Any
 from urllib.parse import urlparse
 
 from . import app_paths
@@ -8,9 +9,31 @@ from .utils import logger
 
 # Default Settings
 DEFAULT_WHISPER_MODEL = "base"
+DEFAULT_STT_CASCADE_ENABLED = True
+DEFAULT_STT_FAST_MODEL = "tiny"
+DEFAULT_STT_FAST_MIN_LOGPROB = -0.6
+DEFAULT_STT_SPEECH_GATE_ENABLED = True
+DEFAULT_STT_OUT_OF_PROCESS = True
+DEFAULT_GRAMMAR_RECOGNIZER_ENABLED = False
+DEFAULT_GRAMMAR_MODEL_PATH = ""
+DEFAULT_GRAMMAR_MIN_CONFIDENCE = 0.85
+DEFAULT_STT_NO_SPEECH_THRESHOLD = 0.6
+DEFAULT_STT_LOGPROB_THRESHOLD = -1.0
+DEFAULT_STT_DECODING_PROFILE = {
+    "device": "cpu",
+    "compute_type": "int8",
+    "cpu_threads": 0,  # 0 = faster-whisper default
+    "num_workers": 1,
+    "beam_size": 5,
+    "best_of": 5,
+    "temperature_fallback": True,
+    "without_timestamps": False,
+}
 DEFAULT_OLLAMA_MODEL = "qwen2.5:0.5b"
 DEFAULT_OLLAMA_API_URL = "http://127.0.0.1:11434"
 DEFAULT_OLLAMA_URL_HISTORY = [DEFAULT_OLLAMA_API_URL]
+DEFAULT_OLLAMA_KEEP_ALIVE = "30m"
+DEFAULT_OLLAMA_NUM_CTX = 4096
 DEFAULT_LMSTUDIO_API_URL = "http://127.0.0.1:1234"
 DEFAULT_LMSTUDIO_URL_HISTORY = [DEFAULT_LMSTUDIO_API_URL]
 DEFAULT_LMSTUDIO_MODEL = ""
@@ -24,6 +47,24 @@ DEFAULT_WAKE_RECORD_MAX_SEC = 8.0
 DEFAULT_WAKE_VAD_ENERGY_THRESHOLD = 0.01
 DEFAULT_QUICK_COMMANDS_ENABLED = True
 DEFAULT_QUICK_COMMANDS_FUZZY_ENABLED = True
+DEFAULT_QUICK_COMMANDS_PHONETIC_ENABLED = True
+DEFAULT_QUICK_COMMANDS_SLOTS_ENABLED = True
+DEFAULT_QUICK_COMMANDS_LEARNING_ENABLED = True
+DEFAULT_QUICK_COMMANDS_LEARN_AFTER = 3
+DEFAULT_QUICK_COMMANDS_MAX_LEARNED = 50
+DEFAULT_SEMANTIC_ROUTER_ENABLED = False
+DEFAULT_SEMANTIC_ROUTER_MODEL = "nomic-embed-text"
+DEFAULT_SEMANTIC_ROUTER_THRESHOLD = 0.82
+DEFAULT_COMBINED_AGENT_PROVIDERS: list[str] = []
+DEFAULT_SPECULATIVE_ACTION_ENABLED = False
+DEFAULT_ENTITY_RETRIEVAL_TOP_K = 20
+DEFAULT_LLM_NUM_PREDICT: dict[str, int] = {}
+DEFAULT_STRUCTURED_OUTPUT_ENABLED = True
+DEFAULT_INTENT_STREAMING_ENABLED = True
+DEFAULT_INTENT_STREAM_TTS_ENABLED = True
+DEFAULT_LLM_PRELOAD_ENABLED = True
+DEFAULT_LLM_STAGE_MODELS: dict[str, Any] = {}
+DEFAULT_LLM_MEMORY_BUDGET_GB = 0.0
 DEFAULT_HA_URL = os.environ.get("HA_URL", "")
 DEFAULT_HA_TOKEN = ""
 DEFAULT_ASSISTANT_NAME = "JARVIS"
@@ -174,6 +215,268 @@ class Config:
     def whisper_model(self, value):
         self._settings["whisper_model"] = value
 
+    @property
+    def stt_cascade_enabled(self) -> bool:
+        return bool(self._settings.get("stt_cascade_enabled", DEFAULT_STT_CASCADE_ENABLED))
+
+    @stt_cascade_enabled.setter
+    def stt_cascade_enabled(self, value: bool) -> None:
+        self._settings["stt_cascade_enabled"] = bool(value)
+
+    @property
+    def stt_fast_model(self) -> str:
+        return self._settings.get("stt_fast_model", DEFAULT_STT_FAST_MODEL)
+
+    @stt_fast_model.setter
+    def stt_fast_model(self, value: str) -> None:
+        self._settings["stt_fast_model"] = value
+
+    @property
+    def stt_fast_min_logprob(self) -> float:
+        try:
+            return float(self._settings.get("stt_fast_min_logprob", DEFAULT_STT_FAST_MIN_LOGPROB))
+        except Exception:
+            return DEFAULT_STT_FAST_MIN_LOGPROB
+
+    @stt_fast_min_logprob.setter
+    def stt_fast_min_logprob(self, value: float) -> None:
+        self._settings["stt_fast_min_logprob"] = float(value)
+
+    @property
+    def stt_speech_gate_enabled(self) -> bool:
+        return bool(self._settings.get("stt_speech_gate_enabled", DEFAULT_STT_SPEECH_GATE_ENABLED))
+
+    @stt_speech_gate_enabled.setter
+    def stt_speech_gate_enabled(self, value: bool) -> None:
+        self._settings["stt_speech_gate_enabled"] = bool(value)
+
+    @property
+    def stt_out_of_process(self) -> bool:
+        return bool(self._settings.get("stt_out_of_process", DEFAULT_STT_OUT_OF_PROCESS))
+
+    @stt_out_of_process.setter
+    def stt_out_of_process(self, value: bool) -> None:
+        self._settings["stt_out_of_process"] = bool(value)
+
+    @property
+    def grammar_recognizer_enabled(self) -> bool:
+        return bool(self._settings.get("grammar_recognizer_enabled", DEFAULT_GRAMMAR_RECOGNIZER_ENABLED))
+
+    @grammar_recognizer_enabled.setter
+    def grammar_recognizer_enabled(self, value: bool) -> None:
+        self._settings["grammar_recognizer_enabled"] = bool(value)
+
+    @property
+    def grammar_model_path(self) -> str:
+        return str(self._settings.get("grammar_model_path", DEFAULT_GRAMMAR_MODEL_PATH) or "")
+
+    @grammar_model_path.setter
+    def grammar_model_path(self, value: str) -> None:
+        self._settings["grammar_model_path"] = str(value or "").strip()
+
+    @property
+    def grammar_min_confidence(self) -> float:
+        try:
+            return float(self._settings.get("grammar_min_confidence", DEFAULT_GRAMMAR_MIN_CONFIDENCE))
+        except Exception:
+            return DEFAULT_GRAMMAR_MIN_CONFIDENCE
+
+    @grammar_min_confidence.setter
+    def grammar_min_confidence(self, value: float) -> None:
+        self._settings["grammar_min_confidence"] = float(value)
+
+    @property
+    def stt_no_speech_threshold(self) -> float:
+        try:
+            return float(self._settings.get("stt_no_speech_threshold", DEFAULT_STT_NO_SPEECH_THRESHOLD))
+        except Exception:
+            return DEFAULT_STT_NO_SPEECH_THRESHOLD
+
+    @stt_no_speech_threshold.setter
+    def stt_no_speech_threshold(self, value: float) -> None:
+        self._settings["stt_no_speech_threshold"] = float(value)
+
+    @property
+    def stt_logprob_threshold(self) -> float:
+        try:
+            return float(self._settings.get("stt_logprob_threshold", DEFAULT_STT_LOGPROB_THRESHOLD))
+        except Exception:
+            return DEFAULT_STT_LOGPROB_THRESHOLD
+
+    @stt_logprob_threshold.setter
+    def stt_logprob_threshold(self, value: float) -> None:
+        self._settings["stt_logprob_threshold"] = float(value)
+
+    @property
+    def stt_decoding_profile(self) -> dict:
+        raw = self._settings.get("stt_decoding_profile")
+        profile = dict(DEFAULT_STT_DECODING_PROFILE)
+        if not isinstance(raw, dict):
+            return profile
+        for key, default in DEFAULT_STT_DECODING_PROFILE.items():
+            if key not in raw:
+                continue
+            try:
+                if isinstance(default, bool):
+                    profile[key] = bool(raw[key])
+                elif isinstance(default, int):
+                    profile[key] = max(0, int(raw[key]))
+                else:
+                    profile[key] = str(raw[key]).strip() or default
+            except Exception:
+                continue
+        profile["beam_size"] = max(1, profile["beam_size"])
+        profile["best_of"] = max(1, profile["best_of"])
+        profile["num_workers"] = max(1, profile["num_workers"])
+        return profile
+
+    @stt_decoding_profile.setter
+    def stt_decoding_profile(self, value: dict) -> None:
+        if not isinstance(value, dict):
+            value = {}
+        self._settings["stt_decoding_profile"] = {
+            k: v for k, v in value.items() if k in DEFAULT_STT_DECODING_PROFILE
+        }
+
+    @property
+    def semantic_router_enabled(self) -> bool:
+        return bool(self._settings.get("semantic_router_enabled", DEFAULT_SEMANTIC_ROUTER_ENABLED))
+
+    @semantic_router_enabled.setter
+    def semantic_router_enabled(self, value: bool) -> None:
+        self._settings["semantic_router_enabled"] = bool(value)
+
+    @property
+    def semantic_router_model(self) -> str:
+        return str(self._settings.get("semantic_router_model", DEFAULT_SEMANTIC_ROUTER_MODEL) or DEFAULT_SEMANTIC_ROUTER_MODEL)
+
+    @semantic_router_model.setter
+    def semantic_router_model(self, value: str) -> None:
+        self._settings["semantic_router_model"] = str(value or "").strip()
+
+    @property
+    def semantic_router_threshold(self) -> float:
+        try:
+            return float(self._settings.get("semantic_router_threshold", DEFAULT_SEMANTIC_ROUTER_THRESHOLD))
+        except Exception:
+            return DEFAULT_SEMANTIC_ROUTER_THRESHOLD
+
+    @semantic_router_threshold.setter
+    def semantic_router_threshold(self, value: float) -> None:
+        self._settings["semantic_router_threshold"] = float(value)
+
+    @property
+    def combined_agent_providers(self) -> list[str]:
+        """Providers for which home_control intent and actions come from one LLM call."""
+        value = self._settings.get("combined_agent_providers", DEFAULT_COMBINED_AGENT_PROVIDERS)
+        if not isinstance(value, list):
+            return list(DEFAULT_COMBINED_AGENT_PROVIDERS)
+        return [str(p).strip().lower() for p in value if str(p).strip()]
+
+    @combined_agent_providers.setter
+    def combined_agent_providers(self, value: list[str]) -> None:
+        if not isinstance(value, list):
+            value = []
+        self._settings["combined_agent_providers"] = [str(p).strip().lower() for p in value if str(p).strip()]
+
+    @property
+    def speculative_action_enabled(self) -> bool:
+        return bool(self._settings.get("speculative_action_enabled", DEFAULT_SPECULATIVE_ACTION_ENABLED))
+
+    @speculative_action_enabled.setter
+    def speculative_action_enabled(self, value: bool) -> None:
+        self._settings["speculative_action_enabled"] = bool(value)
+
+    @property
+    def entity_retrieval_top_k(self) -> int:
+        """Entities listed in LLM prompts per request (0 = list all)."""
+        try:
+            return max(0, int(self._settings.get("entity_retrieval_top_k", DEFAULT_ENTITY_RETRIEVAL_TOP_K)))
+        except Exception:
+            return DEFAULT_ENTITY_RETRIEVAL_TOP_K
+
+    @entity_retrieval_top_k.setter
+    def entity_retrieval_top_k(self, value: int) -> None:
+        self._settings["entity_retrieval_top_k"] = max(0, int(value))
+
+    @property
+    def llm_num_predict(self) -> dict[str, int]:
+        """Per-stage reply token limits overriding token_budget.STAGE_NUM_PREDICT (0 = no limit)."""
+        value = self._settings.get("llm_num_predict", DEFAULT_LLM_NUM_PREDICT)
+        if not isinstance(value, dict):
+            return dict(DEFAULT_LLM_NUM_PREDICT)
+        limits = {}
+        for stage, limit in value.items():
+            try:
+                limits[str(stage)] = max(0, int(limit))
+            except Exception:
+                continue
+        return limits
+
+    @llm_num_predict.setter
+    def llm_num_predict(self, value: dict[str, int]) -> None:
+        self._settings["llm_num_predict"] = dict(value) if isinstance(value, dict) else {}
+
+    @property
+    def llm_stage_models(self) -> dict[str, Any]:
+        """Per-stage model ("qwen2.5:1.5b") or {"provider", "model"} for intent/action/response (model_routing)."""
+        value = self._settings.get("llm_stage_models", DEFAULT_LLM_STAGE_MODELS)
+        if not isinstance(value, dict):
+            return dict(DEFAULT_LLM_STAGE_MODELS)
+        return {str(stage): entry for stage, entry in value.items() if isinstance(entry, (str, dict)) and entry}
+
+    @llm_stage_models.setter
+    def llm_stage_models(self, value: dict[str, Any]) -> None:
+        self._settings["llm_stage_models"] = dict(value) if isinstance(value, dict) else {}
+
+    @property
+    def llm_memory_budget_gb(self) -> float:
+        """Size limit for the local models kept loaded together (0 = no limit)."""
+        try:
+            return max(0.0, float(self._settings.get("llm_memory_budget_gb", DEFAULT_LLM_MEMORY_BUDGET_GB)))
+        except Exception:
+            return DEFAULT_LLM_MEMORY_BUDGET_GB
+
+    @llm_memory_budget_gb.setter
+    def llm_memory_budget_gb(self, value: float) -> None:
+        self._settings["llm_memory_budget_gb"] = value
+
+    @property
+    def structured_output_enabled(self) -> bool:
+        """Send a JSON schema with intent/action requests on providers that support it (output_schema)."""
+        return bool(self._settings.get("structured_output_enabled", DEFAULT_STRUCTURED_OUTPUT_ENABLED))
+
+    @structured_output_enabled.setter
+    def structured_output_enabled(self, value: bool) -> None:
+        self._settings["structured_output_enabled"] = bool(value)
+
+    @property
+    def intent_streaming_enabled(self) -> bool:
+        """Stream the intent reply and dispatch as soon as the needed fields are complete (json_stream)."""
+        return bool(self._settings.get("intent_streaming_enabled", DEFAULT_INTENT_STREAMING_ENABLED))
+
+    @intent_streaming_enabled.setter
+    def intent_streaming_enabled(self, value: bool) -> None:
+        self._settings["intent_streaming_enabled"] = bool(value)
+
+    @property
+    def intent_stream_tts_enabled(self) -> bool:
+        """Speak a streamed conversational intent reply sentence by sentence (sentence_stream)."""
+        return bool(self._settings.get("intent_stream_tts_enabled", DEFAULT_INTENT_STREAM_TTS_ENABLED))
+
+    @intent_stream_tts_enabled.setter
+    def intent_stream_tts_enabled(self, value: bool) -> None:
+        self._settings["intent_stream_tts_enabled"] = bool(value)
+
+    @property
+    def llm_preload_enabled(self) -> bool:
+        """Keep the local model loaded: preload at startup, after sleep and settings changes (llm_residency)."""
+        return bool(self._settings.get("llm_preload_enabled", DEFAULT_LLM_PRELOAD_ENABLED))
+
+    @llm_preload_enabled.setter
+    def llm_preload_enabled(self, value: bool) -> None:
+        self._settings["llm_preload_enabled"] = bool(value)
+
     @property
     def ollama_model(self):
         return self._settings.get("ollama_model", DEFAULT_OLLAMA_MODEL)
@@ -182,6 +485,27 @@ class Config:
     def ollama_model(self, value):
         self._settings["ollama_model"] = value
 
+    @property
+    def ollama_keep_alive(self) -> str:
+        """Sent with every request; a constant value avoids unload/reload churn between stages."""
+        return str(self._settings.get("ollama_keep_alive", DEFAULT_OLLAMA_KEEP_ALIVE) or DEFAULT_OLLAMA_KEEP_ALIVE)
+
+    @ollama_keep_alive.setter
+    def ollama_keep_alive(self, value: str) -> None:
+        self._settings["ollama_keep_alive"] = str(value or "").strip()
+
+    @property
+    def ollama_num_ctx(self) -> int:
+        """Context window for every request (0 = server default). Changing it per call reloads the model."""
+        try:
+            return max(0, int(self._settings.get("ollama_num_ctx", DEFAULT_OLLAMA_NUM_CTX)))
+        except Exception:
+            return DEFAULT_OLLAMA_NUM_CTX
+
+    @ollama_num_ctx.setter
+    def ollama_num_ctx(self, value: int) -> None:
+        self._settings["ollama_num_ctx"] = max(0, int(value))
+
     @property
     def ollama_api_url(self):
         return self._normalize_ollama_base_url(
@@ -371,6 +695,54 @@ class Config:
     def quick_commands_fuzzy_enabled(self, value: bool) -> None:
         self._settings["quick_commands_fuzzy_enabled"] = bool(value)
 
+    @property
+    def quick_commands_phonetic_enabled(self) -> bool:
+        return bool(
+            self._settings.get("quick_commands_phonetic_enabled", DEFAULT_QUICK_COMMANDS_PHONETIC_ENABLED)
+        )
+
+    @quick_commands_phonetic_enabled.setter
+    def quick_commands_phonetic_enabled(self, value: bool) -> None:
+        self._settings["quick_commands_phonetic_enabled"] = bool(value)
+
+    @property
+    def quick_commands_slots_enabled(self) -> bool:
+        return bool(self._settings.get("quick_commands_slots_enabled", DEFAULT_QUICK_COMMANDS_SLOTS_ENABLED))
+
+    @quick_commands_slots_enabled.setter
+    def quick_commands_slots_enabled(self, value: bool) -> None:
+        self._settings["quick_commands_slots_enabled"] = bool(value)
+
+    @property
+    def quick_commands_learning_enabled(self) -> bool:
+        return bool(self._settings.get("quick_commands_learning_enabled", DEFAULT_QUICK_COMMANDS_LEARNING_ENABLED))
+
+    @quick_commands_learning_enabled.setter
+    def quick_commands_learning_enabled(self, value: bool) -> None:
+        self._settings["quick_commands_learning_enabled"] = bool(value)
+
+    @property
+    def quick_commands_learn_after(self) -> int:
+        try:
+            return max(1, int(self._settings.get("quick_commands_learn_after", DEFAULT_QUICK_COMMANDS_LEARN_AFTER)))
+        except Exception:
+            return DEFAULT_QUICK_COMMANDS_LEARN_AFTER
+
+    @quick_commands_learn_after.setter
+    def quick_commands_learn_after(self, value: int) -> None:
+        self._settings["quick_commands_learn_after"] = max(1, int(value))
+
+    @property
+    def quick_commands_max_learned(self) -> int:
+        try:
+            return max(0, int(self._settings.get("quick_commands_max_learned", DEFAULT_QUICK_COMMANDS_MAX_LEARNED)))
+        except Exception:
+            return DEFAULT_QUICK_COMMANDS_MAX_LEARNED
+
+    @quick_commands_max_learned.setter
+    def quick_commands_max_learned(self, value: int) -> None:
+        self._settings["quick_commands_max_learned"] = max(0, int(value))
+
     @property
     def ha_url(self) -> str:
         return self._settings.get("ha_url", os.environ.get("HA_URL", DEFAULT_HA_URL))
@@ -0,0 +1,208 @@
+"""
+Relevance-filtered entity context for LLM prompts.
+
+Instead of listing every entity Home Assistant returns, the prompt gets the
+top-k entities scored against the utterance:
+
+- name / entity_id tokens (IDF-weighted, prefix matches for inflections like
+  "lampen" -> "lampe", compound matches like "wohnzimmerlampe"),
+- domain keywords ("light", "Heizung", "Rollo", ...),
+- entities mentioned in recent conversation turns, which are always included
+  when the utterance contains a pronoun ("turn it off", "mach sie aus").
+
+"all"/"alle" plus a domain keyword keeps every entity of that domain. Houses
+with at most top_k entities are passed through unchanged, so small setups keep
+a stable (cache-friendly) device list.
+
+    python -m jarvis_assistant.entity_retrieval [--sizes 50 500 2000] [--llm]
+
+reports prompt tokens and retrieval / intent-call latency per house size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+from dataclasses import dataclass
+
+from .intent_utils import parse_entities
+from .quick_commands import _normalize_text, _tokenize
+
+DOMAIN_KEYWORDS = {
+    "light": {"light", "lights", "lamp", "lamps", "licht", "lichter", "lampe", "lampen", "leuchte"},
+    "switch": {"switch", "switches", "plug", "outlet", "schalter", "steckdose", "stecker"},
+    "sensor": {"temperature", "humidity", "sensor", "temperatur", "feuchtigkeit", "grad", "degrees", "power", "energy"},
+    "binary_sensor": {"door", "window", "motion", "tur", "tuer", "fenster", "bewegung", "open", "offen"},
+    "climate": {"heating", "heater", "thermostat", "climate", "ac", "heizung", "klima"},
+    "cover": {"blind", "blinds", "cover", "shutter", "shutters", "rollo", "rolladen", "jalousie", "garage"},
+    "input_boolean": {"mode", "modus", "helper", "helfer"},
+    "input_number": {"heater", "heizung", "level", "wert", "value"},
+}
+PRONOUNS = {"it", "that", "them", "those", "this", "es", "ihn", "sie", "das", "diese"}
+ALL_WORDS = {"all", "every", "alle", "allen", "sammtliche", "samtliche"}
+_MIN_PREFIX = 4
+
+
+@dataclass
+class _Indexed:
+    entity: dict[str, str]
+    line: str
+    tokens: set[str]
+    compact: str
+
+
+class EntityRetriever:
+    def __init__(self, entities_context: str):
+        self.entities_context = entities_context or ""
+        self.entities = parse_entities(self.entities_context)
+        self._items: list[_Indexed] = []
+        doc_freq: dict[str, int] = {}
+        for e in self.entities:
+            object_id = e["entity_id"].split(".", 1)[-1].replace("_", " ")
+            tokens = set(_tokenize(e["name"])) | set(_tokenize(object_id))
+            line = f"- Name: '{e['name']}', Entity: '{e['entity_id']}', State: '{e['state']}'"
+            self._items.append(_Indexed(e, line, tokens, _normalize_text(e["name"]).replace(" ", "")))
+            for tok in tokens:
+                doc_freq[tok] = doc_freq.get(tok, 0) + 1
+        n = max(1, len(self._items))
+        self._idf = {tok: math.log(1 + n / df) for tok, df in doc_freq.items()}
+
+    def _token_score(self, query_tokens: set[str], item: _Indexed) -> float:
+        score = 0.0
+        for tok in item.tokens:
+            if tok in query_tokens:
+                score += self._idf.get(tok, 1.0)
+            elif len(tok) >= _MIN_PREFIX and any(
+                len(q) >= _MIN_PREFIX and (q.startswith(tok) or tok.startswith(q) or tok in q) for q in query_tokens
+            ):
+                score += 0.6 * self._idf.get(tok, 1.0)
+        return score
+
+    def _mentioned(self, history: list[dict]) -> list[_Indexed]:
+        """Entities named in recent turns, most recent first."""
+        found: list[_Indexed] = []
+        for message in reversed(history):
+            text = _normalize_text(str(message.get("content") or ""))
+            padded = f" {text} "
+            for item in self._items:
+                if item in found:
+                    continue
+                name = _normalize_text(item.entity["name"])
+                if (name and f" {name} " in padded) or item.entity["entity_id"].lower() in str(message.get("content") or "").lower():
+                    found.append(item)
+        return found
+
+    def select(self, text: str, history: list[dict] | None = None, k: int = 20) -> list[dict[str, str]]:
+        if len(self._items) <= k:
+            return list(self.entities)
+        query_tokens = set(_tokenize(text))
+        compact_query = _normalize_text(text).replace(" ", "")
+        # Keyword suffixes catch German compounds ("wohnzimmerlampe" -> light).
+        domains = {
+            d
+            for d, words in DOMAIN_KEYWORDS.items()
+            if query_tokens & words or any(q.endswith(w) for q in query_tokens for w in words if len(w) >= _MIN_PREFIX)
+        }
+
+        scored: list[tuple[float, int, _Indexed]] = []
+        for idx, item in enumerate(self._items):
+            score = self._token_score(query_tokens, item)
+            if len(item.compact) >= 6 and item.compact in compact_query:
+                score += 3.0
+            if item.entity["domain"] in domains:
+                score += 0.5
+            if score > 0:
+                scored.append((score, idx, item))
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        selected = [item for _, _, item in scored[:k]]
+
+        if query_tokens & ALL_WORDS and domains:
+            selected += [i for i in self._items if i.entity["domain"] in domains and i not in selected]
+
+        recent = self._mentioned(history or [])
+        if query_tokens & PRONOUNS or not selected:
+            # Pronoun resolution: keep recently mentioned entities even if the text names none.
+            selected += [i for i in recent[:k] if i not in selected]
+        return [i.entity for i in selected]
+
+    def context(self, text: str, history: list[dict] | None = None, k: int = 20) -> str:
+        """get_relevant_entities()-formatted lines for the selected entities (unchanged input for small houses)."""
+        if not self._items or len(self._items) <= k:
+            return self.entities_context
+        keep = {e["entity_id"] for e in self.select(text, history, k)}
+        if not keep:
+            return "No matching devices for this request."
+        return "\n".join(item.line for item in self._items if item.entity["entity_id"] in keep)
+
+
+def synthetic_house(count: int) -> str:
+    domains = ["light", "switch", "sensor", "binary_sensor", "input_boolean", "input_number", "climate", "cover"]
+    rooms = ["Kitchen", "Living Room", "Bedroom", "Office", "Hallway", "Bathroom", "Garage", "Garden",
+             "Basement", "Attic", "Nursery", "Guest Room", "Dining Room", "Laundry", "Patio", "Studio"]
+    kinds = {
+        "light": ["Ceiling Light", "Lamp", "Spots", "Strip"],
+        "switch": ["Plug", "Fan", "Socket"],
+        "sensor": ["Temperature", "Humidity", "Power"],
+        "binary_sensor": ["Door", "Window", "Motion"],
+        "input_boolean": ["Guest Mode", "Night Mode"],
+        "input_number": ["Heater Level", "Target"],
+        "climate": ["Thermostat"],
+        "cover": ["Blinds", "Shutter"],
+    }
+    lines = []
+    for i in range(count):
+        domain = domains[i % len(domains)]
+        room = rooms[(i // len(domains)) % len(rooms)]
+        kind = kinds[domain][(i // (len(domains) * len(rooms))) % len(kinds[domain])]
+        suffix = i // (len(domains) * len(rooms) * len(kinds[domain]))
+        name = f"{room} {kind}" + (f" {suffix + 1}" if suffix else "")
+        entity_id = f"{domain}.{_normalize_text(name).replace(' ', '_')}"
+        lines.append(f"- Name: '{name}', Entity: '{entity_id}', State: 'off'")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Prompt size and latency with and without entity retrieval.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--llm", action="store_true", help="Also time one intent call per variant with the configured provider")
+    args = parser.parse_args(argv)
+
+    from .prompt_compiler import PromptContext, compile_prompt
+
+    llm = None
+    if args.llm:
+        from .agent_benchmark import _SyncLLM
+
+        llm = _SyncLLM()
+    text = "Turn off the kitchen lamp"
+    history = [{"role": "user", "content": "Is the office fan on?"}, {"role": "assistant", "content": "Office Fan is on."}]
+    for size in args.sizes:
+        house = synthetic_house(size)
+        started = time.perf_counter()
+        retriever = EntityRetriever(house)
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        filtered = retriever.context(text, history, args.top_k)
+        select_ms = (time.perf_counter() - started) * 1000
+        for label, entities_context in (("full", house), ("top-k", filtered)):
+            ctx = PromptContext(entities_context=entities_context, time_context="2026-01-05T17:00:00", history=history)
+            compiled = compile_prompt("intent", ctx, text)
+            line = f"entities={size:5d} {label:<6} prompt_tokens={compiled.report['total']:6d}"
+            if label == "top-k":
+                line += f"  index_ms={build_ms:6.1f}  select_ms={select_ms:5.2f}"
+            if llm is not None:
+                started = time.perf_counter()
+                try:
+                    llm(compiled.messages, options=compiled.options)
+                    line += f"  intent_ms={(time.perf_counter() - started) * 1000:7.0f}"
+                except Exception as exc:
+                    line += f"  intent_error={exc}"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,8 @@ class HomeAssistantClient:
         # This allows Settings changes (URL/token) to take effect without app restart.
         self.base_url = base_url
         self.token = token
+        # Attributes of the entities listed by the last get_relevant_entities() call.
+        self.entity_attributes: dict[str, dict] = {}
 
     def _resolve_base_url(self) -> str:
         base_url = (self.base_url or cfg.ha_url or "").strip().rstrip("/")
@@ -129,14 +131,17 @@ class HomeAssistantClient:
         ]
         
         lines = []
+        attributes = {}
         for state in states:
             entity_id = state.get("entity_id", "")
             domain = entity_id.split(".")[0]
             
             if domain in relevant_domains:
+                attributes[entity_id] = state.get("attributes", {})
                 friendly_name = state.get("attributes", {}).get("friendly_name", entity_id)
                 state_val = state.get("state", "unknown")
                 lines.append(f"- Name: '{friendly_name}', Entity: '{entity_id}', State: '{state_val}'")
+        self.entity_attributes = attributes
                 
         if not lines:
             return "No relevant devices found."
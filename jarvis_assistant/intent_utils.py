@@ -4,17 +4,17 @@ from datetime import datetime, timedelta
 
 def parse_delay_seconds(user_text: str, now: datetime) -> int:
     text = (user_text or "").lower()
-    rel = re.search(r"in\s+(\d+)\s*(seconds?|secs?|minutes?|mins?|hours?|hrs?)", text)
+    rel = re.search(r"in\s+(\d+)\s*(seconds?|secs?|sekunden?|minutes?|minuten?|mins?|hours?|hrs?|stunden?)", text)
     if rel:
         amount = int(rel.group(1))
         unit = rel.group(2)
-        if unit.startswith("sec"):
+        if unit.startswith("sec") or unit.startswith("sek"):
             return amount
         if unit.startswith("min"):
             return amount * 60
-        if unit.startswith("hour") or unit.startswith("hr"):
+        if unit.startswith("hour") or unit.startswith("hr") or unit.startswith("stund"):
             return amount * 3600
-    if "half an hour" in text or "half hour" in text:
+    if "half an hour" in text or "half hour" in text or "halben stunde" in text:
         return 1800
 
     at_match = re.search(r"(?:at|um)\s*(\d{1,2})[:.](\d{2})", text)
@@ -29,6 +29,27 @@ def parse_delay_seconds(user_text: str, now: datetime) -> int:
     return 0
 
 
+def parse_entities(ha_entities: str) -> list[dict[str, str]]:
+    """Parse HomeAssistantClient.get_relevant_entities() lines into name/entity_id/state/domain dicts."""
+    entities = []
+    for line in (ha_entities or "").splitlines():
+        line = line.strip()
+        match = re.match(r"- Name: '(.+?)', Entity: '(.+?)', State: '(.+?)'$", line)
+        if not match:
+            continue
+        name, entity_id, state = match.groups()
+        domain = entity_id.split(".")[0] if "." in entity_id else ""
+        entities.append(
+            {
+                "name": name,
+                "entity_id": entity_id,
+                "state": state,
+                "domain": domain,
+            }
+        )
+    return entities
+
+
 def is_multi_domain_request(user_text: str, entities: list[dict[str, str]]) -> bool:
     text = (user_text or "").lower()
     text_compact = re.sub(r"[\s_\-]+", "", text)
@@ -150,3 +171,46 @@ def state_matches_action(
         return not _is_unknown_state(new_state)
 
     return False
+
+
+ACTION_SERVICES = ("turn_on", "turn_off", "toggle", "set_value")
+
+
+def validate_actions(actions: list, entities: list[dict[str, str]]) -> list[dict] | None:
+    """
+    Check LLM-proposed service calls against the entity registry.
+    Returns normalized actions, or None when any action is unusable.
+    """
+    if not isinstance(actions, list) or not actions:
+        return None
+    known = {e["entity_id"]: e["domain"] for e in entities}
+    out = []
+    for action in actions:
+        if not isinstance(action, dict):
+            return None
+        service = str(action.get("service") or "").strip()
+        entity_ids = action.get("entity_id")
+        ids = entity_ids if isinstance(entity_ids, list) else [entity_ids]
+        if service not in ACTION_SERVICES or not ids or any(eid not in known for eid in ids):
+            return None
+        domains = {known[eid] for eid in ids}
+        if len(domains) != 1:
+            return None
+        domain = domains.pop()
+        clean = {"domain": domain, "service": service, "entity_id": entity_ids}
+        if service == "set_value":
+            if domain != "input_number":
+                return None
+            try:
+                clean["value"] = float(action.get("value"))
+            except (TypeError, ValueError):
+                return None
+            if clean["value"].is_integer():
+                clean["value"] = int(clean["value"])
+        if action.get("delay_seconds"):
+            try:
+                clean["delay_seconds"] = max(0, int(float(action["delay_seconds"])))
+            except (TypeError, ValueError):
+                return None
+        out.append(clean)
+    return out
@@ -0,0 +1,134 @@
+"""
+Incremental parser for a JSON object arriving as a token stream.
+
+feed() takes each streamed chunk and returns the top-level fields whose value
+became complete with it, so the controller can act on {"intent": ...} while the
+model is still writing the remaining fields. Text before the first "{" (a
+```json fence) is skipped; looks_like_json tells plain-text replies apart after
+the first non-space character.
+
+    parser = IncrementalJSONParser()
+    for chunk in stream:
+        for key, value in parser.feed(chunk).items():
+            ...
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+_WHITESPACE = " \t\r\n"
+_PARTIAL_ESCAPE = re.compile(r"(?<!\\)(?:\\\\)*\\(?:u[0-9a-fA-F]{0,3})?$")
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.text = ""
+        self.fields: dict[str, Any] = {}
+        self.closed = False
+        self.looks_like_json: bool | None = None
+        self._i = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Top-level position: "key" -> "in_key" -> "colon" -> "value_wait" -> "value" -> "after"
+        self._state = "key"
+        self._key = ""
+        self._key_start = 0
+        self._value_start = 0
+        self._value_kind = ""  # "string", "container" or "primitive"
+
+    def feed(self, chunk: str) -> dict[str, Any]:
+        """Append chunk; returns the fields completed by it (in order)."""
+        self.text += chunk or ""
+        new: dict[str, Any] = {}
+        text = self.text
+        while self._i < len(text) and not self.closed:
+            i = self._i
+            c = text[i]
+            self._i += 1
+            if self.looks_like_json is None and c not in _WHITESPACE:
+                self.looks_like_json = c in "{`"
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                    self._state = "key"
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "in_key":
+                        self._key = json.loads(text[self._key_start : i + 1])
+                        self._state = "colon"
+                    elif self._depth == 1 and self._value_kind == "string":
+                        self._complete(i + 1, new)
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == "key":
+                    self._key_start = i
+                    self._state = "in_key"
+                elif self._depth == 1 and self._state == "value_wait":
+                    self._start_value(i, "string")
+            elif c in "{[":
+                if self._depth == 1 and self._state == "value_wait":
+                    self._start_value(i, "container")
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_kind == "container":
+                    self._complete(i + 1, new)
+                elif self._depth == 0:
+                    if self._value_kind == "primitive":
+                        self._complete(i, new)
+                    self.closed = True
+            elif self._depth == 1:
+                if c == ":" and self._state == "colon":
+                    self._state = "value_wait"
+                elif c == ",":
+                    if self._value_kind == "primitive":
+                        self._complete(i, new)
+                    self._state = "key"
+                elif c in _WHITESPACE:
+                    if self._value_kind == "primitive":
+                        self._complete(i, new)
+                elif self._state == "value_wait":
+                    self._start_value(i, "primitive")
+        return new
+
+    def partial_string(self, key: str) -> str | None:
+        """Decoded prefix of a top-level string value that is still streaming (its full value once complete)."""
+        if key in self.fields:
+            value = self.fields[key]
+            return value if isinstance(value, str) else None
+        if self._key != key or self._value_kind != "string" or not self._in_string:
+            return None
+        raw = self.text[self._value_start + 1 : self._i]
+        # Cut an escape sequence that is not complete yet ("\\" or "\\u00").
+        raw = _PARTIAL_ESCAPE.sub("", raw)
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return None
+
+    def _start_value(self, i: int, kind: str) -> None:
+        self._value_start = i
+        self._value_kind = kind
+        self._state = "value"
+
+    def _complete(self, end: int, new: dict[str, Any]) -> None:
+        raw = self.text[self._value_start : end]
+        self._value_kind = ""
+        self._state = "after"
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[self._key] = value
+        new[self._key] = value
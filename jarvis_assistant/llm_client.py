@@ -1,5 +1,6 @@
 import requests
 import json
+import re
 import threading # Added for the new generate method
 import subprocess
 import time
@@ -9,15 +10,30 @@ from urllib.parse import quote, urlparse
 from requests.exceptions import ConnectionError, HTTPError, Timeout, RequestException
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot
 from .config import cfg
+from .output_schema import gemini_schema, nullable_schema
+from .model_routing import ROUTE_RETRY_SECONDS, ModelRoute, primary_route, resident_routes, stage_route
+from .provider_registry import ProviderClient, provider_client
+from .sse_client import anthropic_delta, gemini_delta, openai_delta, stream_chat
+from .utils import logger
 
 class LLMWorker(QObject):
-    REMOTE_UNREACHABLE_PREFIX = "__OLLAMA_REMOTE_UNREACHABLE__"
     """
     Worker for calling Ollama API.
     """
+    REMOTE_UNREACHABLE_PREFIX = "__OLLAMA_REMOTE_UNREACHABLE__"
+    CLOUD_BASE_URLS = {
+        "openai": "https://api.openai.com",
+        "gemini": "https://generativelanguage.googleapis.com",
+        "opencode": "https://opencode.ai",
+    }
+    # Loading a model in LM Studio adds an id; a missing id is refetched right away.
+    LMSTUDIO_MODEL_IDS_TTL = 60.0
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     progress = pyqtSignal(str, str, int) # model, status, percentage
+    tagged_finished = pyqtSignal(str, str) # tag, text
+    tagged_error = pyqtSignal(str, str) # tag, message
+    tagged_partial = pyqtSignal(str, str) # tag, streamed text chunk
 
     def __init__(self):
         super().__init__()
@@ -29,7 +45,9 @@ class LLMWorker(QObject):
         self.download_pct = -1
         self._download_cancel_events: dict[str, threading.Event] = {}
         self._download_states: dict[str, dict] = {}
-        self._lmstudio_supports_response_format: bool | None = None
+        # Tagged (side) requests run concurrently with the main request; see generate_tagged().
+        self._tls = threading.local()
+        self._abort_events: dict[str, threading.Event] = {}
 
     def _ollama_base_url(self):
         return cfg.ollama_api_url
@@ -46,6 +64,14 @@ class LLMWorker(QObject):
     def _lmstudio_v1_url(self, path: str) -> str:
         return f"{self._lmstudio_base_url()}/v1/{path.lstrip('/')}"
 
+    def _client(self, provider: str) -> ProviderClient:
+        """Pooled HTTP client of a backend (provider_registry), keyed by its current base URL."""
+        if provider == "ollama":
+            return provider_client(provider, self._ollama_base_url())
+        if provider == "lmstudio":
+            return provider_client(provider, self._lmstudio_base_url())
+        return provider_client(provider, self.CLOUD_BASE_URLS.get(provider, ""))
+
     def _provider_key(self, model_name: str, provider: str | None = None) -> str:
         p = (provider or cfg.api_provider or "ollama").strip().lower()
         return f"{p}::{model_name}"
@@ -62,7 +88,7 @@ class LLMWorker(QObject):
         if not target:
             return {"ok": False, "error": "Empty Ollama base URL"}
         try:
-            resp = requests.get(f"{target}/api/tags", timeout=5)
+            resp = provider_client("ollama", target).get(f"{target}/api/tags", timeout=5)
             resp.raise_for_status()
             models = resp.json().get("models", [])
             return {"ok": True, "model_count": len(models), "base_url": target}
@@ -95,7 +121,7 @@ class LLMWorker(QObject):
         if not target:
             return [], "Empty LM Studio base URL"
         try:
-            resp = requests.get(f"{target}/v1/models", timeout=8)
+            resp = provider_client("lmstudio", target).get(f"{target}/v1/models", timeout=8)
             resp.raise_for_status()
             data = resp.json()
             rows = data.get("data") if isinstance(data, dict) else data
@@ -111,6 +137,17 @@ class LLMWorker(QObject):
         except Exception as exc:
             return [], str(exc)
 
+    def _lmstudio_model_ids(self, model: str) -> tuple[list[str], str | None]:
+        """/v1/models ids cached on the LM Studio client; refetched when model is not among them."""
+        client = self._client("lmstudio")
+        ids = client.capability("model_ids")
+        if ids is not None and model in ids:
+            return ids, None
+        ids, err = self._fetch_lmstudio_v1_model_ids()
+        if not err:
+            client.set_capability("model_ids", ids, ttl=self.LMSTUDIO_MODEL_IDS_TTL)
+        return ids, err
+
     def test_lmstudio_connection(self, base_url: str | None = None) -> dict:
         target = (base_url or self._lmstudio_base_url() or "").strip().rstrip('/')
         if not target:
@@ -118,7 +155,7 @@ class LLMWorker(QObject):
 
         v0_models: list[Any] = []
         try:
-            resp_v0 = requests.get(f"{target}/api/v0/models", timeout=6)
+            resp_v0 = provider_client("lmstudio", target).get(f"{target}/api/v0/models", timeout=6)
             resp_v0.raise_for_status()
             data_v0 = resp_v0.json()
             rows_v0 = data_v0.get("data") if isinstance(data_v0, dict) else data_v0
@@ -195,11 +232,135 @@ class LLMWorker(QObject):
     def get_download_states(self) -> dict[str, dict]:
         return {k: v.copy() for k, v in self._download_states.items()}
 
-    def generate(self, messages: list[dict], format: str = "json"):
+    def generate(self, messages: list[dict], format: str = "json", options: dict | None = None):
+        """
+        Generic generation method. options carries the stage's token budget
+        (num_ctx / num_predict, see token_budget.StageBudget.options()).
+        """
+        threading.Thread(target=self._run_generate, args=(messages, format, options)).start()
+
+    def generate_tagged(self, tag: str, messages: list[dict], format: str = "json", options: dict | None = None):
         """
-        Generic generation method.
+        Run a request alongside the main one. The result arrives on tagged_finished/
+        tagged_error instead of finished/error, and abort(tag) cancels it.
         """
-        threading.Thread(target=self._run_generate, args=(messages, format)).start()
+        event = threading.Event()
+        self._abort_events[tag] = event
+        threading.Thread(target=self._run_tagged, args=(tag, event, messages, format, options), daemon=True).start()
+
+    def abort(self, tag: str):
+        event = self._abort_events.pop(tag, None)
+        if event is not None:
+            event.set()
+
+    def _run_tagged(self, tag: str, event: threading.Event, messages: list[dict], format: str, options: dict | None):
+        self._tls.tag = tag
+        self._tls.abort = event
+        try:
+            self._run_generate(messages, format, options)
+        finally:
+            self._tls.tag = None
+            self._tls.abort = None
+            if self._abort_events.get(tag) is event:
+                del self._abort_events[tag]
+
+    def _emit_finished(self, text: str):
+        tag = getattr(self._tls, "tag", None)
+        if tag is None:
+            self.finished.emit(text)
+        elif not self._tls.abort.is_set():
+            self.tagged_finished.emit(tag, text)
+
+    def _emit_partial(self, text: str):
+        tag = getattr(self._tls, "tag", None)
+        if tag is not None and text and not self._tls.abort.is_set():
+            # The consumer is parsing this route's output now; falling back would start a second
+            # document on the same tag, so from here on a stage route's errors are reported.
+            self._tls.defer_errors = False
+            self.tagged_partial.emit(tag, text)
+
+    def _emit_error(self, msg: str):
+        if getattr(self._tls, "defer_errors", False):
+            # A stage route is being tried; _run_generate falls back to the primary model instead.
+            self._tls.deferred_error = msg
+            return
+        tag = getattr(self._tls, "tag", None)
+        if tag is None:
+            self.error.emit(msg)
+        elif not self._tls.abort.is_set():
+            self.tagged_error.emit(tag, msg)
+
+    def _reply_token_limit(self) -> int:
+        """num_predict of the current request's stage budget (0 = provider default)."""
+        options = getattr(self._tls, "options", None) or {}
+        try:
+            return max(0, int(options.get("num_predict") or 0))
+        except Exception:
+            return 0
+
+    def _json_schema(self, format: str) -> dict | None:
+        """Output schema of the current request (output_schema.stage_schema), only for JSON requests."""
+        options = getattr(self._tls, "options", None) or {}
+        return options.get("json_schema") if format == "json" else None
+
+    def _ollama_chat(self, url: str, payload: dict, timeout: float) -> str | None:
+        """POST /api/chat and return the message content; None when a tagged request was aborted."""
+        abort = getattr(self._tls, "abort", None)
+        client = self._client("ollama")
+        if abort is None:
+            response = client.post(url, json=payload, timeout=timeout)
+            response.raise_for_status()
+            result = response.json()
+            self._log_ollama_timings(result)
+            return result.get("message", {}).get("content", "")
+        # Tagged requests stream so that closing the connection on abort stops generation server-side;
+        # chunks are forwarded on tagged_partial.
+        parts = []
+        with client.post(url, json={**payload, "stream": True}, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if abort.is_set():
+                    return None
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                content = chunk.get("message", {}).get("content", "")
+                parts.append(content)
+                self._emit_partial(content)
+                if chunk.get("done"):
+                    self._log_ollama_timings(chunk)
+                    break
+        return "".join(parts)
+
+    def _stream_sse(self, url: str, payload: dict, parse, provider: str, model: str, timeout: float, headers: dict | None = None) -> str | None:
+        """Streamed request to an SSE chat endpoint (sse_client); deltas go out on tagged_partial, None when aborted."""
+        text, _usage = stream_chat(
+            url,
+            payload,
+            parse,
+            provider=provider,
+            model=model,
+            headers=headers,
+            timeout=timeout,
+            on_text=self._emit_partial,
+            abort=getattr(self._tls, "abort", None),
+            http=self._client(provider),
+        )
+        return text
+
+    def _log_ollama_timings(self, result: dict):
+        """Log Ollama's per-call counters; a low prompt_eval_count means the prompt prefix came from cache."""
+        ns = 1_000_000
+        logger.info(
+            "ollama_chat model=%s prompt_eval_count=%s prompt_eval_ms=%d eval_count=%s eval_ms=%d load_ms=%d total_ms=%d",
+            result.get("model"),
+            result.get("prompt_eval_count", 0),
+            int(result.get("prompt_eval_duration") or 0) // ns,
+            result.get("eval_count", 0),
+            int(result.get("eval_duration") or 0) // ns,
+            int(result.get("load_duration") or 0) // ns,
+            int(result.get("total_duration") or 0) // ns,
+        )
 
     def list_models(self):
         """
@@ -549,7 +710,7 @@ class LLMWorker(QObject):
 
     def load_model_lmstudio(self, model_key: str) -> Dict[str, str]:
         try:
-            resp = requests.post(self._lmstudio_url("models/load"), json={"modelKey": model_key}, timeout=20)
+            resp = self._client("lmstudio").post(self._lmstudio_url("models/load"), json={"modelKey": model_key}, timeout=20)
             resp.raise_for_status()
             return {"status": "success"}
         except Exception as e:
@@ -627,9 +788,36 @@ class LLMWorker(QObject):
             return "Prefer discrete GPU; 16GB+ RAM"
         return "Heavy model; strong GPU and RAM recommended"
 
-    def _run_generate(self, messages: list[dict], format: str):
-        provider = cfg.api_provider
+    def _run_generate(self, messages: list[dict], format: str, options: dict | None = None):
+        self._tls.options = options or {}
+        stage = self._tls.options.get("stage")
+        route = stage_route(stage)
+        primary = primary_route()
+        if route != primary and self._route_available(route):
+            self._tls.route = route
+            self._tls.defer_errors = True
+            self._tls.deferred_error = None
+            try:
+                self._generate(route.provider, messages, format)
+            finally:
+                self._tls.defer_errors = False
+            error = self._tls.deferred_error
+            if error is None:
+                return
+            logger.warning(f"llm_route stage={stage} route={route} failed ({error}); falling back to {primary}")
+            self._client(route.provider).mark_model_failed(route.model, ROUTE_RETRY_SECONDS)
+        self._tls.route = primary
+        self._generate(primary.provider, messages, format)
+
+    def _route_available(self, route: ModelRoute) -> bool:
+        return bool(route.model) and not self._client(route.provider).model_failed(route.model)
 
+    def _route_model(self) -> str:
+        """Model of the current request's stage route (model_routing)."""
+        route = getattr(self._tls, "route", None)
+        return (route or primary_route()).model
+
+    def _generate(self, provider: str, messages: list[dict], format: str):
         if provider == "openai":
             self._generate_openai(messages, format)
         elif provider == "gemini":
@@ -645,51 +833,78 @@ class LLMWorker(QObject):
         url = self._ollama_url("chat")
 
         payload = {
-            "model": cfg.ollama_model,
+            "model": self._route_model(),
             "messages": messages,
             "stream": False,
+            # Same keep_alive/num_ctx on every call so the loaded model and its KV cache are reused.
+            "keep_alive": cfg.ollama_keep_alive,
         }
+        options = {}
+        if cfg.ollama_num_ctx:
+            options["num_ctx"] = cfg.ollama_num_ctx
+        if self._reply_token_limit():
+            # num_predict is a sampling option; unlike num_ctx it can vary per stage without a reload.
+            options["num_predict"] = self._reply_token_limit()
+        if options:
+            payload["options"] = options
 
         if format == "json":
-            payload["format"] = "json"
+            # A schema constrains decoding to the stage's fields; plain "json" only guarantees valid JSON.
+            schema = self._json_schema(format)
+            payload["format"] = nullable_schema(schema) if schema and self._ollama_supports_schema() else "json"
 
-        if not self._ensure_ollama_running():
+        # Liveness is tracked passively by the pooled client; only a server known to be down is pinged
+        # (and, locally, started) before the request.
+        if self._client("ollama").alive is False and not self._ensure_ollama_running():
             base = self._ollama_base_url()
             if self._is_local_ollama_host():
-                self.error.emit("Ollama is not reachable. Start it with 'ollama serve' and ensure port 11434 is open.")
+                self._emit_error("Ollama is not reachable. Start it with 'ollama serve' and ensure port 11434 is open.")
             else:
-                self.error.emit(f"{self.REMOTE_UNREACHABLE_PREFIX}:{base}")
+                self._emit_error(f"{self.REMOTE_UNREACHABLE_PREFIX}:{base}")
             return
 
         try:
-            response = requests.post(url, json=payload, timeout=300)
-            response.raise_for_status()
-            result = response.json()
-            content = result.get("message", {}).get("content", "")
-            self.finished.emit(content)
+            content = self._ollama_chat(url, payload, timeout=300)
+            if content is not None:
+                self._emit_finished(content)
             return
         except ConnectionError:
             if self._ensure_ollama_running(force_start=True):
                 try:
-                    response = requests.post(url, json=payload, timeout=60)
-                    response.raise_for_status()
-                    result = response.json()
-                    content = result.get("message", {}).get("content", "")
-                    self.finished.emit(content)
+                    content = self._ollama_chat(url, payload, timeout=60)
+                    if content is not None:
+                        self._emit_finished(content)
                     return
                 except Exception as e:
-                    self.error.emit(f"Ollama Error after retry: {e}")
+                    self._emit_error(f"Ollama Error after retry: {e}")
             base = self._ollama_base_url()
             if self._is_local_ollama_host():
-                self.error.emit("Ollama is not reachable. Start it with 'ollama serve' and ensure port 11434 is open.")
+                self._emit_error("Ollama is not reachable. Start it with 'ollama serve' and ensure port 11434 is open.")
             else:
-                self.error.emit(f"{self.REMOTE_UNREACHABLE_PREFIX}:{base}")
+                self._emit_error(f"{self.REMOTE_UNREACHABLE_PREFIX}:{base}")
         except HTTPError as e:
-            self.error.emit(f"Ollama returned an HTTP error: {e}")
+            self._emit_error(f"Ollama returned an HTTP error: {e}")
         except Timeout:
-            self.error.emit("Ollama request timed out. Try again in a moment.")
+            self._emit_error("Ollama request timed out. Try again in a moment.")
         except RequestException as e:
-            self.error.emit(f"Ollama Error: {e}")
+            self._emit_error(f"Ollama Error: {e}")
+
+    def _ollama_supports_schema(self) -> bool:
+        """Ollama accepts a JSON schema as format from 0.5 on; /api/version is checked once per server."""
+        client = self._client("ollama")
+        supported = client.capability("json_schema")
+        if supported is None:
+            supported = True
+            try:
+                version = client.get(self._ollama_url("version"), timeout=2).json().get("version", "")
+                parts = tuple(int(p) for p in re.findall(r"\d+", version)[:2])
+                supported = not parts or parts >= (0, 5)
+            except Exception:
+                pass
+            client.set_capability("json_schema", supported)
+            if not supported:
+                logger.info(f"Ollama {version} predates JSON schema output; using format=json.")
+        return supported
 
     def _ensure_ollama_running(self, force_start: bool = False) -> bool:
         """
@@ -697,7 +912,7 @@ class LLMWorker(QObject):
         Auto-start is local-host only.
         """
         try:
-            resp = requests.get(self._ollama_url("tags"), timeout=2)
+            resp = self._client("ollama").get(self._ollama_url("tags"), timeout=2)
             if resp.status_code == 200:
                 return True
         except Exception:
@@ -712,7 +927,7 @@ class LLMWorker(QObject):
                 subprocess.Popen(["ollama", "serve"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 time.sleep(2)
                 try:
-                    resp = requests.get(self._ollama_url("tags"), timeout=3)
+                    resp = self._client("ollama").get(self._ollama_url("tags"), timeout=3)
                     if resp.status_code == 200:
                         return True
                 except Exception:
@@ -721,7 +936,7 @@ class LLMWorker(QObject):
                 subprocess.Popen(["open", "-a", "Ollama"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 time.sleep(3)
                 try:
-                    resp = requests.get(self._ollama_url("tags"), timeout=3)
+                    resp = self._client("ollama").get(self._ollama_url("tags"), timeout=3)
                     return resp.status_code == 200
                 except Exception:
                     return False
@@ -729,24 +944,96 @@ class LLMWorker(QObject):
                 return False
         return False
 
+    def preload(self, reason: str = "startup"):
+        """Load the configured local model ahead of the next request (llm_residency)."""
+        threading.Thread(target=self._run_preload, args=(reason,), daemon=True).start()
+
+    def _run_preload(self, reason: str):
+        """Preload the primary and per-stage local models that fit llm_memory_budget_gb together."""
+        budget = int(cfg.llm_memory_budget_gb * 1024**3)
+        kept, skipped = resident_routes(self._route_sizes() if budget else {}, budget)
+        for route in skipped:
+            logger.info(f"llm_residency route={route} not preloaded: over llm_memory_budget_gb={cfg.llm_memory_budget_gb}")
+        for route in kept:
+            if not self._route_available(route):
+                continue
+            started = time.perf_counter()
+            if route.provider == "ollama":
+                load_ms = self._preload_ollama(route.model)
+            else:
+                load_ms = self._preload_lmstudio(route.model)
+            if load_ms is None:
+                continue
+            logger.info(
+                "llm_residency provider=%s model=%s reason=%s load_ms=%d wall_ms=%d",
+                route.provider,
+                route.model,
+                reason,
+                load_ms,
+                int((time.perf_counter() - started) * 1000),
+            )
+
+    def _route_sizes(self) -> dict[ModelRoute, int]:
+        """Installed model sizes of the local providers in use (a proxy for their memory footprint)."""
+        providers = {r.provider for r in resident_routes({}, 0)[0]}
+        return {
+            ModelRoute(provider, m["name"]): int(m.get("raw_size") or 0)
+            for provider in providers
+            for m in self.list_models_detailed(provider)
+        }
+
+    def _preload_ollama(self, model: str) -> int | None:
+        """Empty generate request: loads the model and pins it for keep_alive. Returns Ollama's load time."""
+        if not model:
+            return None
+        payload: Dict[str, Any] = {"model": model, "keep_alive": cfg.ollama_keep_alive}
+        if cfg.ollama_num_ctx:
+            # Same num_ctx as the chat requests, otherwise the first chat reloads the model.
+            payload["options"] = {"num_ctx": cfg.ollama_num_ctx}
+        try:
+            resp = self._client("ollama").post(self._ollama_url("generate"), json=payload, timeout=300)
+            resp.raise_for_status()
+            return int(resp.json().get("load_duration") or 0) // 1_000_000
+        except Exception as e:
+            logger.warning(f"llm_residency: Ollama preload of {model} failed: {e}")
+            return None
+
+    def _preload_lmstudio(self, model: str) -> int | None:
+        if not model:
+            return None
+        client = self._client("lmstudio")
+        try:
+            resp = client.get(self._lmstudio_url(f"models/{quote(model, safe='')}"), timeout=5)
+            if resp.ok and resp.json().get("state") == "loaded":
+                return 0
+        except Exception:
+            pass
+        started = time.perf_counter()
+        result = self.load_model_lmstudio(model)
+        if result.get("status") != "success":
+            logger.warning(f"llm_residency: LM Studio load of {model} failed: {result.get('error')}")
+            return None
+        client.forget_capabilities()
+        return int((time.perf_counter() - started) * 1000)
+
     def _ensure_model_pulled(self, model_name: str):
         # Deprecated in favor of manual pull
         pass
 
     def _generate_lmstudio(self, messages: list[dict], format: str):
-        model = (cfg.lmstudio_model or "").strip()
+        model = self._route_model()
         if not model:
-            self.error.emit("LM Studio model not selected. Choose a model in Settings -> Intelligence.")
+            self._emit_error("LM Studio model not selected. Choose a model in Settings -> Intelligence.")
             return
 
-        v1_ids, v1_err = self._fetch_lmstudio_v1_model_ids()
+        v1_ids, v1_err = self._lmstudio_model_ids(model)
         if v1_err:
-            self.error.emit(f"LM Studio /v1/models check failed: {v1_err}")
+            self._emit_error(f"LM Studio /v1/models check failed: {v1_err}")
             return
         if v1_ids and model not in v1_ids:
             preview = ", ".join(v1_ids[:5])
             suffix = " ..." if len(v1_ids) > 5 else ""
-            self.error.emit(
+            self._emit_error(
                 f"LM Studio model id mismatch: '{model}' is not in /v1/models. "
                 f"Available ids: {preview}{suffix}."
             )
@@ -755,29 +1042,41 @@ class LLMWorker(QObject):
         payload: Dict[str, Any] = {
             "model": model,
             "messages": messages,
-            "stream": False,
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
-        # LM Studio compatibility: do not send OpenAI response_format=json_object.
-        # JSON behavior is enforced by prompt + parser on the app side.
-        include_response_format = False
+        if self._reply_token_limit():
+            payload["max_tokens"] = self._reply_token_limit()
+        # LM Studio compatibility: do not send OpenAI response_format=json_object (rejected);
+        # json_schema is supported, otherwise JSON is enforced by prompt + parser on the app side.
+        client = self._client("lmstudio")
+        schema = self._json_schema(format)
+        if schema and client.capability("response_format", True):
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "reply", "strict": True, "schema": nullable_schema(schema)},
+            }
 
         endpoint = self._lmstudio_v1_url("chat/completions")
         try:
-            response = requests.post(endpoint, json=payload, timeout=180)
-            if response.status_code >= 400:
-                err_text = self._parse_lmstudio_error_text(response)
-                self.error.emit(f"LM Studio {response.status_code}: {err_text} | endpoint={endpoint} model={model}")
+            content = self._stream_sse(endpoint, payload, openai_delta, "lmstudio", model, timeout=180)
+            if content is not None:
+                self._emit_finished(content)
+        except HTTPError as e:
+            err_text = self._parse_lmstudio_error_text(e.response)
+            if "response_format" in payload and e.response.status_code == 400 and "response_format" in err_text:
+                # Older LM Studio builds reject json_schema; remember it and retry without.
+                logger.warning(f"LM Studio rejected response_format ({err_text}); using prompt-enforced JSON.")
+                client.set_capability("response_format", False)
+                self._generate_lmstudio(messages, format)
                 return
-
-            data = response.json()
-            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            self.finished.emit(content)
+            self._emit_error(f"LM Studio {e.response.status_code}: {err_text} | endpoint={endpoint} model={model}")
         except Exception as e:
-            self.error.emit(f"LM Studio request failed: {e} | endpoint={endpoint} model={model}")
+            self._emit_error(f"LM Studio request failed: {e} | endpoint={endpoint} model={model}")
 
     def _generate_openai(self, messages: list[dict], format: str):
         if not cfg.api_key:
-            self.error.emit("OpenAI API Key not set")
+            self._emit_error("OpenAI API Key not set")
             return
             
         headers = {
@@ -786,28 +1085,44 @@ class LLMWorker(QObject):
         }
         
         payload = {
-            "model": "gpt-4o-mini", # Default to mini for speed
-            "messages": messages
+            "model": self._route_model(),
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
+        if self._reply_token_limit():
+            payload["max_tokens"] = self._reply_token_limit()
         
-        if format == "json":
+        schema = self._json_schema(format)
+        if schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "reply", "strict": True, "schema": nullable_schema(schema, require_all=True)},
+            }
+        elif format == "json":
             payload["response_format"] = {"type": "json_object"}
 
         try:
-            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            content = data["choices"][0]["message"]["content"]
-            self.finished.emit(content)
+            content = self._stream_sse(
+                "https://api.openai.com/v1/chat/completions",
+                payload,
+                openai_delta,
+                "openai",
+                payload["model"],
+                timeout=10,
+                headers=headers,
+            )
+            if content is not None:
+                self._emit_finished(content)
         except Exception as e:
-            self.error.emit(f"OpenAI Error: {e}")
+            self._emit_error(f"OpenAI Error: {e}")
 
     def _generate_opencode(self, messages: list[dict], format: str):
         """
         OpenCode models share endpoints with different providers.
         Use model-specific routing so non-OpenAI-compatible models (e.g. minimax) work.
         """
-        model = cfg.ollama_model or "grok-code"
+        model = self._route_model()
         headers = {"Content-Type": "application/json"}
         if cfg.api_key:
             headers["Authorization"] = f"Bearer {cfg.api_key}"
@@ -828,7 +1143,8 @@ class LLMWorker(QObject):
             payload: Dict[str, Any] = {
                 "model": model,
                 "messages": conv,
-                "max_tokens": 512,  # required by anthropic-compatible API
+                "max_tokens": self._reply_token_limit() or 512,  # required by anthropic-compatible API
+                "stream": True,
             }
             if sys_msgs:
                 payload["system"] = "\n\n".join(sys_msgs)
@@ -837,34 +1153,32 @@ class LLMWorker(QObject):
             payload = {
                 "model": model,
                 "messages": messages,
+                "stream": True,
             }
             if format == "json":
                 payload["response_format"] = {"type": "json_object"}
 
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=120)  # GLM and others can be slow
-            resp.raise_for_status()
-            data = resp.json()
-            if model in anthropic_models:
-                parts = data.get("content", [])
-                content = "".join([p.get("text", "") for p in parts if isinstance(p, dict)])
-            else:
-                content = data["choices"][0]["message"]["content"]
-            self.finished.emit(content)
+            parse = anthropic_delta if model in anthropic_models else openai_delta
+            # GLM and others can be slow
+            content = self._stream_sse(url, payload, parse, "opencode", model, timeout=120, headers=headers)
+            if content is not None:
+                self._emit_finished(content)
         except Exception as e:
-            self.error.emit(f"OpenCode Error: {e}")
+            self._emit_error(f"OpenCode Error: {e}")
 
     def _generate_gemini(self, messages: list[dict], format: str):
         if not cfg.api_key:
-            self.error.emit("Gemini API Key not set")
+            self._emit_error("Gemini API Key not set")
             return
             
         # Gemini API is a bit different, requires converting messages
         # For simplicity, we'll use a basic implementation or suggest using the official SDK
         # But requests is lighter.
-        # URL: https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key=YOUR_API_KEY
+        # URL: https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:streamGenerateContent?alt=sse&key=YOUR_API_KEY
         
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={cfg.api_key}"
+        model = self._route_model()
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse&key={cfg.api_key}"
         
         # Convert messages to Gemini format
         contents = []
@@ -889,12 +1203,13 @@ class LLMWorker(QObject):
 
         if format == "json":
             payload["generationConfig"] = {"response_mime_type": "application/json"}
+            schema = self._json_schema(format)
+            if schema:
+                payload["generationConfig"]["response_schema"] = gemini_schema(schema)
 
         try:
-            resp = requests.post(url, json=payload, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            content = data["candidates"][0]["content"]["parts"][0]["text"]
-            self.finished.emit(content)
+            content = self._stream_sse(url, payload, gemini_delta, "gemini", model, timeout=10)
+            if content is not None:
+                self._emit_finished(content)
         except Exception as e:
-            self.error.emit(f"Gemini Error: {e}")
+            self._emit_error(f"Gemini Error: {e}")
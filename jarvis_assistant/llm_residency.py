@@ -0,0 +1,104 @@
+"""
+Keeps the local LLM loaded so the first token of a turn does not wait for a model load.
+
+Ollama unloads a model after its keep_alive window (5 minutes by default,
+`ollama_keep_alive` here), and a laptop that slept may come back with the model
+evicted. ResidencyMonitor asks LLMWorker.preload() to load the configured model:
+
+- at startup,
+- when the provider, model, context size or keep_alive changes in Settings,
+- after the machine wakes from sleep (the wall clock jumped between two ticks),
+- when recording starts after the keep_alive window has passed, so the load
+  overlaps with speech-to-text instead of delaying the intent call.
+
+Ollama is preloaded with an empty /api/generate request carrying the same
+keep_alive and num_ctx as the chat requests (a different num_ctx would reload
+the model again); LM Studio loads the selected model if it is not loaded yet.
+Per-stage local models (model_routing) are preloaded as well, as far as they
+fit `llm_memory_budget_gb`. Cloud providers need nothing. Each preload logs
+`llm_residency ... load_ms=`.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from .config import cfg
+from .model_routing import resident_routes
+from .utils import logger
+
+WAKE_CHECK_INTERVAL_MS = 30_000
+# A tick that arrives this much later than scheduled means the machine was asleep.
+SLEEP_GAP_SECONDS = 60.0
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(value: str) -> float | None:
+    """Seconds of an Ollama keep_alive value ("30m", "1h", "300"); None for a negative value (never unload)."""
+    match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*", str(value or "").lower())
+    if not match:
+        return None
+    seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return None if seconds < 0 else seconds
+
+
+def residency_key() -> tuple:
+    """Settings that decide which models are resident; a change triggers a preload."""
+    return (
+        tuple(str(route) for route in resident_routes({}, 0)[0]),
+        json.dumps(cfg.llm_stage_models, sort_keys=True),
+        cfg.llm_memory_budget_gb,
+        cfg.ollama_num_ctx,
+        cfg.ollama_keep_alive,
+    )
+
+
+class ResidencyMonitor(QObject):
+    preload_requested = pyqtSignal(str)  # reason
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._key: tuple | None = None
+        self._last_tick = time.time()
+        self._last_activity = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(WAKE_CHECK_INTERVAL_MS)
+        self._timer.timeout.connect(self._tick)
+
+    def _request(self, reason: str) -> None:
+        if not cfg.llm_preload_enabled or not resident_routes({}, 0)[0]:
+            return
+        self._key = residency_key()
+        self._last_activity = time.time()
+        self.preload_requested.emit(reason)
+
+    def start(self) -> None:
+        self._last_tick = time.time()
+        self._timer.start()
+        self._request("startup")
+
+    def settings_changed(self) -> None:
+        if residency_key() != self._key:
+            self._request("settings")
+
+    def note_activity(self) -> None:
+        """An LLM request was sent; the keep_alive window restarts."""
+        self._last_activity = time.time()
+
+    def recording_started(self) -> None:
+        uses_ollama = any(route.provider == "ollama" for route in resident_routes({}, 0)[0])
+        window = keep_alive_seconds(cfg.ollama_keep_alive) if uses_ollama else None
+        if window is not None and time.time() - self._last_activity > window:
+            self._request("listening")
+
+    def _tick(self) -> None:
+        now = time.time()
+        gap = now - self._last_tick
+        self._last_tick = now
+        if gap > WAKE_CHECK_INTERVAL_MS / 1000 + SLEEP_GAP_SECONDS:
+            logger.info("llm_residency wake detected after %.0fs", gap)
+            self._request("wake")
@@ -2,22 +2,36 @@ import sys
 import os
 import subprocess
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import QThread, QObject, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, QThread, QObject, pyqtSignal, QTimer
 
 from .gui import MainWindow, MicButton
 from .conversation import Conversation
 from .audio_io import AudioRecorder
-from .stt import STTWorker
+from .stt import GrammarWorker, STTWorker
+from .command_grammar import build_command_grammar
+from .phonetic_index import PhoneticIndex
+from .slot_grammar import SlotGrammar, describe_delay
+from .reply_templates import ReplyTemplates
+from .json_stream import IncrementalJSONParser
+from .output_schema import ready_for_dispatch, structured_output_active
+from .sentence_stream import SentenceStream
+from .prompt_compiler import CompiledPrompt, PromptContext, compile_prompt
+from .entity_retrieval import EntityRetriever
+from .command_learning import CommandLearner, evict_learned
 from .llm_client import LLMWorker
+from .llm_residency import ResidencyMonitor
+from .model_routing import stage_route
 from .tts import TTSWorker
 from .ha_client import HomeAssistantClient
 from .memory import MemoryManager
 from .app_paths import profiles_history_file, profiles_memory_file
 from .intent_utils import (
     parse_delay_seconds,
+    parse_entities,
     is_multi_domain_request,
     looks_like_home_control_request,
     state_matches_action,
+    validate_actions,
 )
 from .config import cfg
 from .utils import logger, extract_json, extract_tool_call_query
@@ -31,7 +45,8 @@ import unicodedata
 from urllib.parse import urlparse, parse_qs, unquote
 from html import unescape
 
-from .agents import IntentAgent, ActionAgent, ResponseAgent
+from .agents import INTENT_EXAMPLES
+from .semantic_router import SemanticRouterWorker
 from .quick_commands import (
     FastIntentRouter,
     QuickCommand,
@@ -48,7 +63,16 @@ QC_ACTION_TOKENS = {"an", "on", "ein", "aus", "off"}
 class JarvisController(QObject):
     # Signals to drive workers
     request_stt = pyqtSignal(object)
-    request_llm = pyqtSignal(list, str)
+    request_stt_warmup = pyqtSignal()
+    request_stt_full = pyqtSignal(int)  # utterance id of a first-pass transcript that missed the fast path
+    request_stt_language_reset = pyqtSignal()
+    request_grammar = pyqtSignal(int, object)
+    request_grammar_set = pyqtSignal(object)
+    request_llm = pyqtSignal(list, str, dict)  # messages, format, options (token budget)
+    request_llm_tagged = pyqtSignal(str, list, str, dict)
+    request_llm_abort = pyqtSignal(str)
+    request_route_warm = pyqtSignal(object)  # (ollama url, embedding model)
+    request_route = pyqtSignal(int, str, float)  # turn id, text, threshold
     request_tts = pyqtSignal(str)
     request_tts_ack = pyqtSignal(str)
     
@@ -67,27 +91,44 @@ class JarvisController(QObject):
         # Components
         self.audio_recorder = AudioRecorder()
         self.stt_worker = STTWorker()
+        self.grammar_worker = GrammarWorker()
         self.llm_worker = LLMWorker()
         self.tts_worker = TTSWorker()
+        self.router_worker = SemanticRouterWorker(INTENT_EXAMPLES)
         
         # Profile-aware initialization
         self.init_profile_data()
 
         # Threads
         self.stt_thread = QThread()
+        self.grammar_thread = QThread()
         self.llm_thread = QThread()
         self.tts_thread = QThread()
+        self.router_thread = QThread()
 
         # Move workers
         self.stt_worker.moveToThread(self.stt_thread)
+        self.grammar_worker.moveToThread(self.grammar_thread)
         self.llm_worker.moveToThread(self.llm_thread)
         self.tts_worker.moveToThread(self.tts_thread)
+        self.router_worker.moveToThread(self.router_thread)
 
         # Connect Driver Signals to Worker Slots
         self.request_stt.connect(self.stt_worker.transcribe)
+        self.request_stt_warmup.connect(self.stt_worker.warmup)
+        self.request_stt_full.connect(self.stt_worker.transcribe_full)
+        self.request_stt_language_reset.connect(self.stt_worker.reset_language_prior)
+        self.request_grammar.connect(self.grammar_worker.recognize)
+        self.request_grammar_set.connect(self.grammar_worker.set_grammar)
         self.request_llm.connect(self.llm_worker.generate)
+        self.request_llm_tagged.connect(self.llm_worker.generate_tagged)
+        self.request_llm_abort.connect(self.llm_worker.abort)
         self.request_tts.connect(self.tts_worker.speak)
         self.request_tts_ack.connect(self.tts_worker.speak_ack)
+        self.request_route_warm.connect(self.router_worker.warm)
+        self.request_route.connect(self.router_worker.classify)
+        self.llm_residency = ResidencyMonitor(self)
+        self.llm_residency.preload_requested.connect(self.llm_worker.preload)
 
         # Connect Worker Signals to Controller Slots
         self.audio_recorder.finished.connect(self.handle_recording_finished)
@@ -95,13 +136,24 @@ class JarvisController(QObject):
         self.audio_recorder.wake_word_error.connect(self.handle_wake_word_error)
         self.audio_recorder.wake_word_status.connect(self.handle_wake_word_status)
         self.stt_worker.finished.connect(self.handle_stt_finished)
-        self.stt_worker.error.connect(self.handle_error)
+        self.stt_worker.error.connect(self.handle_stt_error)
+        self.grammar_worker.matched.connect(self.handle_grammar_matched)
+        self.stt_worker.fast_transcript.connect(self.handle_stt_fast_transcript)
+        self.stt_worker.ready_state_changed.connect(self.handle_stt_ready_state)
 
         self.llm_worker.finished.connect(self.handle_llm_response)
         self.llm_worker.error.connect(self.handle_error)
+        self.llm_worker.tagged_finished.connect(self.handle_speculative_response)
+        self.llm_worker.tagged_error.connect(self.handle_speculative_error)
+        self.llm_worker.tagged_partial.connect(self.handle_intent_stream_partial)
+        self.llm_worker.tagged_finished.connect(self.handle_intent_stream_response)
+        self.llm_worker.tagged_error.connect(self.handle_intent_stream_error)
 
         self.tts_worker.started.connect(self.handle_tts_started)
         self.tts_worker.finished.connect(self.handle_tts_finished)
+        self.router_worker.ready.connect(self.handle_semantic_router_ready)
+        self.router_worker.failed.connect(self.handle_semantic_router_failed)
+        self.router_worker.classified.connect(self.handle_semantic_route)
 
         # UI Signals
         self.window.mic_btn.clicked.connect(self.handle_mic_click)
@@ -109,8 +161,12 @@ class JarvisController(QObject):
 
         # Start Threads
         self.stt_thread.start()
+        self.grammar_thread.start()
         self.llm_thread.start()
         self.tts_thread.start()
+        self.router_thread.start()
+        # Direct: the STT thread's event loop is gone by the time aboutToQuit fires.
+        self.app.aboutToQuit.connect(self.stt_worker.shutdown, Qt.ConnectionType.DirectConnection)
 
         # Load conversation into UI
         # Load conversation into UI
@@ -134,18 +190,54 @@ class JarvisController(QObject):
         self._ack_timer.setSingleShot(True)
         self._ack_timer.timeout.connect(self._on_ack_timeout)
         self._ignore_llm = False
+        # Speculative ActionAgent request running alongside IntentAgent (speculative_action_enabled).
+        self._speculative: dict | None = None
+        self._spec_seq = 0
+        self._spec_stats = {"hits": 0, "misses": 0, "saved_ms": 0.0}
+        # Streamed IntentAgent request parsed incrementally (intent_streaming_enabled).
+        self._intent_stream: dict | None = None
+        self._intent_stream_seq = 0
+        # Sentences of a streamed reply waiting for TTS; one utterance is handed to the worker at a time.
+        self._speech_queue: list[str] = []
+        self._speech_active = False
+        self._speech_stream_open = False
+        self._entity_retriever: EntityRetriever | None = None
         self._scheduled_tasks = []
         self.current_time_context = ""
         self._llm_timeout = QTimer(self)
         self._llm_timeout.setSingleShot(True)
         self._llm_timeout.timeout.connect(self._on_llm_timeout)
         self._suppress_next_recording_finished = False
+        # Turn bookkeeping for racing the grammar recognizer against Whisper.
+        self._stt_turn = 0
+        self._stt_done_turn = 0
+        self._grammar_claimed_turn = 0
+        self._cascade_stats = {"utterances": 0, "hits": 0}
+        self._grammar_key = None
+        # Embedding intent router (semantic_router_enabled); classified on router_thread.
+        self._semantic_router_ready_key = None
+        self._semantic_router_warming_key = None
+        self._semantic_router_retry_at = 0.0
+        self._route_turn = 0
+        self._warm_semantic_router()
         self._start_wake_word_if_enabled()
 
+        # Preload and warm the STT model in the background on the STT thread.
+        self._stt_warm_key = (cfg.whisper_model, cfg.stt_out_of_process, json.dumps(cfg.stt_decoding_profile, sort_keys=True))
+        self._stt_language = cfg.language
+        self.request_stt_warmup.emit()
+        # Load the local LLM now instead of on the first request.
+        self.llm_residency.start()
+
     def _async_load_ha_entities(self):
-        self.ha_entities = self.ha_client.get_relevant_entities()
+        self._set_ha_entities(self.ha_client.get_relevant_entities())
         logger.info(f"Loaded HA Entities:\n{self.ha_entities}")
 
+    def _set_ha_entities(self, entities: str) -> None:
+        """Store the entity list and rebuild the fast-intent router over it (not per utterance)."""
+        self.ha_entities = entities
+        self.fast_intent_router = self._build_fast_intent_router()
+
     def _start_wake_word_if_enabled(self):
         if not cfg.wake_word_enabled or self._wake_word_active:
             return
@@ -168,10 +260,18 @@ class JarvisController(QObject):
 
     def apply_runtime_settings(self) -> None:
         """Apply updated config values to the live controller without restart."""
-        self.fast_intent_router = FastIntentRouter(
-            self.quick_commands,
-            fuzzy_enabled=cfg.quick_commands_fuzzy_enabled,
-        )
+        self.fast_intent_router = self._build_fast_intent_router()
+
+        stt_key = (cfg.whisper_model, cfg.stt_out_of_process, json.dumps(cfg.stt_decoding_profile, sort_keys=True))
+        if stt_key != self._stt_warm_key:
+            logger.info("Whisper model/profile changed to '%s'; reloading in background.", cfg.whisper_model)
+            self._stt_warm_key = stt_key
+            self.request_stt_warmup.emit()
+        if cfg.language != self._stt_language:
+            self._stt_language = cfg.language
+            self.request_stt_language_reset.emit()
+        self.llm_residency.settings_changed()
+        self._warm_semantic_router()
 
         state = self.window.mic_btn.state
         if not cfg.wake_word_enabled:
@@ -198,10 +298,8 @@ class JarvisController(QObject):
         self.quick_command_store = QuickCommandStore(profile)
         self.quick_commands = self.quick_command_store.load_commands()
         self._normalize_existing_quick_commands()
-        self.fast_intent_router = FastIntentRouter(
-            self.quick_commands,
-            fuzzy_enabled=cfg.quick_commands_fuzzy_enabled,
-        )
+        self.command_learner = CommandLearner(profile, promote_after=cfg.quick_commands_learn_after)
+        self.fast_intent_router = self._build_fast_intent_router()
         
     def switch_profile(self, new_profile):
         if new_profile == cfg.current_profile:
@@ -213,6 +311,7 @@ class JarvisController(QObject):
         
         # Reload subsystems
         self.init_profile_data()
+        self.request_stt_language_reset.emit()
         
         # Refresh UI
         # Refresh UI
@@ -246,31 +345,28 @@ class JarvisController(QObject):
         return {}
 
     def _parse_entities(self) -> list[dict[str, str]]:
-        entities = []
-        for line in (self.ha_entities or "").splitlines():
-            line = line.strip()
-            match = re.match(r"- Name: '(.+?)', Entity: '(.+?)', State: '(.+?)'$", line)
-            if not match:
-                continue
-            name, entity_id, state = match.groups()
-            domain = entity_id.split(".")[0] if "." in entity_id else ""
-            entities.append(
-                {
-                    "name": name,
-                    "entity_id": entity_id,
-                    "state": state,
-                    "domain": domain,
-                }
-            )
-        return entities
-
-    def _save_quick_commands(self) -> None:
-        self.quick_command_store.save_commands(self.quick_commands)
-        self.fast_intent_router = FastIntentRouter(
+        return parse_entities(self.ha_entities)
+
+    def _build_fast_intent_router(self) -> FastIntentRouter:
+        entities = self._parse_entities()
+        phonetic = None
+        if cfg.quick_commands_phonetic_enabled:
+            phonetic = PhoneticIndex.build(entities, self.quick_commands)
+        slots = None
+        if cfg.quick_commands_slots_enabled:
+            # min/max/step come from the states fetched with ha_entities; no HA request per lookup.
+            slots = SlotGrammar(entities, attributes=dict(self.ha_client.entity_attributes).get)
+        return FastIntentRouter(
             self.quick_commands,
             fuzzy_enabled=cfg.quick_commands_fuzzy_enabled,
+            phonetic_index=phonetic,
+            slot_grammar=slots,
         )
 
+    def _save_quick_commands(self) -> None:
+        self.quick_command_store.save_commands(self.quick_commands)
+        self.fast_intent_router = self._build_fast_intent_router()
+
     def list_quick_commands(self) -> list[dict]:
         return [c.to_dict() for c in self.quick_commands]
 
@@ -327,6 +423,9 @@ class JarvisController(QObject):
 
         grouped: dict[tuple[str, str], dict[str, QuickCommand | None]] = {}
         for cmd in self.quick_commands:
+            # Learned commands keep the user's exact phrasing.
+            if (cmd.meta or {}).get("source") == "learned":
+                continue
             action = cmd.action or {}
             entity_id = str(action.get("entity_id") or "").strip()
             service = str(action.get("service") or "").strip().lower()
@@ -489,7 +588,7 @@ class JarvisController(QObject):
         try:
             refreshed = self.ha_client.get_relevant_entities()
             if refreshed:
-                self.ha_entities = refreshed
+                self._set_ha_entities(refreshed)
             selectable = self.list_selectable_quick_entities(include_all=include_all)
             logger.info(
                 "quick_entities_refresh success include_all=%s count=%s",
@@ -595,21 +694,44 @@ class JarvisController(QObject):
             "phrase_count": phrase_count,
         }
 
-    def _run_fast_intent(self, user_text: str) -> bool:
+    def _match_fast_intent(self, text: str):
+        return self.fast_intent_router.match_fast_intent(
+            text,
+            locale=cfg.language,
+            now_ctx=datetime.now(),
+        )
+
+    def handle_stt_fast_transcript(self, utterance_id: int, text: str):
+        """
+        First-pass transcript of the STT cascade. A fast-path hit is handled right
+        away with that text; on a miss the STT worker runs the configured model.
+        """
+        if self._stt_done_turn + 1 == self._grammar_claimed_turn:
+            self._finish_stt_turn()
+            logger.info("grammar_stt fast_text=%r (already handled by grammar)", text)
+            return
+        result = None
+        if cfg.quick_commands_enabled and not self.pending_action:
+            result = self._match_fast_intent(text)
+        hit = result is not None and result.kind in ("quick_action", "slot_action", "builtin_time")
+        stats = self._cascade_stats
+        stats["utterances"] += 1
+        stats["hits"] += int(hit)
+        logger.info("stt_cascade fast_path hit=%s hit_rate=%d/%d text=%r", hit, stats["hits"], stats["utterances"], text)
+        if not hit:
+            self.request_stt_full.emit(utterance_id)
+            return
+        self._finish_stt_turn()
+        self._process_user_input(text, fast_result=result)
+
+    def _run_fast_intent(self, user_text: str, result=None) -> bool:
+        """Handle user_text on the fast path; result is an already computed match for it."""
         if not cfg.quick_commands_enabled:
             logger.info("Fast intent disabled; falling back to LLM")
             return False
 
-        # Apply fuzzy setting live without requiring restart.
-        self.fast_intent_router = FastIntentRouter(
-            self.quick_commands,
-            fuzzy_enabled=cfg.quick_commands_fuzzy_enabled,
-        )
-        result = self.fast_intent_router.match_fast_intent(
-            user_text,
-            locale=cfg.language,
-            now_ctx=datetime.now(),
-        )
+        if result is None:
+            result = self._match_fast_intent(user_text)
         if result is None:
             logger.info("fast_path=miss -> llm_fallback")
             return False
@@ -619,6 +741,24 @@ class JarvisController(QObject):
             self._reply_direct(result.response_text or "")
             return True
 
+        if result.kind == "slot_action" and result.action:
+            self.current_user_text = user_text
+            delay = int(result.meta.get("delay_seconds") or 0)
+            is_de = cfg.language == "de"
+            if delay > 0:
+                self._schedule_action(result.action, delay)
+                when = describe_delay(delay, cfg.language)
+                self._reply_direct(f"Alles klar, in {when}." if is_de else f"Okay, in {when}.")
+                logger.info("fast_path=slot_scheduled delay_seconds=%d action=%s", delay, result.action)
+                return True
+            execution = self._execute_action(result.action)
+            if execution.get("error") or execution.get("verified") is False:
+                self._reply_direct(self._summarize_action_failure(execution))
+            else:
+                self._reply_direct("Erledigt." if is_de else "Done.")
+            logger.info("fast_path=slot_action action=%s", result.action)
+            return True
+
         if result.kind == "quick_command_create":
             target = str(result.meta.get("target") or "").strip()
             if not target:
@@ -685,6 +825,9 @@ class JarvisController(QObject):
                 logger.info("fast_path=quick_confirm")
                 return True
 
+            if cmd is not None and (cmd.meta or {}).get("source") == "learned":
+                cmd.meta["last_used"] = datetime.now().isoformat(timespec="seconds")
+                self._save_quick_commands()
             execution = self._execute_action(result.action)
             if execution.get("error"):
                 if cfg.language == "de":
@@ -701,7 +844,7 @@ class JarvisController(QObject):
 
         return False
 
-    def _process_user_input(self, text: str) -> None:
+    def _process_user_input(self, text: str, fast_result=None) -> None:
         if self.pending_action:
             lowered = text.strip().lower()
             if any(k in lowered for k in ["yes", "sure", "do it", "confirm", "okay", "ok", "please do", "go ahead", "proceed"]):
@@ -718,7 +861,7 @@ class JarvisController(QObject):
         QTimer.singleShot(0, lambda: self.window.scroll_area.verticalScrollBar().setValue(self.window.scroll_area.verticalScrollBar().maximum()))
         self.window.set_status("Thinking...")
 
-        if self._run_fast_intent(text):
+        if self._run_fast_intent(text, fast_result):
             return
 
         self.start_processing(text)
@@ -898,6 +1041,32 @@ class JarvisController(QObject):
         self._scheduled_tasks.append(timer)
         return {"scheduled": True, "delay_seconds": delay_seconds, "action": clean_action}
 
+    def _learn_from_actions(self, results: list[dict]) -> None:
+        """Feed a single verified, immediate LLM-resolved action to the learning layer."""
+        if not cfg.quick_commands_learning_enabled or len(results) != 1:
+            return
+        result = results[0]
+        if result.get("scheduled") or result.get("error") or result.get("verified") is not True:
+            return
+        if isinstance(result.get("entity_id"), list):
+            return
+        try:
+            learned = self.command_learner.observe(self.current_user_text, result, self.quick_commands)
+        except Exception as exc:
+            logger.warning("quick_commands_learning failed: %s", exc)
+            return
+        if learned is None:
+            return
+        self.quick_commands.append(learned)
+        self.quick_commands = evict_learned(self.quick_commands, cfg.quick_commands_max_learned)
+        self._save_quick_commands()
+        logger.info(
+            "quick_commands_learned phrase=%r action=%s safety=%s",
+            learned.phrases[0],
+            learned.action,
+            learned.safety,
+        )
+
     def _summarize_scheduled_result(self, action: dict, result: dict) -> str:
         if result.get("error"):
             return "Scheduled task failed."
@@ -1120,25 +1289,35 @@ class JarvisController(QObject):
                     self._helper_payload(helper_type, helper_value),
                 )
                 refreshed = self.ha_client.get_relevant_entities()
-                self.ha_entities = refreshed
-                self.current_action_taken = {"action": "create_helper", "result": created, "entities": refreshed}
+                self._set_ha_entities(refreshed)
+                self.current_action_taken = {
+                    "action": "create_helper",
+                    "helper_name": helper_name,
+                    "result": created,
+                    "entities": refreshed,
+                }
             elif action == "delete_helper":
                 entity_id = self.pending_action.get("entity_id")
                 deleted = self.ha_client.delete_entity(entity_id)
                 refreshed = self.ha_client.get_relevant_entities()
-                self.ha_entities = refreshed
-                self.current_action_taken = {"action": "delete_helper", "result": deleted, "entities": refreshed}
+                self._set_ha_entities(refreshed)
+                self.current_action_taken = {
+                    "action": "delete_helper",
+                    "entity_id": entity_id,
+                    "result": deleted,
+                    "entities": refreshed,
+                }
             elif action == "add_todo":
                 title = self.pending_action.get("todo_title")
                 due = self.pending_action.get("todo_due")
                 added = self.ha_client.add_todo_item(cfg.todo_entity, title, due=due)
                 items = self.ha_client.list_todo_items(cfg.todo_entity)
-                self.current_action_taken = {"action": "add_todo", "result": added, "items": items}
+                self.current_action_taken = {"action": "add_todo", "todo_title": title, "result": added, "items": items}
             elif action == "remove_todo":
                 title = self.pending_action.get("todo_title")
                 removed = self.ha_client.remove_todo_item(cfg.todo_entity, title)
                 items = self.ha_client.list_todo_items(cfg.todo_entity)
-                self.current_action_taken = {"action": "remove_todo", "result": removed, "items": items}
+                self.current_action_taken = {"action": "remove_todo", "todo_title": title, "result": removed, "items": items}
         except Exception as e:
             self.current_action_taken = {"error": str(e)}
         finally:
@@ -1169,10 +1348,11 @@ class JarvisController(QObject):
         try:
             self.window.set_status("Refreshing devices...")
             entities = self.ha_client.get_relevant_entities()
-            self.ha_entities = entities
+            self._set_ha_entities(entities)
             preview = entities.splitlines()[:5]
             return {
                 "status": "success",
+                "entity_count": len(parse_entities(entities)),
                 "entities_preview": "\n".join(preview) if preview else "No relevant devices found.",
             }
         except Exception as e:
@@ -1192,12 +1372,14 @@ class JarvisController(QObject):
             self._stop_wake_word_listening()
             self.window.mic_btn.set_state(MicButton.STATE_LISTENING)
             self.window.set_status("Listening...")
+            self.llm_residency.recording_started()
             self.audio_recorder.start_recording(mode=AudioRecorder.MODE_MANUAL)
         elif self.window.mic_btn.state == MicButton.STATE_LISTENING:
             self.window.set_status("Processing...")
             self.audio_recorder.stop_recording(reason="manual_stop")
         elif self.window.mic_btn.state == MicButton.STATE_SPEAKING:
             # Stop TTS playback without starting recording
+            self._reset_speech_queue()
             self.tts_worker.stop()
             # Note: tts.stop() will emit finished signal which calls handle_tts_finished
             # which will set state to IDLE, so we don't need to do it here
@@ -1221,8 +1403,54 @@ class JarvisController(QObject):
         self.window.set_status("Transcribing...")
         # Keep wake detector active so "Hey Jarvis" can interrupt long processing stages.
         self._start_wake_word_if_enabled()
+        self._stt_turn += 1
+        if self._grammar_enabled():
+            self._refresh_command_grammar()
+            self.request_grammar.emit(self._stt_turn, audio_data)
         self.request_stt.emit(audio_data)
 
+    def _grammar_enabled(self) -> bool:
+        return (
+            cfg.grammar_recognizer_enabled
+            and cfg.quick_commands_enabled
+            and self.grammar_worker.is_available()
+        )
+
+    def _refresh_command_grammar(self) -> None:
+        """Rebuild the recognizer grammar when entities or quick commands changed."""
+        key = (self.ha_entities, json.dumps([c.to_dict() for c in self.quick_commands], sort_keys=True))
+        if key == self._grammar_key:
+            return
+        self._grammar_key = key
+        self.request_grammar_set.emit(build_command_grammar(self._parse_entities(), self.quick_commands))
+
+    def handle_grammar_matched(self, turn_id: int, match):
+        """A confident grammar hit acts immediately; the Whisper result for this turn is then dropped."""
+        if (
+            turn_id != self._stt_turn
+            or self._stt_done_turn >= turn_id
+            or self.current_state != "transcribe"
+            or self.pending_action
+        ):
+            logger.info("grammar_stt turn=%d ignored (late or superseded)", turn_id)
+            return
+
+        self._grammar_claimed_turn = turn_id
+        self.current_user_text = match.phrase
+        self.conversation.add_message("user", match.phrase)
+        self.window.add_message(match.phrase, is_user=True)
+        execution = self._execute_action(match.action)
+        if execution.get("error"):
+            self._reply_direct("Schnellbefehl fehlgeschlagen." if cfg.language == "de" else "Quick command failed.")
+        else:
+            self._reply_direct("Erledigt." if cfg.language == "de" else "Done.")
+        logger.info("fast_path=grammar turn=%d grammar_ms=%d", turn_id, int(match.elapsed * 1000))
+
+    def _finish_stt_turn(self) -> bool:
+        """Mark the oldest outstanding STT turn done. True when the grammar path already handled it."""
+        self._stt_done_turn += 1
+        return self._stt_done_turn == self._grammar_claimed_turn
+
     def handle_text_input(self):
         if self.current_state in ("transcribe", "intent", "action", "response"):
             self.window.set_status("Please wait...")
@@ -1234,7 +1462,31 @@ class JarvisController(QObject):
         self.window.chat_input.clear()
         self._process_user_input(text)
 
+    def handle_stt_ready_state(self, state: str):
+        logger.info(f"STT state: {state}")
+        if self.window.mic_btn.state != MicButton.STATE_IDLE or self.current_state != "idle":
+            return
+        if state == STTWorker.STATE_LOADING:
+            self.window.set_status("Loading speech model...")
+        elif state == STTWorker.STATE_ERROR:
+            self.window.set_status("Speech model failed to load")
+        elif state == STTWorker.STATE_READY:
+            if cfg.wake_word_enabled and self._wake_word_active:
+                self.window.set_status("Say: Hey Jarvis")
+            else:
+                self.window.set_status("Idle")
+
+    def handle_stt_error(self, msg):
+        if self._finish_stt_turn():
+            logger.info("grammar_stt whisper failed after grammar hit: %s", msg)
+            return
+        self.handle_error(msg)
+
     def handle_stt_finished(self, text):
+        if self._finish_stt_turn():
+            logger.info("grammar_stt whisper_text=%r (already handled by grammar)", text)
+            return
+
         if not text:
             self._clear_ack_cycle()
             self.window.mic_btn.set_state(MicButton.STATE_IDLE)
@@ -1272,6 +1524,7 @@ class JarvisController(QObject):
 
         if state == MicButton.STATE_SPEAKING:
             logger.info("Wake interrupt during speaking: stopping TTS.")
+            self._reset_speech_queue()
             self.tts_worker.stop()
 
         if self.current_state in ("intent", "action", "response") or state == MicButton.STATE_THINKING:
@@ -1280,6 +1533,7 @@ class JarvisController(QObject):
         self.window.mic_btn.set_state(MicButton.STATE_LISTENING)
         self.window.set_status("Listening... (Speak now)")
         self._play_listen_tone()
+        self.llm_residency.recording_started()
         self.audio_recorder.start_recording(
             mode=AudioRecorder.MODE_WAKE_COMMAND,
             silence_timeout_sec=cfg.wake_record_silence_sec,
@@ -1302,6 +1556,10 @@ class JarvisController(QObject):
 
     def start_processing(self, user_text: str):
         self._ignore_llm = False
+        self._discard_speculative_action()
+        self._abort_intent_stream()
+        self._reset_speech_queue()
+        self.llm_residency.note_activity()
         self.window.chat_input.setEnabled(False)
         self.current_time_context = self.ha_client.get_time_context()
         self.window.set_status("Thinking (Intent)...")
@@ -1311,21 +1569,24 @@ class JarvisController(QObject):
         else:
             self._start_ack_timer()
         self._start_llm_timeout("intent")
-        
+
+        self._route_turn += 1
+        if self._start_semantic_route(user_text):
+            return
+        self._send_intent_request(user_text)
+
+    def _send_intent_request(self, user_text: str) -> None:
         # Get history
-        history = self.conversation.get_ollama_messages()[-5:] # Last 5 messages
+        history = self.conversation.get_ollama_messages()[-5:] # Last 5 messages, trimmed further to the token budget
         
-        # 1. Intent Agent
-        intent_agent = IntentAgent()
-        memory_context = self.memory_manager.get_all_context()
-        messages = [{"role": "system", "content": intent_agent.get_system_prompt(
-            entities_context=self.ha_entities,
-            memory_context=memory_context,
-            capabilities=self.describe_capabilities(),
-            time_context=self.current_time_context
-        )}]
-        messages.extend(history)
-        messages.append({"role": "user", "content": user_text})
+        # 1. Intent Agent (or the single-shot intent+action agent for this provider)
+        prompt = compile_prompt(
+            "intent",
+            self._prompt_context(history),
+            user_text,
+            combined=self._combined_agent_active(),
+            structured=structured_output_active("intent"),
+        )
         
         # We need a way to handle the callback for THIS specific request
         # Since LLMWorker uses a single signal, we might need a request ID or 
@@ -1334,297 +1595,593 @@ class JarvisController(QObject):
         
         self.current_state = "intent"
         self.current_user_text = user_text
-        self.request_llm.emit(messages, "json")
+        self._start_speculative_action(user_text)
+        if self._intent_streaming_active():
+            self._start_intent_stream(prompt)
+        else:
+            self.request_llm.emit(prompt.messages, "json", prompt.options)
+
+    def _intent_streaming_active(self) -> bool:
+        # Every provider streams tagged requests (Ollama NDJSON, the others SSE via sse_client).
+        return cfg.intent_streaming_enabled
+
+    def _start_intent_stream(self, prompt: CompiledPrompt) -> None:
+        """Send the intent request as a tagged stream; fields are dispatched as they complete."""
+        self._intent_stream_seq += 1
+        tag = f"intent-{self._intent_stream_seq}"
+        self._intent_stream = {
+            "tag": tag,
+            "parser": IncrementalJSONParser(),
+            "combined": prompt.stage == "combined",
+            "started": time.perf_counter(),
+            # Conversational replies are spoken sentence by sentence while they stream. Not for
+            # control-like requests: their plain-text replies are rejected (_handle_intent_response).
+            "speak": cfg.intent_stream_tts_enabled
+            and not looks_like_home_control_request(self.current_user_text, self._parse_entities()),
+            "sentences": None,
+            "fed": 0,
+        }
+        self.request_llm_tagged.emit(tag, prompt.messages, "json", prompt.options)
 
-    def handle_llm_response(self, response: str):
-        if self._ignore_llm:
-            logger.info("Ignoring LLM response due to cancellation.")
+    def _abort_intent_stream(self) -> None:
+        stream = self._intent_stream
+        self._intent_stream = None
+        if stream is not None:
+            self.request_llm_abort.emit(stream["tag"])
+
+    def handle_intent_stream_partial(self, tag: str, chunk: str):
+        stream = self._intent_stream
+        if stream is None or stream["tag"] != tag or self._ignore_llm:
             return
-        logger.debug(f"handle_llm_response state={self.current_state} preview={response[:50]!r}")
-        logger.info(f"LLM Response ({self.current_state}): {response}")
-        
-        if self.current_state == "intent":
-            # Try structured parsing first (supports fenced JSON like ```json {...}```).
-            data = None
-            try:
-                parsed = extract_json(response)
-                if isinstance(parsed, dict) and any(k in parsed for k in ("intent", "action", "target")):
-                    data = parsed
-            except Exception:
-                data = None
+        parser = stream["parser"]
+        new = parser.feed(chunk)
+        if stream["speak"]:
+            self._stream_reply_speech(stream)
+        if "intent" in new:
+            logger.info(
+                "intent_stream=intent intent=%s ms=%d",
+                new["intent"],
+                int((time.perf_counter() - stream["started"]) * 1000),
+            )
+            if new["intent"] != "home_control":
+                # Free the parallel slot for the rest of the intent generation.
+                self._discard_speculative_action(miss=True)
+        if parser.closed or ready_for_dispatch(parser.fields, stream["combined"]):
+            self._abort_intent_stream()
+            logger.info(
+                "intent_stream=dispatch early=%d fields=%s ms=%d",
+                int(not parser.closed),
+                ",".join(parser.fields),
+                int((time.perf_counter() - stream["started"]) * 1000),
+            )
+            fields = dict(parser.fields)
+            if stream["sentences"] is not None:
+                self._finish_streamed_reply(stream)
+                return
+            self._handle_intent_response(parser.text, fields if any(k in fields for k in ("intent", "action", "target")) else None)
 
-            if data is None:
-                tool_query = extract_tool_call_query(response, "web_search")
-                if tool_query:
-                    self._action_pending = True
-                    self.current_intent = {"intent": "web_search", "query": tool_query}
-                    result = self._web_search(tool_query)
-                    if result.get("status") == "success":
-                        self.current_action_taken = {
-                            "action": "web_search",
-                            "web_search_results": result.get("results", []),
-                            "query": result.get("query"),
-                        }
-                    else:
-                        self.current_action_taken = {
-                            "action": "web_search",
-                            "error": result.get("error") or "Search failed.",
-                        }
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                    return
+    def handle_intent_stream_response(self, tag: str, response: str):
+        stream = self._intent_stream
+        if stream is None or stream["tag"] != tag:
+            return
+        self._intent_stream = None
+        if stream["sentences"] is not None and not self._ignore_llm:
+            if stream["parser"].looks_like_json is False and extract_tool_call_query(response, "web_search"):
+                # The model decided to search after all: the search summary is spoken next.
+                self._speech_stream_open = False
+                self.handle_llm_response(response)
+                return
+            logger.info(f"LLM Response (intent, streamed): {response}")
+            self._finish_streamed_reply(stream)
+            return
+        self.handle_llm_response(response)
+
+    def _streamed_reply_text(self, stream: dict) -> str | None:
+        """Reply text streamed so far: plain text, or the "reply" field of a conversation intent."""
+        parser = stream["parser"]
+        if parser.looks_like_json is False:
+            text = parser.text
+            # Tool-call markup (web_search) is handled once the reply is complete; stop speaking there.
+            return text.split("<", 1)[0]
+        if parser.fields.get("intent") == "conversation":
+            return parser.partial_string("reply")
+        return None
+
+    def _stream_reply_speech(self, stream: dict) -> None:
+        parser = stream["parser"]
+        if stream["sentences"] is None:
+            if parser.looks_like_json is False and parser.text.lstrip().startswith("<"):
+                stream["speak"] = False
+                return
+            text = self._streamed_reply_text(stream)
+            if text is None:
+                return
+            stream["sentences"] = SentenceStream()
+            self._discard_speculative_action(miss=True)
+            logger.info(
+                "intent_stream=speech ms=%d",
+                int((time.perf_counter() - stream["started"]) * 1000),
+            )
+        text = self._streamed_reply_text(stream) or ""
+        for sentence in stream["sentences"].feed(text[stream["fed"] :]):
+            self._speak_sentence(sentence)
+        stream["fed"] = max(stream["fed"], len(text))
+
+    def _finish_streamed_reply(self, stream: dict) -> None:
+        """Speak what is left of a streamed conversational reply and record the full reply."""
+        text = self._streamed_reply_text(stream) or ""
+        sentences = stream["sentences"]
+        for sentence in sentences.feed(text[stream["fed"] :]):
+            self._speak_sentence(sentence)
+        rest = sentences.flush()
+        if rest:
+            self._speak_sentence(rest)
+        self._cancel_llm_timeout()
+        self.current_state = "idle"
+        parser = stream["parser"]
+        # The "reply" field, or as much of it as streamed when the document was cut off (num_predict);
+        # never the raw JSON.
+        reply = text if parser.looks_like_json is False else str(parser.fields.get("reply") or text)
+        reply = self._sanitize_reply(reply)
+        logger.info(f"Assistant (streamed): {reply}")
+        self.conversation.add_message("assistant", reply)
+        self.window.add_message(reply, is_user=False)
+        self._speech_stream_open = False
+        if not self._speech_active and not self._speech_queue:
+            self.handle_tts_finished()
+
+    def _speak_sentence(self, sentence: str) -> None:
+        sentence = self._sanitize_reply(sentence)
+        if not sentence:
+            return
+        if not self._speech_stream_open:
+            self._speech_stream_open = True
+            self._clear_ack_cycle()
+            self.window.set_status("Speaking...")
+        if self._speech_active:
+            self._speech_queue.append(sentence)
+            return
+        self._speech_active = True
+        self.request_tts.emit(sentence)
 
-                # If the user asked for device control but intent output is plain text,
-                # do not allow a fake "done" confirmation with no executed action.
-                if looks_like_home_control_request(self.current_user_text, self._parse_entities()):
-                    is_de = cfg.language == "de"
-                    reply = (
-                        "Ich konnte den Steuerbefehl nicht sicher ausfuehren. "
-                        "Bitte wiederhole ihn kurz, zum Beispiel: 'Schalte die Tischlampe aus.'"
-                    ) if is_de else (
-                        "I could not safely execute that control command. "
-                        "Please repeat it clearly, for example: 'Turn off the table lamp.'"
-                    )
-                    logger.warning(
-                        "Rejected direct intent reply for control-like request without JSON intent."
-                    )
-                    self._reply_direct(reply)
-                    return
+    def _reset_speech_queue(self) -> None:
+        self._speech_queue.clear()
+        self._speech_active = False
+        self._speech_stream_open = False
 
-                # Direct conversation reply from IntentAgent
-                self._clear_ack_cycle()
-                self._cancel_llm_timeout()
-                reply = self._sanitize_reply(response)
-                logger.info(f"Assistant (direct): {reply}")
-                self.conversation.add_message("assistant", reply)
-                self.window.add_message(reply, is_user=False)
-
-                self.window.set_status("Speaking...")
-                QTimer.singleShot(0, lambda: self.request_tts.emit(reply))
-                self.current_state = "idle"
-                return
+    def handle_intent_stream_error(self, tag: str, msg: str):
+        stream = self._intent_stream
+        if stream is None or stream["tag"] != tag:
+            return
+        self._intent_stream = None
+        self.handle_error(msg)
 
-            # JSON response - proceed with normal intent processing
-            try:
-                self.current_intent = data
-                logger.info(f"Parsed intent: {data.get('intent')}")
+    def _start_speculative_action(self, user_text: str) -> None:
+        """Fire the ActionAgent request alongside IntentAgent when the text already looks like home control."""
+        if not cfg.speculative_action_enabled or self._combined_agent_active():
+            return
+        if not looks_like_home_control_request(user_text, self._parse_entities()):
+            return
+        self._spec_seq += 1
+        tag = f"spec-action-{self._spec_seq}"
+        self._speculative = {"tag": tag, "started": time.perf_counter(), "result": None, "error": None}
+        prompt = self._action_agent_prompt({"intent": "home_control"})
+        self.request_llm_tagged.emit(tag, prompt.messages, "json", prompt.options)
+        logger.info("speculative_action=started tag=%s", tag)
+
+    def _discard_speculative_action(self, miss: bool = False) -> None:
+        spec = self._speculative
+        if spec is None:
+            return
+        self._speculative = None
+        if spec["result"] is None and spec["error"] is None:
+            self.request_llm_abort.emit(spec["tag"])
+        if miss:
+            self._spec_stats["misses"] += 1
+            logger.info("speculative_action=miss %s", self._speculative_stats_text())
+
+    def _take_speculative_action(self, data: dict) -> bool:
+        """Commit the prefetched ActionAgent result for a home_control intent; False if there is none."""
+        spec = self._speculative
+        if spec is None or spec["error"] is not None:
+            self._discard_speculative_action()
+            return False
+        spec["intent_at"] = time.perf_counter()
+        spec["intent_data"] = data
+        if spec["result"] is not None:
+            self._commit_speculative_action()
+        else:
+            spec["waiting"] = True
+        return True
 
-                # Voice help intent
-                if data.get("intent") == "help":
-                    self._action_pending = False
-                    self.current_action_taken = {
-                        "action": "help",
-                        "capabilities": self.describe_capabilities(),
-                    }
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                    return
+    def _commit_speculative_action(self) -> None:
+        spec = self._speculative
+        self._speculative = None
+        done_at = spec.get("done_at") or time.perf_counter()
+        # A sequential ActionAgent call would have started when the intent arrived.
+        saved_ms = max(0.0, min(done_at - spec["started"], spec["intent_at"] - spec["started"])) * 1000
+        self._spec_stats["hits"] += 1
+        self._spec_stats["saved_ms"] += saved_ms
+        logger.info("speculative_action=hit saved_ms=%d %s", int(saved_ms), self._speculative_stats_text())
+        self._handle_action_response(spec["result"])
+
+    def _speculative_stats_text(self) -> str:
+        hits, misses = self._spec_stats["hits"], self._spec_stats["misses"]
+        total = hits + misses
+        avg_saved = self._spec_stats["saved_ms"] / hits if hits else 0.0
+        return f"hits={hits} misses={misses} hit_rate={hits / total if total else 0.0:.2f} avg_saved_ms={int(avg_saved)}"
+
+    def handle_speculative_response(self, tag: str, response: str):
+        spec = self._speculative
+        if spec is None or spec["tag"] != tag or self._ignore_llm:
+            return
+        spec["result"] = response
+        spec["done_at"] = time.perf_counter()
+        if spec.get("waiting"):
+            self._commit_speculative_action()
+
+    def handle_speculative_error(self, tag: str, msg: str):
+        spec = self._speculative
+        if spec is None or spec["tag"] != tag:
+            return
+        logger.warning("speculative_action=error tag=%s error=%s", tag, msg)
+        spec["error"] = msg
+        if spec.get("waiting") and not self._ignore_llm:
+            # The intent already committed to this request; issue the regular ActionAgent call instead.
+            self._speculative = None
+            prompt = self._action_agent_prompt(spec["intent_data"])
+            self.request_llm.emit(prompt.messages, "json", prompt.options)
+
+    _WEB_SEARCH_PREFIX = re.compile(
+        r"^\s*(?:please\s+|bitte\s+)?(?:search\s+(?:the\s+web|online|the\s+internet)\s+for|google|look\s+up|"
+        r"suche\s+(?:im\s+internet|online)\s+nach|google\s+mal|schau\s+online\s+nach)\s+",
+        re.IGNORECASE,
+    )
+
+    def _combined_agent_active(self) -> bool:
+        return stage_route("intent").provider in cfg.combined_agent_providers
+
+    def _semantic_router_config(self) -> tuple[str, str]:
+        return (cfg.ollama_api_url, cfg.semantic_router_model)
+
+    def _warm_semantic_router(self) -> None:
+        """Build and warm the embedding router on its thread when enabled and not warm for the current model."""
+        if not cfg.semantic_router_enabled or time.time() < self._semantic_router_retry_at:
+            return
+        key = self._semantic_router_config()
+        if key in (self._semantic_router_ready_key, self._semantic_router_warming_key):
+            return
+        self._semantic_router_warming_key = key
+        self.request_route_warm.emit(key)
+
+    def handle_semantic_router_ready(self, key: tuple) -> None:
+        if key == self._semantic_router_warming_key:
+            self._semantic_router_warming_key = None
+        self._semantic_router_ready_key = key
+
+    def handle_semantic_router_failed(self, key: tuple, error: str) -> None:
+        # Missing embedding model or endpoint down: use IntentAgent for a while.
+        logger.warning("intent_router unavailable, retry in 300s: %s", error)
+        self._semantic_router_warming_key = None
+        self._semantic_router_ready_key = None
+        self._semantic_router_retry_at = time.time() + 300
+
+    def _start_semantic_route(self, user_text: str) -> bool:
+        """
+        Ask the embedding router to classify this turn; True when a request was sent
+        and handle_semantic_route() continues the turn. The JSON intent is used right
+        away while the router is disabled, failed recently or not warm yet.
+        """
+        if not cfg.semantic_router_enabled:
+            return False
+        if self._semantic_router_ready_key != self._semantic_router_config():
+            self._warm_semantic_router()
+            return False
+        # Device commands always need the JSON intent (target/action); never route them away.
+        if looks_like_home_control_request(user_text, self._parse_entities()):
+            return False
+        self.current_state = "intent"
+        self.current_user_text = user_text
+        self.request_route.emit(self._route_turn, user_text, cfg.semantic_router_threshold)
+        return True
 
-                # Voice-triggered entity refresh
-                if data.get("intent") == "refresh_entities" or data.get("action") == "refresh":
-                    self._action_pending = True
-                    refresh_result = self.refresh_entities()
-                    self.current_action_taken = {"action": "refresh_entities", **refresh_result}
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                    return
-                
-                # Handle Memory Write Intent
-                if data.get("intent") == "memory_write" or (data.get("action") == "remember"):
-                    self._action_pending = False
-                    # Extract fact logic (same as before but cleaner)
-                    fact = self.current_user_text
-                    lower_text = fact.lower()
-                    if "remember that" in lower_text:
-                         idx = lower_text.find("remember that") + len("remember that")
-                         fact = fact[idx:].strip()
-                    elif "remember" in lower_text:
-                         idx = lower_text.find("remember") + len("remember")
-                         fact = fact[idx:].strip()
-                    elif "my name is" in lower_text:
-                         # Special case for names if we want, or just rely on fallback
-                         pass
-                    else:
-                        fact = self.current_user_text.strip()
-                    
-                    if fact and len(fact) > 2:
-                        self.memory_manager.add_fact(f"fact_{int(time.time())}", fact)
-                        self.current_action_taken = {"action": "remember", "status": "success", "fact": fact}
-                        self._maybe_schedule_short_ack()
-                        self.start_response_agent()
-                        return
-                    else:
-                        logger.warning(f"Ignored invalid memory fact: '{fact}'")
-                        self.current_intent = {"intent": "conversation"}
-                        self.current_action_taken = None
-                        self._maybe_schedule_short_ack()
-                        self.start_response_agent()
-                        return
+    def handle_semantic_route(self, turn_id: int, result) -> None:
+        if turn_id != self._route_turn or self._ignore_llm or self.current_state != "intent":
+            return
+        user_text = self.current_user_text
+        if result is None:
+            self._send_intent_request(user_text)
+            return
+        data = {"intent": result.intent, "target": None, "confidence": round(result.score, 3), "source": "semantic_router"}
+        if result.intent == "memory_read":
+            data["action"] = "recall"
+        elif result.intent == "refresh_entities":
+            data["action"] = "refresh"
+        elif result.intent == "help":
+            data["action"] = "help"
+        elif result.intent == "web_search":
+            data["query"] = self._WEB_SEARCH_PREFIX.sub("", user_text).strip() or user_text
+        self._handle_intent_data(data)
+
+    def _action_agent_prompt(self, intent_data: dict) -> CompiledPrompt:
+        query = f"{self.current_user_text} {intent_data.get('target') or ''}"
+        return compile_prompt(
+            "action",
+            self._prompt_context(query=query),
+            self.current_user_text,
+            extra=f"Intent: {json.dumps(intent_data)}",
+            structured=structured_output_active("action"),
+        )
 
-                # Handle Memory Read Intent
-                if data.get("intent") == "memory_read":
-                    self._action_pending = False
-                    # Just pass through to ResponseAgent, but mark action as 'recall' so it knows to look in memory
-                    self.current_action_taken = {"action": "recall", "status": "success"}
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                    return
+    def _relevant_entities_context(self, query: str, history: list[dict]) -> str:
+        """Top-k entities for this request (entity_retrieval); the full list when retrieval is off."""
+        top_k = cfg.entity_retrieval_top_k
+        if not top_k:
+            return self.ha_entities
+        if self._entity_retriever is None or self._entity_retriever.entities_context != self.ha_entities:
+            self._entity_retriever = EntityRetriever(self.ha_entities)
+        if not history:
+            history = self.conversation.get_ollama_messages()[-6:]
+        return self._entity_retriever.context(query, history, top_k)
+
+    def _prompt_context(self, history: list[dict] | None = None, query: str | None = None) -> PromptContext:
+        return PromptContext(
+            entities_context=self._relevant_entities_context(query or self.current_user_text, history or []),
+            capabilities=self.describe_capabilities(),
+            time_context=self.current_time_context,
+            memory_context=self.memory_manager.get_all_context(),
+            history=history or [],
+        )
 
-                if data.get("intent") == "home_control":
-                    self._action_pending = True
-                    # 2. Action Agent
-                    self.window.set_status("Thinking (Action)...")
-                    self.current_state = "action"
-                    self._start_llm_timeout("action")
-                    
-                    action_agent = ActionAgent()
-                    messages = [{"role": "system", "content": action_agent.get_system_prompt(self.ha_entities, self.current_time_context)}]
-                    messages.append({"role": "user", "content": f"Intent: {json.dumps(data)}. User: {self.current_user_text}"})
-                    self._maybe_schedule_short_ack()
-                    self.request_llm.emit(messages, "json")
-                elif data.get("intent") == "telegram_send" or data.get("action") == "send_message":
-                    self._action_pending = True
-                    message = data.get("message") or self.current_user_text
-                    delay = self._parse_delay_seconds(self.current_user_text)
-                    if delay > 0:
-                        result = self._schedule_telegram_message(message, delay)
-                    else:
-                        result = self._send_telegram_message(message)
-                    self.current_action_taken = {"action": "telegram_send", **result}
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                elif data.get("intent") == "web_search":
-                    self._action_pending = True
-                    query = data.get("query") or self.current_user_text
-                    result = self._web_search(query)
-                    if result.get("status") == "success":
-                        self.current_action_taken = {"action": "web_search", "web_search_results": result.get("results", []), "query": result.get("query")}
-                    else:
-                        self.current_action_taken = {"action": "web_search", "error": result.get("error") or "Search failed."}
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                elif data.get("intent") == "helper_create":
-                    self._action_pending = True
-                    # Stage a confirmation; do not execute until user confirms
-                    helper_type = (data.get("helper_type") or "input_boolean").strip()
-                    helper_name = data.get("helper_name") or self.current_user_text.strip() or "New Helper"
-                    helper_value = data.get("helper_value")
-                    self.pending_action = {
-                        "pending": True,
-                        "action": "create_helper",
-                        "helper_type": helper_type,
-                        "helper_name": helper_name,
-                        "helper_value": helper_value,
-                        "message": f"Create {helper_type} named '{helper_name}'?"
-                    }
-                    self.current_action_taken = self.pending_action
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                elif data.get("intent") == "helper_delete":
-                    self._action_pending = True
-                    # Stage deletion confirmation
-                    target = data.get("target") or data.get("helper_name") or self.current_user_text.strip()
-                    self.pending_action = {
-                        "pending": True,
-                        "action": "delete_helper",
-                        "entity_id": target,
-                        "message": f"Delete helper/entity '{target}'?"
-                    }
-                    self.current_action_taken = self.pending_action
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                elif data.get("intent") == "todo_add":
-                    self._action_pending = True
-                    title = data.get("todo_title") or self.current_user_text
-                    due = data.get("todo_due")
-                    self.pending_action = {
-                        "pending": True,
-                        "action": "add_todo",
-                        "todo_title": title,
-                        "todo_due": due,
-                        "message": f"Add reminder '{title}'" + (f" due {due}" if due else "") + "?"
-                    }
-                    self.current_action_taken = self.pending_action
-                    self._maybe_schedule_short_ack()
-                    self.start_response_agent()
-                elif data.get("intent") == "todo_remove":
-                    self._action_pending = True
-                    title = data.get("todo_title") or self.current_user_text
-                    self.pending_action = {
-                        "pending": True,
-                        "action": "remove_todo",
-                        "todo_title": title,
-                        "message": f"Remove reminder '{title}'?"
-                    }
-                    self.current_action_taken = self.pending_action
+    def _handle_intent_data(self, data: dict) -> None:
+        """Dispatch a parsed intent (from IntentAgent JSON or the semantic router)."""
+        if data.get("intent") != "home_control":
+            self._discard_speculative_action(miss=True)
+        try:
+            self.current_intent = data
+            logger.info(f"Parsed intent: {data.get('intent')}")
+
+            # Voice help intent
+            if data.get("intent") == "help":
+                self._action_pending = False
+                # Capabilities reach the ResponseAgent through its per-stage context (prompt_compiler).
+                self.current_action_taken = {"action": "help"}
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+                return
+
+            # Voice-triggered entity refresh
+            if data.get("intent") == "refresh_entities" or data.get("action") == "refresh":
+                self._action_pending = True
+                refresh_result = self.refresh_entities()
+                self.current_action_taken = {"action": "refresh_entities", **refresh_result}
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+                return
+            
+            # Handle Memory Write Intent
+            if data.get("intent") == "memory_write" or (data.get("action") == "remember"):
+                self._action_pending = False
+                # Extract fact logic (same as before but cleaner)
+                fact = self.current_user_text
+                lower_text = fact.lower()
+                if "remember that" in lower_text:
+                     idx = lower_text.find("remember that") + len("remember that")
+                     fact = fact[idx:].strip()
+                elif "remember" in lower_text:
+                     idx = lower_text.find("remember") + len("remember")
+                     fact = fact[idx:].strip()
+                elif "my name is" in lower_text:
+                     # Special case for names if we want, or just rely on fallback
+                     pass
+                else:
+                    fact = self.current_user_text.strip()
+                
+                if fact and len(fact) > 2:
+                    self.memory_manager.add_fact(f"fact_{int(time.time())}", fact)
+                    self.current_action_taken = {"action": "remember", "status": "success", "fact": fact}
                     self._maybe_schedule_short_ack()
                     self.start_response_agent()
+                    return
                 else:
-                    logger.info(f"Unhandled intent falling through to conversation: {data}")
-                    self._action_pending = False
-                    # Skip to Response Agent
+                    logger.warning(f"Ignored invalid memory fact: '{fact}'")
+                    self.current_intent = {"intent": "conversation"}
                     self.current_action_taken = None
                     self._maybe_schedule_short_ack()
                     self.start_response_agent()
-                    
-            except Exception as e:
-                logger.error(f"Intent parsing failed: {e}")
-                self.current_intent = {"intent": "conversation"}
-                # Provide feedback instead of silent failure
-                self.current_action_taken = {"error": "I couldn't understand that command. Please rephrasing."}
+                    return
+
+            # Handle Memory Read Intent
+            if data.get("intent") == "memory_read":
+                self._action_pending = False
+                # Just pass through to ResponseAgent, but mark action as 'recall' so it knows to look in memory
+                self.current_action_taken = {"action": "recall", "status": "success"}
                 self._maybe_schedule_short_ack()
                 self.start_response_agent()
+                return
 
-        elif self.current_state == "action":
-            try:
-                action_payload = extract_json(response) or {}
-                actions = []
-                if isinstance(action_payload, dict) and isinstance(action_payload.get("actions"), list):
-                    actions = [a for a in action_payload.get("actions") if isinstance(a, dict)]
-                elif isinstance(action_payload, dict) and action_payload:
-                    actions = [action_payload]
-
-                if not actions:
-                    fallback = self._build_input_number_action()
-                    if fallback:
-                        actions = [fallback]
-
-                normalized_actions = []
-                for action in actions:
-                    if not action or not action.get("service"):
-                        continue
-                    if action.get("domain") == "input_number" and action.get("service") in ["turn_on", "turn_off", "toggle"]:
-                        fallback = self._build_input_number_action()
-                        if fallback:
-                            action = fallback
-                    normalized_actions.append(action)
-
-                if normalized_actions:
-                    self.window.set_status("Executing...")
-                    results = []
-                    fallback_delay = self._parse_delay_seconds(self.current_user_text)
-                    for action in normalized_actions:
-                        delay = action.get("delay_seconds") or 0
-                        try:
-                            delay = int(float(delay))
-                        except Exception:
-                            delay = 0
-                        if delay == 0 and fallback_delay > 0:
-                            delay = fallback_delay
-
-                        if delay > 0:
-                            results.append(self._schedule_action(action, delay))
-                        else:
-                            results.append(self._execute_action(action))
-                    self.current_action_taken = {"actions": results}
+            if data.get("intent") == "home_control":
+                self._action_pending = True
+                if "actions" in data:
+                    combined = validate_actions(data.get("actions"), self._parse_entities())
+                    if combined is not None:
+                        logger.info("combined_agent=hit actions=%d", len(combined))
+                        self.current_state = "action"
+                        self._maybe_schedule_short_ack()
+                        self._run_actions(combined)
+                        return
+                    logger.info("combined_agent=invalid_actions -> action_agent")
+                # 2. Action Agent
+                self.window.set_status("Thinking (Action)...")
+                self.current_state = "action"
+                self._start_llm_timeout("action")
+                self._maybe_schedule_short_ack()
+                if not self._take_speculative_action(data):
+                    prompt = self._action_agent_prompt(data)
+                    self.request_llm.emit(prompt.messages, "json", prompt.options)
+            elif data.get("intent") == "telegram_send" or data.get("action") == "send_message":
+                self._action_pending = True
+                message = data.get("message") or self.current_user_text
+                delay = self._parse_delay_seconds(self.current_user_text)
+                if delay > 0:
+                    result = self._schedule_telegram_message(message, delay)
                 else:
-                    self.current_action_taken = None
-            except Exception as e:
-                logger.error(f"Action parsing failed: {e}")
+                    result = self._send_telegram_message(message)
+                self.current_action_taken = {"action": "telegram_send", **result}
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            elif data.get("intent") == "web_search":
+                self._action_pending = True
+                query = data.get("query") or self.current_user_text
+                result = self._web_search(query)
+                if result.get("status") == "success":
+                    self.current_action_taken = {"action": "web_search", "web_search_results": result.get("results", []), "query": result.get("query")}
+                else:
+                    self.current_action_taken = {"action": "web_search", "error": result.get("error") or "Search failed."}
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            elif data.get("intent") == "helper_create":
+                self._action_pending = True
+                # Stage a confirmation; do not execute until user confirms
+                helper_type = (data.get("helper_type") or "input_boolean").strip()
+                helper_name = data.get("helper_name") or self.current_user_text.strip() or "New Helper"
+                helper_value = data.get("helper_value")
+                self.pending_action = {
+                    "pending": True,
+                    "action": "create_helper",
+                    "helper_type": helper_type,
+                    "helper_name": helper_name,
+                    "helper_value": helper_value,
+                    "message": f"Create {helper_type} named '{helper_name}'?"
+                }
+                self.current_action_taken = self.pending_action
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            elif data.get("intent") == "helper_delete":
+                self._action_pending = True
+                # Stage deletion confirmation
+                target = data.get("target") or data.get("helper_name") or self.current_user_text.strip()
+                self.pending_action = {
+                    "pending": True,
+                    "action": "delete_helper",
+                    "entity_id": target,
+                    "message": f"Delete helper/entity '{target}'?"
+                }
+                self.current_action_taken = self.pending_action
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            elif data.get("intent") == "todo_add":
+                self._action_pending = True
+                title = data.get("todo_title") or self.current_user_text
+                due = data.get("todo_due")
+                self.pending_action = {
+                    "pending": True,
+                    "action": "add_todo",
+                    "todo_title": title,
+                    "todo_due": due,
+                    "message": f"Add reminder '{title}'" + (f" due {due}" if due else "") + "?"
+                }
+                self.current_action_taken = self.pending_action
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            elif data.get("intent") == "todo_remove":
+                self._action_pending = True
+                title = data.get("todo_title") or self.current_user_text
+                self.pending_action = {
+                    "pending": True,
+                    "action": "remove_todo",
+                    "todo_title": title,
+                    "message": f"Remove reminder '{title}'?"
+                }
+                self.current_action_taken = self.pending_action
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+            else:
+                logger.info(f"Unhandled intent falling through to conversation: {data}")
+                self._action_pending = False
+                # Skip to Response Agent
                 self.current_action_taken = None
-            
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+                
+        except Exception as e:
+            logger.error(f"Intent parsing failed: {e}")
+            self.current_intent = {"intent": "conversation"}
+            # Provide feedback instead of silent failure
+            self.current_action_taken = {"error": "I couldn't understand that command. Please rephrasing."}
+            self._maybe_schedule_short_ack()
             self.start_response_agent()
 
+    def _run_actions(self, actions: list[dict]) -> None:
+        """Execute or schedule resolved service calls (ActionAgent or combined agent output), then reply."""
+        try:
+            if not actions:
+                fallback = self._build_input_number_action()
+                if fallback:
+                    actions = [fallback]
+
+            normalized_actions = []
+            for action in actions:
+                if not action or not action.get("service"):
+                    continue
+                if action.get("domain") == "input_number" and action.get("service") in ["turn_on", "turn_off", "toggle"]:
+                    fallback = self._build_input_number_action()
+                    if fallback:
+                        action = fallback
+                normalized_actions.append(action)
+
+            if normalized_actions:
+                self.window.set_status("Executing...")
+                results = []
+                fallback_delay = self._parse_delay_seconds(self.current_user_text)
+                for action in normalized_actions:
+                    delay = action.get("delay_seconds") or 0
+                    try:
+                        delay = int(float(delay))
+                    except Exception:
+                        delay = 0
+                    if delay == 0 and fallback_delay > 0:
+                        delay = fallback_delay
+
+                    if delay > 0:
+                        results.append(self._schedule_action(action, delay))
+                    else:
+                        results.append(self._execute_action(action))
+                self.current_action_taken = {"actions": results}
+                self._learn_from_actions(results)
+            else:
+                self.current_action_taken = None
+        except Exception as e:
+            logger.error(f"Action parsing failed: {e}")
+            self.current_action_taken = None
+
+        self.start_response_agent()
+
+    def _handle_action_response(self, response: str) -> None:
+        actions = []
+        try:
+            action_payload = extract_json(response) or {}
+            if isinstance(action_payload, dict) and isinstance(action_payload.get("actions"), list):
+                actions = [a for a in action_payload.get("actions") if isinstance(a, dict)]
+            elif isinstance(action_payload, dict) and action_payload:
+                actions = [action_payload]
+        except Exception as e:
+            logger.error(f"Action parsing failed: {e}")
+        self._run_actions(actions)
+
+    def handle_llm_response(self, response: str):
+        if self._ignore_llm:
+            logger.info("Ignoring LLM response due to cancellation.")
+            return
+        logger.debug(f"handle_llm_response state={self.current_state} preview={response[:50]!r}")
+        logger.info(f"LLM Response ({self.current_state}): {response}")
+        
+        if self.current_state == "intent":
+            self._handle_intent_response(response)
+
+        elif self.current_state == "action":
+            self._handle_action_response(response)
+
         elif self.current_state == "response":
             self._clear_ack_cycle()
             self._cancel_llm_timeout()
@@ -1638,6 +2195,80 @@ class JarvisController(QObject):
             QTimer.singleShot(0, lambda: self.request_tts.emit(reply))
             self.current_state = "idle"
 
+    def _handle_intent_response(self, response: str, data: dict | None = None) -> None:
+        """IntentAgent output: JSON intent data, a conversation reply or plain text (data: already parsed fields)."""
+        if data is None:
+            # Try structured parsing first (supports fenced JSON like ```json {...}```).
+            try:
+                parsed = extract_json(response)
+                if isinstance(parsed, dict) and any(k in parsed for k in ("intent", "action", "target")):
+                    data = parsed
+            except Exception:
+                data = None
+        if data is not None and data.get("intent") == "conversation" and str(data.get("reply") or "").strip():
+            # Structured output (output_schema): the conversational answer arrives as a JSON field.
+            response = str(data["reply"])
+            data = None
+
+        if data is None:
+            self._discard_speculative_action(miss=True)
+            tool_query = extract_tool_call_query(response, "web_search")
+            if tool_query:
+                self._action_pending = True
+                self.current_intent = {"intent": "web_search", "query": tool_query}
+                result = self._web_search(tool_query)
+                if result.get("status") == "success":
+                    self.current_action_taken = {
+                        "action": "web_search",
+                        "web_search_results": result.get("results", []),
+                        "query": result.get("query"),
+                    }
+                else:
+                    self.current_action_taken = {
+                        "action": "web_search",
+                        "error": result.get("error") or "Search failed.",
+                    }
+                self._maybe_schedule_short_ack()
+                self.start_response_agent()
+                return
+
+            # If the user asked for device control but intent output is plain text,
+            # do not allow a fake "done" confirmation with no executed action.
+            if looks_like_home_control_request(self.current_user_text, self._parse_entities()):
+                is_de = cfg.language == "de"
+                reply = (
+                    "Ich konnte den Steuerbefehl nicht sicher ausfuehren. "
+                    "Bitte wiederhole ihn kurz, zum Beispiel: 'Schalte die Tischlampe aus.'"
+                ) if is_de else (
+                    "I could not safely execute that control command. "
+                    "Please repeat it clearly, for example: 'Turn off the table lamp.'"
+                )
+                logger.warning(
+                    "Rejected direct intent reply for control-like request without JSON intent."
+                )
+                self._reply_direct(reply)
+                return
+
+            # Direct conversation reply from IntentAgent
+            self._clear_ack_cycle()
+            self._cancel_llm_timeout()
+            reply = self._sanitize_reply(response)
+            logger.info(f"Assistant (direct): {reply}")
+            self.conversation.add_message("assistant", reply)
+            self.window.add_message(reply, is_user=False)
+
+            self.window.set_status("Speaking...")
+            QTimer.singleShot(0, lambda: self.request_tts.emit(reply))
+            self.current_state = "idle"
+            return
+
+        # JSON response - proceed with normal intent processing
+        self._handle_intent_data(data)
+
+    def _reply_templates(self) -> ReplyTemplates:
+        names = {e["entity_id"]: e["name"] for e in self._parse_entities()}
+        return ReplyTemplates(cfg.language, names)
+
     def start_response_agent(self):
         self.window.set_status("Thinking (Reply)...")
         self.current_state = "response"
@@ -1657,9 +2288,10 @@ class JarvisController(QObject):
                     elif action.get("verified") is True:
                         successes.append(action)
                 if failures:
+                    templates = self._reply_templates()
                     parts = []
                     for act in successes:
-                        parts.append(self._summarize_action_result(act))
+                        parts.append(templates.action_done(act) or self._summarize_action_result(act))
                     for act in failures:
                         parts.append(self._summarize_action_failure(act))
                     self._reply_direct(" ".join(parts))
@@ -1668,22 +2300,18 @@ class JarvisController(QObject):
                 reply = self._summarize_action_failure(self.current_action_taken)
                 self._reply_direct(reply)
                 return
-        
-        # Get memory context
-        memory_context = self.memory_manager.get_all_context()
-        
-        response_agent = ResponseAgent()
-        messages = [{"role": "system", "content": response_agent.get_system_prompt(
-            memory_context=memory_context,
-            entities_context=self.ha_entities,
-            capabilities=self.describe_capabilities(),
-            time_context=self.current_time_context
-        )}]
-        
-        # Add conversation history (last 10 messages)
+
+        # Known outcomes (verified actions, schedules, memory writes, refreshes,
+        # confirmations) are answered from templates; only open-ended turns need the LLM.
+        reply = self._reply_templates().render(self.current_action_taken)
+        if reply:
+            logger.info("response=template action=%s", (self.current_action_taken or {}).get("action", "actions"))
+            self._reply_direct(reply)
+            return
+
+        # Conversation history (last 10 messages; compile_prompt fits them into the token budget)
         history = self.conversation.get_ollama_messages()[-10:]
-        messages.extend(history)
-        
+
         # Context for response
         system_context = ""
         if self.current_intent:
@@ -1695,15 +2323,16 @@ class JarvisController(QObject):
         else:
             system_context += "Action Result: None (No action was taken)\n"
             
-        # Construct the final prompt with clear delimiters
-        final_prompt = (
-            f"System Context:\n{system_context}\n"
-            f"User Input:\n{self.current_user_text}"
+        intent = (self.current_intent or {}).get("intent")
+        prompt = compile_prompt(
+            "response",
+            self._prompt_context(history),
+            self.current_user_text,
+            intent=intent,
+            extra=f"System Context:\n{system_context}",
+            has_actions=intent == "home_control" and bool(self.current_action_taken),
         )
-        
-        messages.append({"role": "user", "content": final_prompt})
-        
-        self.request_llm.emit(messages, "text")
+        self.request_llm.emit(prompt.messages, "text", prompt.options)
 
     def _begin_ack_cycle(self, anchor_ts: float | None = None, source: str = "text"):
         self._ack_spoken = False
@@ -1946,6 +2575,13 @@ class JarvisController(QObject):
         self._start_wake_word_if_enabled()
 
     def handle_tts_finished(self):
+        if self._speech_queue:
+            self.request_tts.emit(self._speech_queue.pop(0))
+            return
+        self._speech_active = False
+        if self._speech_stream_open:
+            # More sentences of the streamed reply are on their way.
+            return
         if self.window.mic_btn.state == MicButton.STATE_LISTENING:
             logger.info("TTS finished after wake interrupt; keeping listening state.")
             return
@@ -1981,6 +2617,9 @@ class JarvisController(QObject):
         return True
 
     def handle_error(self, msg):
+        self._discard_speculative_action()
+        self._abort_intent_stream()
+        self._reset_speech_queue()
         self._clear_ack_cycle()
         self._cancel_llm_timeout()
         if self._handle_remote_ollama_unreachable(msg):
@@ -1992,6 +2631,9 @@ class JarvisController(QObject):
 
     def _cancel_inflight(self, reason: str):
         self._ignore_llm = True
+        self._discard_speculative_action()
+        self._abort_intent_stream()
+        self._reset_speech_queue()
         self._clear_ack_cycle()
         self._cancel_llm_timeout()
         self.current_state = "idle"
@@ -2013,6 +2655,9 @@ class JarvisController(QObject):
             self._llm_timeout.stop()
 
     def _on_llm_timeout(self):
+        self._discard_speculative_action()
+        self._abort_intent_stream()
+        self._reset_speech_queue()
         self._clear_ack_cycle()
         self.window.set_status("Error")
         self.window.add_message("Error: Response timed out. Please try again.", is_user=False)
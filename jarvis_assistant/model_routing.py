@@ -0,0 +1,100 @@
+"""
+Per-stage model routing.
+
+The IntentAgent and ActionAgent emit short JSON and are latency-bound, so a
+small model is enough; the ResponseAgent writes free text and benefits from a
+bigger one. `llm_stage_models` assigns a model, and optionally a provider, per
+stage; stages without an entry use the primary model of `api_provider`:
+
+    "llm_stage_models": {
+        "intent": "qwen2.5:1.5b",
+        "action": "qwen2.5:1.5b",
+        "response": {"provider": "lmstudio", "model": "qwen2.5-7b-instruct"}
+    }
+
+The combined intent+action call uses the intent route. LLMWorker falls back to
+the primary route when a stage route fails (model not installed, server down)
+and skips that route for ROUTE_RETRY_SECONDS. llm_residency keeps the routed
+local models loaded as long as they fit `llm_memory_budget_gb` together.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+ROUTED_STAGES = ("intent", "action", "response")
+# Residency priority when not all models fit the memory budget: intent latency is felt on every turn.
+RESIDENCY_ORDER = ("intent", "primary", "action", "response")
+ROUTE_RETRY_SECONDS = 300.0
+OPENAI_MODEL = "gpt-4o-mini"  # Default to mini for speed
+GEMINI_MODEL = "gemini-2.5-flash"
+OPENCODE_DEFAULT_MODEL = "grok-code"
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    provider: str
+    model: str
+
+    def __str__(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+def provider_model(provider: str) -> str:
+    """Model configured (or fixed) for a provider."""
+    from .config import cfg
+
+    if provider == "lmstudio":
+        return (cfg.lmstudio_model or "").strip()
+    if provider == "openai":
+        return OPENAI_MODEL
+    if provider == "gemini":
+        return GEMINI_MODEL
+    if provider.startswith("opencode"):
+        return cfg.ollama_model or OPENCODE_DEFAULT_MODEL
+    return cfg.ollama_model
+
+
+def primary_route() -> ModelRoute:
+    from .config import cfg
+
+    provider = (cfg.api_provider or "ollama").strip().lower()
+    return ModelRoute(provider, provider_model(provider))
+
+
+def stage_route(stage: str | None) -> ModelRoute:
+    """Route of a prompt stage ("combined" counts as "intent"); the primary route when none is configured."""
+    from .config import cfg
+
+    primary = primary_route()
+    entry = cfg.llm_stage_models.get("intent" if stage == "combined" else stage or "")
+    if not entry:
+        return primary
+    if isinstance(entry, str):
+        return ModelRoute(primary.provider, entry.strip())
+    provider = str(entry.get("provider") or primary.provider).strip().lower()
+    return ModelRoute(provider, str(entry.get("model") or "").strip() or provider_model(provider))
+
+
+def resident_routes(sizes: dict[ModelRoute, int], budget_bytes: int) -> tuple[list[ModelRoute], list[ModelRoute]]:
+    """
+    Distinct local routes to keep loaded, in RESIDENCY_ORDER, and those left out
+    because the budget is used up. budget_bytes 0 keeps all; sizes missing from
+    the map count as 0.
+    """
+    routes: list[ModelRoute] = []
+    for name in RESIDENCY_ORDER:
+        route = primary_route() if name == "primary" else stage_route(name)
+        if route.provider in ("ollama", "lmstudio") and route.model and route not in routes:
+            routes.append(route)
+    kept: list[ModelRoute] = []
+    skipped: list[ModelRoute] = []
+    used = 0
+    for route in routes:
+        size = sizes.get(route, 0)
+        if budget_bytes and kept and used + size > budget_bytes:
+            skipped.append(route)
+            continue
+        kept.append(route)
+        used += size
+    return kept, skipped
@@ -0,0 +1,213 @@
+"""
+Structured-output schemas for the JSON stages (intent, combined, action).
+
+The output shapes are declared once as dataclasses; json_schema() turns them
+into a JSON Schema that is passed to the provider so decoding is constrained
+to exactly these fields (Ollama `format`, OpenAI / LM Studio
+`response_format: json_schema`, Gemini `response_schema`). Generation ends as
+soon as the object closes and the reply parses with a single json.loads().
+
+With structured output the IntentAgent cannot answer in plain text, so
+conversation turns come back as {"intent": "conversation", "reply": "..."}.
+"""
+
+from __future__ import annotations
+
+import types
+from dataclasses import MISSING, dataclass, fields, is_dataclass
+from typing import Any, Literal, Optional, Union, get_args, get_origin, get_type_hints
+
+IntentName = Literal[
+    "home_control",
+    "conversation",
+    "memory_write",
+    "memory_read",
+    "help",
+    "refresh_entities",
+    "helper_create",
+    "helper_delete",
+    "todo_add",
+    "todo_remove",
+    "telegram_send",
+    "web_search",
+]
+IntentAction = Literal[
+    "turn_on",
+    "turn_off",
+    "toggle",
+    "remember",
+    "recall",
+    "help",
+    "refresh",
+    "create_helper",
+    "delete_helper",
+    "add_todo",
+    "remove_todo",
+    "send_message",
+]
+# Mirrors intent_utils.ACTION_SERVICES.
+Service = Literal["turn_on", "turn_off", "toggle", "set_value"]
+
+# Providers whose chat endpoint accepts a JSON schema for the reply.
+SCHEMA_PROVIDERS = ("ollama", "openai", "gemini", "lmstudio")
+
+
+@dataclass
+class IntentOutput:
+    intent: IntentName
+    target: Optional[str] = None
+    action: Optional[IntentAction] = None
+    reply: Optional[str] = None
+    query: Optional[str] = None
+    helper_type: Optional[Literal["input_boolean", "input_number", "input_text"]] = None
+    helper_name: Optional[str] = None
+    helper_value: Optional[Union[float, str]] = None
+    todo_title: Optional[str] = None
+    todo_due: Optional[str] = None
+    message: Optional[str] = None
+    confirm: Optional[bool] = None
+    confidence: Optional[float] = None
+
+
+@dataclass
+class ServiceCall:
+    domain: str
+    service: Service
+    entity_id: str
+    value: Optional[float] = None
+    delay_seconds: Optional[int] = None
+
+
+@dataclass
+class ActionOutput:
+    actions: list[ServiceCall]
+
+
+@dataclass
+class CombinedIntentOutput(IntentOutput):
+    actions: Optional[list[ServiceCall]] = None
+
+
+STAGE_OUTPUTS = {"intent": IntentOutput, "combined": CombinedIntentOutput, "action": ActionOutput}
+
+# Fields the controller reads per intent. Once they are streamed, the intent is
+# dispatched and the rest of the generation (confidence, nulls) is aborted.
+# Intents not listed here are dispatched when the object closes.
+DISPATCH_FIELDS = {
+    "home_control": ("target", "action"),
+    "conversation": ("reply",),
+    "memory_write": (),
+    "memory_read": (),
+    "help": (),
+    "refresh_entities": (),
+    "telegram_send": ("message",),
+    "web_search": ("query",),
+    "todo_remove": ("todo_title",),
+}
+
+
+def ready_for_dispatch(fields: dict[str, Any], combined: bool = False) -> bool:
+    """True when a partially streamed intent object already holds everything the controller uses."""
+    intent = fields.get("intent")
+    if intent not in DISPATCH_FIELDS:
+        return False
+    needed = DISPATCH_FIELDS[intent]
+    if combined and intent == "home_control":
+        needed += ("actions",)
+    return all(name in fields for name in needed)
+
+
+def _type_schema(tp: Any) -> dict[str, Any]:
+    origin = get_origin(tp)
+    if origin in (Union, types.UnionType):
+        # Optional[...] makes a field non-required; null is added per provider (nullable_schema).
+        args = [a for a in get_args(tp) if a is not type(None)]
+        if len(args) == 1:
+            return _type_schema(args[0])
+        return {"anyOf": [_type_schema(a) for a in args]}
+    if origin is Literal:
+        return {"type": "string", "enum": list(get_args(tp))}
+    if origin is list:
+        (item,) = get_args(tp) or (str,)
+        return {"type": "array", "items": _type_schema(item)}
+    if is_dataclass(tp):
+        return json_schema(tp)
+    if tp is bool:
+        return {"type": "boolean"}
+    if tp is int:
+        return {"type": "integer"}
+    if tp is float:
+        return {"type": "number"}
+    return {"type": "string"}
+
+
+def json_schema(cls: type) -> dict[str, Any]:
+    """JSON Schema for a dataclass; fields without a default are required, in declaration order."""
+    hints = get_type_hints(cls)
+    properties = {}
+    required = []
+    for f in fields(cls):
+        properties[f.name] = _type_schema(hints[f.name])
+        if f.default is MISSING and f.default_factory is MISSING:
+            required.append(f.name)
+    return {"type": "object", "properties": properties, "required": required, "additionalProperties": False}
+
+
+def structured_output_active(stage: str | None = None) -> bool:
+    """Schema-constrained output for the provider serving stage (model_routing; the primary provider by default)."""
+    from .config import cfg
+    from .model_routing import stage_route
+
+    return cfg.structured_output_enabled and stage_route(stage).provider in SCHEMA_PROVIDERS
+
+
+def stage_schema(stage: str) -> dict[str, Any] | None:
+    cls = STAGE_OUTPUTS.get(stage)
+    return json_schema(cls) if cls else None
+
+
+def nullable_schema(schema: dict[str, Any], require_all: bool = False) -> dict[str, Any]:
+    """
+    Optional properties also accept null (prompts say "null when not applicable").
+    require_all is OpenAI strict mode, where every property must be listed as required.
+    """
+    if schema.get("type") == "array":
+        return {**schema, "items": nullable_schema(schema["items"], require_all)}
+    if "anyOf" in schema:
+        return {"anyOf": [nullable_schema(s, require_all) for s in schema["anyOf"]]}
+    if schema.get("type") != "object":
+        return schema
+    properties = {}
+    for name, prop in schema["properties"].items():
+        prop = nullable_schema(prop, require_all)
+        if name not in schema["required"]:
+            if "anyOf" in prop:
+                prop = {"anyOf": prop["anyOf"] + [{"type": "null"}]}
+            else:
+                prop = {**prop, "type": [prop["type"], "null"]}
+                if "enum" in prop:
+                    prop["enum"] = prop["enum"] + [None]
+        properties[name] = prop
+    return {**schema, "properties": properties, "required": list(properties) if require_all else schema["required"]}
+
+
+def gemini_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    """Gemini's OpenAPI subset: upper-case types, no additionalProperties, explicit property order."""
+    if "anyOf" in schema:
+        # Only numbers and strings are mixed (helper_value); Gemini accepts either as a string.
+        return {"type": "STRING"}
+    out: dict[str, Any] = {"type": schema["type"].upper()}
+    if "enum" in schema:
+        out["enum"] = schema["enum"]
+    if schema["type"] == "array":
+        out["items"] = gemini_schema(schema["items"])
+    if schema["type"] == "object":
+        out["properties"] = {}
+        for name, prop in schema["properties"].items():
+            out["properties"][name] = gemini_schema(prop)
+            if name not in schema["required"]:
+                out["properties"][name]["nullable"] = True
+        out["required"] = schema["required"]
+        out["propertyOrdering"] = list(schema["properties"])
+    return out
+
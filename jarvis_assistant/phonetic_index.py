@@ -0,0 +1,341 @@
+"""
+Phonetic index over entity names and quick-command phrases.
+
+Whisper often spells device names the way they sound ("tish lamp", "Tisch
+Lampe", "Wohnzimmer light"), which the exact/token-subset matcher misses. Names
+and queries are reduced to phonetic codes (Kölner Phonetik for German, Double
+Metaphone for English) over the name with spaces removed, so compound splits and
+cross-language spellings land on the same key.
+
+Double Metaphone comes from the optional `metaphone` package; without it a
+simplified built-in English metaphone is used.
+
+Evaluate the fast-path hit rate on a recorded utterance corpus with:
+    python -m jarvis_assistant.phonetic_index corpus.jsonl --entities entities.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any
+
+from .quick_commands import QuickCommand, _normalize_text, _tokenize
+
+try:
+    from metaphone import doublemetaphone
+
+    metaphone_available = True
+except ImportError:
+    metaphone_available = False
+
+SERVICE_WORDS = {
+    "turn_on": {"on", "an", "ein", "einschalten", "anschalten", "anmachen"},
+    "turn_off": {"off", "aus", "ausschalten", "ausmachen"},
+    "toggle": {"toggle", "um", "umschalten"},
+}
+
+FILLER_WORDS = {
+    "turn", "switch", "please", "the", "my", "a", "can", "you", "jarvis", "hey",
+    "schalte", "schalt", "mach", "mache", "bitte", "die", "der", "das", "den", "dem", "mal",
+}
+
+MIN_SCORE = 0.86
+MIN_MARGIN = 0.05
+
+# Folded before _normalize_text, which would drop ß (and æ/ø) as non-letters.
+_LETTER_FOLDS = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "Ä": "a", "Ö": "o", "Ü": "u", "ß": "ss", "æ": "ae", "ø": "o"})
+
+
+def _phonetic_word(text: str) -> str:
+    """Lower-case letters and digits of text, spaces removed, umlauts folded to their vowel."""
+    return _normalize_text(str(text or "").translate(_LETTER_FOLDS)).replace(" ", "")
+
+
+# --- Kölner Phonetik ------------------------------------------------------
+
+def cologne_phonetic(text: str) -> str:
+    word = _phonetic_word(text)
+    codes: list[str] = []
+    for i, ch in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        nxt = word[i + 1] if i + 1 < len(word) else ""
+        if ch in "aeiouyj":
+            code = "0"
+        elif ch == "h":
+            code = ""
+        elif ch == "b":
+            code = "1"
+        elif ch == "p":
+            code = "3" if nxt == "h" else "1"
+        elif ch in "dt":
+            code = "8" if nxt and nxt in "csz" else "2"
+        elif ch in "fvw":
+            code = "3"
+        elif ch in "gkq":
+            code = "4"
+        elif ch == "c":
+            if i == 0:
+                code = "4" if nxt and nxt in "ahkloqrux" else "8"
+            else:
+                code = "4" if nxt and nxt in "ahkoqux" and prev not in "sz" else "8"
+        elif ch == "x":
+            code = "8" if prev and prev in "ckq" else "48"
+        elif ch == "l":
+            code = "5"
+        elif ch in "mn":
+            code = "6"
+        elif ch == "r":
+            code = "7"
+        elif ch in "sz":
+            code = "8"
+        else:
+            code = ""
+        codes.append(code)
+
+    collapsed: list[str] = []
+    last = None
+    for code in codes:
+        if code == "":
+            continue
+        if code != last:
+            collapsed.append(code)
+        last = code
+    result = "".join(collapsed)
+    return result[:1] + result[1:].replace("0", "") if result else ""
+
+
+# --- Metaphone ------------------------------------------------------------
+
+_FALLBACK_RULES = (
+    ("sch", "X"), ("tch", "X"), ("ch", "X"), ("sh", "X"), ("th", "0"), ("ph", "F"),
+    ("ck", "K"), ("gh", ""), ("wh", "W"), ("qu", "KW"),
+)
+
+
+def _simple_metaphone(text: str) -> str:
+    """Rough English metaphone: enough to fold common spelling variants together."""
+    word = _phonetic_word(text)
+    if not word:
+        return ""
+    for src, dst in _FALLBACK_RULES:
+        word = word.replace(src, dst)
+    out: list[str] = []
+    for i, ch in enumerate(word):
+        nxt = word[i + 1] if i + 1 < len(word) else ""
+        if ch.isupper() or ch == "0":
+            # Already rewritten by a digraph rule.
+            code = ch
+        elif ch in "aeiouy":
+            code = "A" if i == 0 else ""
+        elif ch == "c":
+            code = "S" if nxt and nxt in "eiy" else "K"
+        elif ch == "g":
+            code = "J" if nxt and nxt in "eiy" else "K"
+        elif ch in "kq":
+            code = "K"
+        elif ch == "z":
+            code = "S"
+        elif ch == "v":
+            code = "F"
+        elif ch == "d":
+            code = "T"
+        elif ch == "h":
+            code = ""
+        elif ch == "x":
+            code = "X" if i > 0 and word[i - 1] == "s" else "KS"
+        else:
+            code = ch.upper()
+        if code and (not out or out[-1] != code):
+            out.append(code)
+    return "".join(out)
+
+
+def metaphone_codes(text: str) -> tuple[str, ...]:
+    word = _phonetic_word(text)
+    if not word:
+        return ()
+    if metaphone_available:
+        return tuple(code for code in doublemetaphone(word) if code)
+    return (_simple_metaphone(word),)
+
+
+def phonetic_keys(text: str) -> tuple[str, ...]:
+    keys = [f"k:{cologne_phonetic(text)}"] + [f"m:{code}" for code in metaphone_codes(text)]
+    return tuple(k for k in keys if len(k) > 2)
+
+
+# --- Index ----------------------------------------------------------------
+
+def split_command(text: str) -> tuple[str, str | None]:
+    """Split an utterance into (target words, service) by dropping verbs and fillers."""
+    service = None
+    target: list[str] = []
+    for token in _tokenize(text):
+        hit = next((svc for svc, words in SERVICE_WORDS.items() if token in words), None)
+        if hit:
+            service = hit
+            continue
+        if token not in FILLER_WORDS:
+            target.append(token)
+    return " ".join(target), service
+
+
+@dataclass
+class PhoneticEntry:
+    target: str
+    keys: tuple[str, ...]
+    action: dict[str, Any]
+    service: str | None = None
+    quick_command: QuickCommand | None = None
+
+
+@dataclass
+class PhoneticMatch:
+    entry: PhoneticEntry
+    action: dict[str, Any]
+    score: float
+
+
+def _similarity(a: tuple[str, ...], b: tuple[str, ...]) -> float:
+    best = 0.0
+    for ka in a:
+        for kb in b:
+            if ka[:2] != kb[:2]:
+                continue
+            if ka == kb:
+                return 1.0
+            best = max(best, SequenceMatcher(None, ka[2:], kb[2:]).ratio())
+    return best
+
+
+class PhoneticIndex:
+    def __init__(self, entries: list[PhoneticEntry] | None = None):
+        self.entries = entries or []
+
+    @classmethod
+    def build(cls, entities: list[dict[str, Any]], quick_commands: list[QuickCommand]) -> "PhoneticIndex":
+        entries: list[PhoneticEntry] = []
+        for cmd in quick_commands:
+            if not cmd.enabled:
+                continue
+            for phrase in cmd.phrases:
+                target, service = split_command(phrase)
+                keys = phonetic_keys(target)
+                if keys:
+                    entries.append(PhoneticEntry(target, keys, dict(cmd.action), service or cmd.action.get("service"), cmd))
+        for entity in entities:
+            entity_id = str(entity.get("entity_id") or "")
+            name = str(entity.get("name") or "")
+            keys = phonetic_keys(name)
+            if entity_id and keys:
+                domain = entity.get("domain") or entity_id.split(".", 1)[0]
+                entries.append(PhoneticEntry(_normalize_text(name), keys, {"domain": domain, "entity_id": entity_id}))
+        return cls(entries)
+
+    def lookup(self, text: str) -> PhoneticMatch | None:
+        target, service = split_command(text)
+        if not service or not target:
+            return None
+        keys = phonetic_keys(target)
+        if not keys:
+            return None
+
+        scored: list[tuple[float, PhoneticEntry]] = []
+        for entry in self.entries:
+            if entry.quick_command is not None and entry.service != service:
+                continue
+            score = _similarity(keys, entry.keys)
+            if score >= MIN_SCORE:
+                scored.append((score, entry))
+        if not scored:
+            return None
+        scored.sort(key=lambda item: item[0], reverse=True)
+        best_score, best = scored[0]
+        best_entity = best.action.get("entity_id")
+        # Reject ties between different devices; several phrases for one device are fine.
+        for score, entry in scored[1:]:
+            if entry.action.get("entity_id") != best_entity and best_score - score < MIN_MARGIN:
+                return None
+        action = dict(best.action)
+        if best.quick_command is None:
+            action["service"] = service
+        return PhoneticMatch(entry=best, action=action, score=best_score)
+
+
+# --- Corpus evaluation ------------------------------------------------------
+
+def evaluate(corpus: list[dict[str, Any]], entities: list[dict[str, Any]], quick_commands: list[QuickCommand]) -> dict[str, Any]:
+    """
+    Fast-path hit rate over corpus rows {"text": ..., "entity_id": ..., "service": ...},
+    without and with the phonetic index. A hit must resolve to the expected entity/service.
+    """
+    from .quick_commands import FastIntentRouter
+
+    plain = FastIntentRouter(quick_commands, fuzzy_enabled=True)
+    phonetic = FastIntentRouter(
+        quick_commands,
+        fuzzy_enabled=True,
+        phonetic_index=PhoneticIndex.build(entities, quick_commands),
+    )
+
+    def correct(result, row) -> bool:
+        if result is None or not result.action:
+            return False
+        if row.get("entity_id") and result.action.get("entity_id") != row["entity_id"]:
+            return False
+        return not row.get("service") or result.action.get("service") == row["service"]
+
+    stats = {"total": len(corpus), "baseline_hits": 0, "phonetic_hits": 0, "wrong": 0, "misses": []}
+    for row in corpus:
+        text = str(row.get("text") or "")
+        if correct(plain.match_fast_intent(text), row):
+            stats["baseline_hits"] += 1
+        result = phonetic.match_fast_intent(text)
+        if correct(result, row):
+            stats["phonetic_hits"] += 1
+        elif result is not None and result.action:
+            stats["wrong"] += 1
+        else:
+            stats["misses"].append(text)
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure fast-path hit rate with and without the phonetic index.")
+    parser.add_argument("corpus", help="JSONL with text / entity_id / service per utterance")
+    parser.add_argument("--entities", help="JSON list of {name, entity_id, domain}; default: live Home Assistant")
+    parser.add_argument("--profile", default=None, help="Quick-command profile (default: current profile)")
+    args = parser.parse_args(argv)
+
+    from .config import cfg
+    from .intent_utils import parse_entities
+    from .quick_commands import QuickCommandStore
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    if args.entities:
+        with open(args.entities, "r", encoding="utf-8") as f:
+            entities = json.load(f)
+    else:
+        from .ha_client import HomeAssistantClient
+
+        entities = parse_entities(HomeAssistantClient().get_relevant_entities())
+    commands = QuickCommandStore(args.profile or cfg.current_profile).load_commands()
+
+    stats = evaluate(corpus, entities, commands)
+    total = max(1, stats["total"])
+    print(f"utterances:     {stats['total']}")
+    print(f"baseline hits:  {stats['baseline_hits']} ({stats['baseline_hits'] / total:.1%})")
+    print(f"phonetic hits:  {stats['phonetic_hits']} ({stats['phonetic_hits'] / total:.1%})")
+    print(f"wrong actions:  {stats['wrong']}")
+    for text in stats["misses"]:
+        print(f"  miss: {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Per-stage prompt compilation on top of prompt_layout.
+
+Each stage only gets the context it uses (see STAGE_SECTIONS): the ActionAgent
+needs device names but no memory or capabilities; the ResponseAgent, which after
+reply templates only handles conversation, memory recall, web search and help,
+needs devices only when an action result is being explained and capabilities
+only for help. Duplicate instruction lines are dropped, the current user turn is
+not repeated from history, and a token report is logged for every request.
+Sections are fitted into the stage's token budget (token_budget): history is
+trimmed oldest-first and oversized memory / pasted text is clipped, so the
+prompt plus reply stays within num_ctx.
+
+    python -m jarvis_assistant.prompt_compiler --check [--entities entities.json]
+
+prints the per-template report for a synthetic 150-entity house (or the given
+entity list) and exits non-zero when a template exceeds PROMPT_TOKEN_CAPS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+
+from .agents import ActionAgent, CombinedAgent, IntentAgent, ResponseAgent
+from .entity_retrieval import EntityRetriever
+from .output_schema import stage_schema
+from .prompt_layout import build_messages, split_entities_context, volatile_block
+from .token_budget import (
+    EXTRA_SHARE,
+    HISTORY_MESSAGE_SHARE,
+    MEMORY_SHARE,
+    USER_SHARE,
+    clip_text,
+    estimate_tokens,
+    fit_history,
+    message_tokens,
+    stage_budget,
+)
+from .utils import logger
+
+# Context sections per stage; "response" is narrowed further by intent below.
+# The ActionAgent maps names to service calls, so it gets no device states.
+STAGE_SECTIONS = {
+    "intent": {"devices", "time", "states", "memory"},
+    "action": {"devices", "time"},
+    "response": {"time", "memory"},
+}
+RESPONSE_SECTIONS_BY_INTENT = {
+    "help": {"capabilities"},
+    "memory_read": {"memory"},
+    "web_search": {"time"},
+}
+EXAMPLES_PER_INTENT = 2
+
+# Upper bounds (estimated tokens) checked by --check for the 150-entity reference house
+# (they also hold with --top-k 0, i.e. the full device list).
+PROMPT_TOKEN_CAPS = {"intent": 4200, "combined": 4400, "action": 2400, "response": 800}
+
+_DEDUPE_MIN_CHARS = 24
+
+
+def dedupe_lines(text: str) -> str:
+    """Drop repeated instruction lines; short structural lines ("{", "}", headers) are kept."""
+    seen: set[str] = set()
+    out = []
+    for line in (text or "").split("\n"):
+        key = line.strip()
+        if len(key) >= _DEDUPE_MIN_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(line)
+    return "\n".join(out)
+
+
+@dataclass
+class PromptContext:
+    entities_context: str = ""
+    capabilities: str = ""
+    time_context: str = ""
+    memory_context: str = ""
+    history: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class CompiledPrompt:
+    stage: str
+    messages: list[dict]
+    report: dict[str, int]
+    options: dict[str, int] = field(default_factory=dict)
+
+
+def sections_for(stage: str, intent: str | None = None, has_actions: bool = False) -> set[str]:
+    sections = set(STAGE_SECTIONS.get(stage, ()))
+    if stage == "response":
+        sections = set(RESPONSE_SECTIONS_BY_INTENT.get(intent or "", sections))
+        if has_actions:
+            sections |= {"devices", "states"}
+    return sections
+
+
+def compile_prompt(
+    stage: str,
+    ctx: PromptContext,
+    user_text: str,
+    intent: str | None = None,
+    extra: str = "",
+    has_actions: bool = False,
+    combined: bool = False,
+    num_ctx: int | None = None,
+    structured: bool = False,
+) -> CompiledPrompt:
+    """
+    Build the message list for one stage ("intent", "action" or "response") within its token budget.
+    structured: the JSON stages get their output_schema in options["json_schema"] and matching instructions.
+    """
+    name = "combined" if combined else stage
+    budget = stage_budget(name, num_ctx)
+    sections = sections_for(stage, intent, has_actions)
+    names, states = split_entities_context(ctx.entities_context) if sections & {"devices", "states"} else ("", "")
+    names = names if "devices" in sections else ""
+    states = states if "states" in sections else ""
+    capabilities = ctx.capabilities if "capabilities" in sections else ""
+
+    structured = structured and stage != "response"
+    if stage == "intent":
+        agent = CombinedAgent() if combined else IntentAgent()
+        system = agent.get_system_prompt(names, capabilities, examples_per_intent=EXAMPLES_PER_INTENT, structured=structured)
+    elif stage == "action":
+        system = ActionAgent().get_system_prompt(names, structured=structured)
+    else:
+        system = ResponseAgent().get_system_prompt(names, capabilities)
+    system = dedupe_lines(system)
+
+    history = list(ctx.history)
+    # The controller records the user turn before prompting; it is sent once, in the final message.
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == user_text:
+        history.pop()
+
+    memory = clip_text(ctx.memory_context, budget.share(MEMORY_SHARE)) if "memory" in sections else ""
+    extra = clip_text(extra, budget.share(EXTRA_SHARE))
+    user_text = clip_text(user_text, budget.share(USER_SHARE))
+    volatile = volatile_block(ctx.time_context if "time" in sections else "", states, memory, extra=extra)
+    final = build_messages("", [], user_text, volatile)[-1]
+    room = budget.prompt_tokens - message_tokens({"content": system}) - message_tokens(final)
+    history, dropped = fit_history(history, max(0, room), budget.share(HISTORY_MESSAGE_SHARE))
+
+    messages = build_messages(system, history, user_text, volatile)
+    report = {
+        "system": estimate_tokens(system),
+        "history": sum(estimate_tokens(m.get("content", "")) for m in history),
+        "volatile": estimate_tokens(final["content"]),
+    }
+    report["total"] = sum(report.values())
+    report.update(
+        entities=estimate_tokens(names) + estimate_tokens(states),
+        memory=estimate_tokens(memory),
+        user=estimate_tokens(user_text),
+        history_dropped=dropped,
+        num_ctx=budget.num_ctx,
+        num_predict=budget.num_predict,
+    )
+    logger.info(
+        "prompt stage=%s system_tokens=%d entities_tokens=%d memory_tokens=%d history_tokens=%d "
+        "user_tokens=%d total_tokens=%d history_dropped=%d num_ctx=%d num_predict=%d",
+        name,
+        report["system"],
+        report["entities"],
+        report["memory"],
+        report["history"],
+        report["user"],
+        report["total"],
+        dropped,
+        budget.num_ctx,
+        budget.num_predict,
+    )
+    if room < 0:
+        logger.warning("prompt stage=%s over_budget_tokens=%d; raise ollama_num_ctx or lower entity_retrieval_top_k", name, -room)
+    options = budget.options()
+    if structured:
+        options["json_schema"] = stage_schema(name)
+    return CompiledPrompt(stage=name, messages=messages, report=report, options=options)
+
+
+def _reference_house(count: int = 150) -> str:
+    domains = ["light", "switch", "sensor", "binary_sensor", "input_boolean", "input_number", "climate", "cover"]
+    rooms = ["Kitchen", "Living Room", "Bedroom", "Office", "Hallway", "Bathroom", "Garage", "Garden"]
+    lines = []
+    for i in range(count):
+        domain = domains[i % len(domains)]
+        room = rooms[(i // len(domains)) % len(rooms)]
+        name = f"{room} {domain.replace('_', ' ').title()} {i}"
+        entity_id = f"{domain}.{room.lower().replace(' ', '_')}_{i}"
+        lines.append(f"- Name: '{name}', Entity: '{entity_id}', State: 'on'")
+    return "\n".join(lines)
+
+
+def template_report(
+    entities_context: str, capabilities: str = "", num_ctx: int = 4096, top_k: int = 20, structured: bool = False
+) -> dict[str, dict[str, int]]:
+    """
+    Per-template reports; top_k > 0 narrows the house the way the controller's entity
+    retrieval does, structured compiles the JSON stages with their output schema.
+    """
+    text = "Turn off the kitchen light"
+    if top_k:
+        entities_context = EntityRetriever(entities_context).context(text, [], top_k)
+    ctx = PromptContext(
+        entities_context=entities_context,
+        capabilities=capabilities,
+        time_context="2026-01-05T17:00:00+01:00",
+        memory_context="User Facts:\n- fact_1: My name is Bobby\n- fact_2: I like blue",
+    )
+    compiled = [
+        compile_prompt("intent", ctx, text, num_ctx=num_ctx, structured=structured),
+        compile_prompt("intent", ctx, text, combined=True, num_ctx=num_ctx, structured=structured),
+        compile_prompt(
+            "action", ctx, text, extra='Intent: {"intent": "home_control"}', num_ctx=num_ctx, structured=structured
+        ),
+        compile_prompt(
+            "response",
+            ctx,
+            "Tell me a joke",
+            intent="conversation",
+            extra="System Context:\nIntent: conversation\nAction Result: None (No action was taken)\n",
+            num_ctx=num_ctx,
+        ),
+    ]
+    return {c.stage: c.report for c in compiled}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Report compiled prompt sizes per template.")
+    parser.add_argument("--entities", help="JSON list of {name, entity_id, state}; default: synthetic 150-entity house")
+    parser.add_argument("--top-k", type=int, default=20, help="Entity retrieval top-k (0 = full device list)")
+    parser.add_argument("--num-ctx", type=int, default=4096, help="Context window to budget against (default 4096)")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a template exceeds PROMPT_TOKEN_CAPS or num_ctx")
+    args = parser.parse_args(argv)
+
+    if args.entities:
+        with open(args.entities, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        entities_context = "\n".join(
+            f"- Name: '{e.get('name') or e['entity_id']}', Entity: '{e['entity_id']}', State: '{e.get('state') or 'unknown'}'"
+            for e in raw
+        )
+    else:
+        entities_context = _reference_house()
+
+    failed = False
+    for stage, report in template_report(entities_context, num_ctx=args.num_ctx, top_k=args.top_k).items():
+        cap = PROMPT_TOKEN_CAPS.get(stage)
+        over = (cap is not None and report["total"] > cap) or report["total"] + report["num_predict"] > report["num_ctx"]
+        failed = failed or over
+        print(
+            f"{stage:<9} system={report['system']:5d}  history={report['history']:4d}  "
+            f"volatile={report['volatile']:5d}  total={report['total']:5d}  cap={cap}  "
+            f"num_predict={report['num_predict']}{'  OVER' if over else ''}"
+        )
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Prompt assembly ordered for KV prefix-cache reuse (Ollama / llama.cpp / LM Studio).
+
+A request is laid out from least to most volatile:
+
+    system:  static instructions + examples      (identical every turn)
+             slow context: device names, capabilities (changes on refresh)
+    history: previous turns                       (append-only)
+    user:    per-turn data (time, device states, memory) + the user input
+
+The server only re-evaluates tokens after the first difference from the
+previous request, so keeping the time and entity states out of the system
+prompt lets it reuse the whole instruction block instead of re-reading ~3 KB
+of prompt on every call.
+"""
+
+from __future__ import annotations
+
+from .intent_utils import parse_entities
+
+
+def split_entities_context(entities_context: str) -> tuple[str, str]:
+    """
+    Split get_relevant_entities() output into (names, states).
+
+    names is "- entity_id: Friendly Name" per line (slow: changes only on refresh);
+    states is "entity_id: state" per line (volatile). Unparseable input (errors,
+    "No relevant devices found.") is returned unchanged as names.
+    """
+    entities = parse_entities(entities_context)
+    if not entities:
+        return (entities_context or "").strip(), ""
+    names = "\n".join(
+        f"- {e['entity_id']}: {e['name']}" if e["name"] != e["entity_id"] else f"- {e['entity_id']}" for e in entities
+    )
+    states = "\n".join(f"{e['entity_id']}: {e['state']}" for e in entities)
+    return names, states
+
+
+def volatile_block(time_context: str = "", device_states: str = "", memory_context: str = "", extra: str = "") -> str:
+    """Per-turn sections, in a fixed order so their headers stay stable too."""
+    sections = []
+    if time_context:
+        sections.append(f"Current Time:\n{time_context}")
+    if device_states:
+        sections.append(f"Device States:\n{device_states}")
+    if memory_context:
+        sections.append(f"Memory & Context:\n{memory_context}")
+    if extra:
+        sections.append(extra.strip())
+    return "\n\n".join(sections)
+
+
+def build_messages(system_prompt: str, history: list[dict], user_text: str, volatile: str = "") -> list[dict]:
+    """system -> history -> final user message carrying the volatile block and the user input."""
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(history)
+    content = f"{volatile}\n\nUser Input:\n{user_text}" if volatile else user_text
+    messages.append({"role": "user", "content": content})
+    return messages
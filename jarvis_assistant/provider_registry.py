@@ -0,0 +1,157 @@
+"""
+Pooled HTTP clients for the LLM backends.
+
+Each backend (provider name + base URL) gets one ProviderClient that owns a
+requests.Session, so turns reuse keep-alive connections instead of opening a
+new TCP (and TLS) connection per call. Liveness is tracked passively: every
+request marks the backend up, a connection failure marks it down, and the
+state is trusted for LIVENESS_TTL seconds. Callers only probe (and try to
+start Ollama) when the backend is known to be down, not before every request.
+
+Capabilities that would otherwise be re-checked per call (LM Studio's model
+ids, whether Ollama accepts a JSON schema as `format`, whether LM Studio
+accepts response_format) are cached on the client, optionally with a TTL.
+They are dropped when the backend goes down. Models that failed as a stage
+route (model_routing) are remembered separately and keep their retry window.
+
+    client = provider_client("ollama", cfg.ollama_api_url)
+    client.post(url, json=payload, timeout=300)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+
+from .utils import logger
+
+LIVENESS_TTL = 30.0
+# Main request, speculative action, streamed intent and a settings probe can overlap.
+POOL_SIZE = 8
+
+
+class ProviderClient:
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._alive: bool | None = None
+        self._state_at = 0.0
+        self._capabilities: dict[str, tuple[Any, float | None]] = {}
+        self._failed_models: dict[str, float] = {}  # model -> retry after (monotonic)
+
+    @property
+    def alive(self) -> bool | None:
+        """Last observed state; None when nothing was observed within LIVENESS_TTL."""
+        with self._lock:
+            if self._alive is None or time.monotonic() - self._state_at > LIVENESS_TTL:
+                return None
+            return self._alive
+
+    def mark_alive(self) -> None:
+        self._set_state(True)
+
+    def mark_down(self, reason: object = "") -> None:
+        self._set_state(False, reason)
+
+    def _set_state(self, alive: bool, reason: object = "") -> None:
+        with self._lock:
+            previous = self._alive
+            self._alive = alive
+            self._state_at = time.monotonic()
+        if previous is alive:
+            return
+        if not alive:
+            logger.info("provider=%s base_url=%s state=down %s", self.name, self.base_url, reason)
+            # A restarted server may run another version or have other models loaded.
+            self.forget_capabilities()
+        elif previous is False:
+            logger.info("provider=%s base_url=%s state=up", self.name, self.base_url)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """session.request() that records liveness; any HTTP response counts as up."""
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except ConnectionError as exc:
+            self.mark_down(exc.__class__.__name__)
+            raise
+        self.mark_alive()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def capability(self, key: str, default: Any = None) -> Any:
+        """Cached capability value, default when unknown or expired."""
+        with self._lock:
+            entry = self._capabilities.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and time.monotonic() > expires:
+                del self._capabilities[key]
+                return default
+            return value
+
+    def set_capability(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._capabilities[key] = (value, None if ttl is None else time.monotonic() + ttl)
+
+    def forget_capabilities(self) -> None:
+        with self._lock:
+            self._capabilities.clear()
+
+    def mark_model_failed(self, model: str, ttl: float) -> None:
+        """Skip model as a stage route for ttl seconds; survives forget_capabilities()."""
+        with self._lock:
+            self._failed_models[model] = time.monotonic() + ttl
+
+    def model_failed(self, model: str) -> bool:
+        with self._lock:
+            retry_at = self._failed_models.get(model)
+            if retry_at is None:
+                return False
+            if time.monotonic() > retry_at:
+                del self._failed_models[model]
+                return False
+            return True
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: dict[tuple[str, str], ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+
+def provider_client(name: str, base_url: str = "") -> ProviderClient:
+    """Shared client for a backend; a changed base URL gets a fresh client (and liveness)."""
+    key = (name, (base_url or "").rstrip("/"))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ProviderClient(name, key[1])
+        return client
+
+
+def close_all() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
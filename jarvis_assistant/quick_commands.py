@@ -167,6 +167,14 @@ class QuickCommandStore:
         self.path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
 
 
+# On/off words; a fuzzy match must not flip them ("turn on ..." vs "turn off ...").
+_POLARITY_TOKENS = {"on": "on", "an": "on", "ein": "on", "off": "off", "aus": "off"}
+
+
+def _polarity(tokens: set[str]) -> set[str]:
+    return {_POLARITY_TOKENS[t] for t in tokens if t in _POLARITY_TOKENS}
+
+
 class QuickCommandMatcher:
     def __init__(self, commands: list[QuickCommand], fuzzy_enabled: bool = True):
         self.commands = commands
@@ -195,13 +203,18 @@ class QuickCommandMatcher:
         # Step 2: constrained fuzzy
         if self.fuzzy_enabled:
             best: tuple[float, QuickCommand | None] = (0.0, None)
+            text_polarity = _polarity(text_tokens)
             for cmd in self.commands:
-                if not cmd.enabled:
+                # Learned commands are verbatim user sentences and match exactly only (step 1).
+                if not cmd.enabled or (cmd.meta or {}).get("source") == "learned":
                     continue
                 for phrase in cmd.phrases:
                     p_norm = _normalize_text(phrase)
                     if not p_norm:
                         continue
+                    phrase_polarity = _polarity(set(p_norm.split(" ")))
+                    if text_polarity and phrase_polarity and text_polarity != phrase_polarity:
+                        continue
                     score = SequenceMatcher(None, text_norm, p_norm).ratio()
                     if score > best[0]:
                         best = (score, cmd)
@@ -233,8 +246,18 @@ class FastIntentRouter:
         re.compile(r"\b(erstelle|generiere)\s+quick\s+commands\b"),
     ]
 
-    def __init__(self, commands: list[QuickCommand], fuzzy_enabled: bool = True):
+    def __init__(
+        self,
+        commands: list[QuickCommand],
+        fuzzy_enabled: bool = True,
+        phonetic_index: Any | None = None,
+        slot_grammar: Any | None = None,
+    ):
         self.matcher = QuickCommandMatcher(commands, fuzzy_enabled=fuzzy_enabled)
+        # slot_grammar.SlotGrammar; runs before the matcher so values/delays are not dropped.
+        self.slot_grammar = slot_grammar
+        # phonetic_index.PhoneticIndex; consulted only after the text matcher misses.
+        self.phonetic_index = phonetic_index
 
     def match_fast_intent(self, text: str, locale: str | None = None, now_ctx: datetime | None = None) -> FastIntentResult | None:
         norm = _normalize_text(text)
@@ -268,9 +291,21 @@ class FastIntentRouter:
             if pattern.search(norm):
                 return FastIntentResult(kind="quick_command_generate")
 
+        if self.slot_grammar is not None and self.slot_grammar.has_slots(text):
+            slot = self.slot_grammar.match(text, now_ctx)
+            if slot is None:
+                # A value/delay we could not resolve: let the LLM handle it rather than
+                # running a plain on/off quick command immediately.
+                return None
+            return FastIntentResult(
+                kind="slot_action",
+                action=slot.action,
+                meta={"delay_seconds": slot.delay_seconds, "entity_name": slot.entity_name},
+            )
+
         cmd = self.matcher.match(norm)
         if cmd is None:
-            return None
+            return self._match_phonetic(norm)
 
         requires_confirm = cmd.safety == "requires_confirm" or not is_safe_auto_action(cmd.action)
         return FastIntentResult(
@@ -281,6 +316,27 @@ class FastIntentRouter:
             meta={"command_id": cmd.id},
         )
 
+    def _match_phonetic(self, norm: str) -> FastIntentResult | None:
+        if self.phonetic_index is None:
+            return None
+        match = self.phonetic_index.lookup(norm)
+        if match is None:
+            return None
+        cmd = match.entry.quick_command
+        requires_confirm = not is_safe_auto_action(match.action) or (cmd is not None and cmd.safety == "requires_confirm")
+        return FastIntentResult(
+            kind="quick_action",
+            action=match.action,
+            quick_command=cmd,
+            requires_confirm=requires_confirm,
+            meta={
+                "command_id": cmd.id if cmd else None,
+                "match": "phonetic",
+                "target": match.entry.target,
+                "score": round(match.score, 3),
+            },
+        )
+
 
 def generate_commands_from_entities(entities: list[dict[str, Any]], *, locale: str | None = None) -> list[QuickCommand]:
     commands: list[QuickCommand] = []
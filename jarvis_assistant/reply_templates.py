@@ -0,0 +1,240 @@
+"""
+Bilingual reply templates for turns whose outcome is already known.
+
+Verified home-control actions, scheduled actions, memory writes, entity
+refreshes and confirmation prompts are answered from these templates instead
+of a ResponseAgent LLM call. Each outcome has a few phrasings picked at random
+so repeated commands do not sound canned. ReplyTemplates.render() returns None for
+anything it does not cover; the caller then falls back to the ResponseAgent.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any
+
+from .slot_grammar import describe_delay
+
+# service -> locale -> phrasings; {name} is the friendly name (or names joined).
+_SERVICE_DONE = {
+    "turn_on": {
+        "en": ["Turned on {name}.", "{name} is on.", "Okay, {name} is on now."],
+        "de": ["{name} ist an.", "Habe {name} eingeschaltet.", "Okay, {name} ist jetzt an."],
+    },
+    "turn_off": {
+        "en": ["Turned off {name}.", "{name} is off.", "Okay, {name} is off now."],
+        "de": ["{name} ist aus.", "Habe {name} ausgeschaltet.", "Okay, {name} ist jetzt aus."],
+    },
+    "toggle": {
+        "en": ["Toggled {name}.", "Switched {name}.", "Okay, {name} switched."],
+        "de": ["{name} umgeschaltet.", "Habe {name} umgeschaltet.", "Okay, {name} ist umgeschaltet."],
+    },
+    "set_value": {
+        "en": ["Set {name} to {value}.", "{name} is now at {value}.", "Okay, {name} set to {value}."],
+        "de": ["{name} steht auf {value}.", "Habe {name} auf {value} gestellt.", "Okay, {name} ist jetzt auf {value}."],
+    },
+}
+
+# Same for several entities at once ("Kitchen and Desk Lamp are off").
+_SERVICE_DONE_MANY = {
+    "turn_on": {
+        "en": ["Turned on {name}.", "{name} are on.", "Okay, {name} are on now."],
+        "de": ["{name} sind an.", "Habe {name} eingeschaltet.", "Okay, {name} sind jetzt an."],
+    },
+    "turn_off": {
+        "en": ["Turned off {name}.", "{name} are off.", "Okay, {name} are off now."],
+        "de": ["{name} sind aus.", "Habe {name} ausgeschaltet.", "Okay, {name} sind jetzt aus."],
+    },
+    "toggle": {
+        "en": ["Toggled {name}.", "Switched {name}."],
+        "de": ["{name} umgeschaltet.", "Habe {name} umgeschaltet."],
+    },
+    "set_value": {
+        "en": ["Set {name} to {value}.", "{name} are now at {value}."],
+        "de": ["{name} stehen auf {value}.", "Habe {name} auf {value} gestellt."],
+    },
+}
+
+# Infinitive phrasing for "I'll ... in 10 minutes".
+_SERVICE_LATER = {
+    "turn_on": {"en": "turn on {name}", "de": "{name} einschalten"},
+    "turn_off": {"en": "turn off {name}", "de": "{name} ausschalten"},
+    "toggle": {"en": "switch {name}", "de": "{name} umschalten"},
+    "set_value": {"en": "set {name} to {value}", "de": "{name} auf {value} stellen"},
+}
+
+_SCHEDULED = {
+    "en": ["Okay, I'll {what} in {when}.", "Sure, I'll {what} in {when}.", "Got it, in {when} I'll {what}."],
+    "de": ["Alles klar, ich werde in {when} {what}.", "Okay, in {when} werde ich {what}.", "Mache ich, in {when} werde ich {what}."],
+}
+
+_REMEMBERED = {
+    "en": ["Got it, I'll remember that.", "Okay, noted.", "I'll keep that in mind."],
+    "de": ["Alles klar, das merke ich mir.", "Okay, notiert.", "Ich merke es mir."],
+}
+
+_REFRESHED = {
+    "en": ["Refreshed the device list, {count} devices available.", "Device list updated, I see {count} devices."],
+    "de": ["Geraeteliste aktualisiert, {count} Geraete verfuegbar.", "Geraete neu geladen, ich sehe {count} Geraete."],
+}
+
+_REFRESH_FAILED = {
+    "en": ["I couldn't refresh the devices. {error}"],
+    "de": ["Ich konnte die Geraete nicht aktualisieren. {error}"],
+}
+
+_CANCELLED = {
+    "en": ["Okay, cancelled.", "Alright, I won't do it.", "Cancelled."],
+    "de": ["Okay, abgebrochen.", "Alles klar, ich lasse es.", "Abgebrochen."],
+}
+
+# pending action -> locale -> question; a confirmation hint is appended.
+_CONFIRM = {
+    "create_helper": {
+        "en": "Should I create the {helper_type} '{helper_name}'?",
+        "de": "Soll ich den Helfer '{helper_name}' ({helper_type}) anlegen?",
+    },
+    "delete_helper": {
+        "en": "Should I delete '{entity_id}'?",
+        "de": "Soll ich '{entity_id}' loeschen?",
+    },
+    "add_todo": {
+        "en": "Should I add the reminder '{todo_title}'{due}?",
+        "de": "Soll ich die Erinnerung '{todo_title}'{due} hinzufuegen?",
+    },
+    "remove_todo": {
+        "en": "Should I remove the reminder '{todo_title}'?",
+        "de": "Soll ich die Erinnerung '{todo_title}' entfernen?",
+    },
+}
+
+_CONFIRM_HINT = {
+    "en": ["Say yes to confirm.", "Just say yes or no.", "Yes or no?"],
+    "de": ["Sag ja zum Bestaetigen.", "Sag einfach ja oder nein.", "Ja oder nein?"],
+}
+
+_CONFIRMED_DONE = {
+    "create_helper": {"en": "Created '{helper_name}'.", "de": "'{helper_name}' ist angelegt."},
+    "delete_helper": {"en": "Deleted '{entity_id}'.", "de": "'{entity_id}' ist geloescht."},
+    "add_todo": {"en": "Added the reminder '{todo_title}'.", "de": "Erinnerung '{todo_title}' hinzugefuegt."},
+    "remove_todo": {"en": "Removed the reminder '{todo_title}'.", "de": "Erinnerung '{todo_title}' entfernt."},
+}
+
+
+def _lang(locale: str | None) -> str:
+    return "de" if locale == "de" else "en"
+
+
+def _join(names: list[str], lang: str) -> str:
+    if len(names) <= 1:
+        return "".join(names)
+    word = " und " if lang == "de" else " and "
+    return ", ".join(names[:-1]) + word + names[-1]
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+class ReplyTemplates:
+    def __init__(self, locale: str | None = None, names: dict[str, str] | None = None, rng: random.Random | None = None):
+        self.lang = _lang(locale)
+        self.names = names or {}
+        self._rng = rng or random.Random()
+
+    def _pick(self, options: list[str]) -> str:
+        return self._rng.choice(options)
+
+    def _name(self, entity_id: Any) -> str:
+        ids = entity_id if isinstance(entity_id, list) else [entity_id]
+        return _join([self.names.get(str(eid)) or str(eid) for eid in ids if eid], self.lang)
+
+    def action_done(self, action: dict[str, Any]) -> str | None:
+        entity_id = action.get("entity_id")
+        many = isinstance(entity_id, list) and len(entity_id) > 1
+        templates = (_SERVICE_DONE_MANY if many else _SERVICE_DONE).get(str(action.get("service") or ""))
+        if templates is None:
+            return None
+        return self._pick(templates[self.lang]).format(
+            name=self._name(entity_id),
+            value=_format_value(action.get("value")),
+        )
+
+    def actions_done(self, actions: list[dict[str, Any]]) -> str | None:
+        """One sentence per service; actions with the same service/value are merged ("A and B are off")."""
+        groups: dict[tuple[str, str], list[Any]] = {}
+        for action in actions:
+            key = (str(action.get("service") or ""), _format_value(action.get("value")))
+            ids = action.get("entity_id")
+            groups.setdefault(key, []).extend(ids if isinstance(ids, list) else [ids])
+        parts = []
+        for (service, value), ids in groups.items():
+            part = self.action_done({"service": service, "entity_id": ids, "value": value})
+            if part is None:
+                return None
+            parts.append(part)
+        return " ".join(parts) or None
+
+    def scheduled(self, action: dict[str, Any], delay_seconds: int) -> str | None:
+        later = _SERVICE_LATER.get(str(action.get("service") or ""))
+        if later is None:
+            return None
+        what = later[self.lang].format(name=self._name(action.get("entity_id")), value=_format_value(action.get("value")))
+        when = describe_delay(int(delay_seconds), self.lang)
+        return self._pick(_SCHEDULED[self.lang]).format(what=what, when=when)
+
+    def confirmation(self, pending: dict[str, Any]) -> str | None:
+        template = _CONFIRM.get(str(pending.get("action") or ""))
+        if template is None:
+            return None
+        due = pending.get("todo_due")
+        fields = {
+            "helper_type": pending.get("helper_type") or "input_boolean",
+            "helper_name": pending.get("helper_name") or "",
+            "entity_id": pending.get("entity_id") or "",
+            "todo_title": pending.get("todo_title") or "",
+            "due": (f" fuer {due}" if self.lang == "de" else f" due {due}") if due else "",
+        }
+        return f"{template[self.lang].format(**fields)} {self._pick(_CONFIRM_HINT[self.lang])}"
+
+    def render(self, action_taken: Any) -> str | None:
+        """Reply for a controller current_action_taken payload, or None when the ResponseAgent is needed."""
+        if not isinstance(action_taken, dict):
+            return None
+        if isinstance(action_taken.get("actions"), list):
+            actions = action_taken["actions"]
+            if not actions or any(a.get("error") or a.get("verified") is False for a in actions):
+                return None
+            parts = []
+            done = [a for a in actions if not a.get("scheduled")]
+            if done:
+                if any(a.get("verified") is not True for a in done):
+                    return None
+                parts.append(self.actions_done(done))
+            for item in actions:
+                if item.get("scheduled"):
+                    parts.append(self.scheduled(item.get("action") or {}, item.get("delay_seconds") or 0))
+            return None if None in parts else " ".join(parts)
+
+        kind = action_taken.get("action")
+        if kind == "refresh_entities":
+            if action_taken.get("status") == "success":
+                return self._pick(_REFRESHED[self.lang]).format(count=action_taken.get("entity_count", 0))
+            return self._pick(_REFRESH_FAILED[self.lang]).format(error=action_taken.get("error") or "").strip()
+        if action_taken.get("error"):
+            return None
+        if action_taken.get("pending"):
+            return self.confirmation(action_taken)
+        if kind == "remember" and action_taken.get("status") == "success":
+            return self._pick(_REMEMBERED[self.lang])
+        if kind == "cancelled":
+            return self._pick(_CANCELLED[self.lang])
+        if kind in _CONFIRMED_DONE:
+            return _CONFIRMED_DONE[kind][self.lang].format(
+                helper_name=action_taken.get("helper_name") or "",
+                entity_id=action_taken.get("entity_id") or "",
+                todo_title=action_taken.get("todo_title") or "",
+            )
+        return None
@@ -0,0 +1,192 @@
+"""
+Embedding-based intent router that runs before IntentAgent.
+
+The labeled examples in agents.INTENT_EXAMPLES are embedded once through the
+Ollama /api/embed endpoint, L2-normalized and stored as a float32 matrix that is
+memory-mapped on later starts. A query is embedded, scored against the whole bank
+with one matrix-vector product, and the top-k neighbours vote on the intent.
+Only intents that need no structured slots are routed (see ROUTABLE_INTENTS);
+everything else still goes through the JSON IntentAgent call.
+
+SemanticRouterWorker runs on its own QThread: warm() builds the router and the
+bank and embeds one query so the embedding model is loaded, whenever the
+embedding URL or model changes; classify() answers a turn. Until a warm router
+is available the controller sends the JSON intent request directly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from . import app_paths
+from .provider_registry import provider_client
+from .utils import logger
+
+ROUTABLE_INTENTS = {"memory_read", "help", "refresh_entities", "web_search", "conversation"}
+
+
+@dataclass
+class RouteResult:
+    intent: str
+    score: float
+    votes: int
+    k: int
+
+
+def ollama_embedder(base_url: str, model: str, timeout: float = 5.0) -> Callable[[list[str]], np.ndarray]:
+    url = f"{base_url.rstrip('/')}/api/embed"
+    client = provider_client("ollama", base_url)
+
+    def embed(texts: list[str]) -> np.ndarray:
+        resp = client.post(url, json={"model": model, "input": texts}, timeout=timeout)
+        resp.raise_for_status()
+        return np.asarray(resp.json()["embeddings"], dtype=np.float32)
+
+    return embed
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class SemanticRouter:
+    def __init__(
+        self,
+        examples: dict[str, list[str]],
+        embed: Callable[[list[str]], np.ndarray],
+        model: str,
+        cache_dir: str | None = None,
+    ):
+        self._embed = embed
+        self.model = model
+        self.labels: list[str] = []
+        self.texts: list[str] = []
+        for intent, utterances in examples.items():
+            for text in utterances:
+                self.labels.append(intent)
+                self.texts.append(text)
+        self._intents = sorted(examples)
+        self._label_ids = np.array([self._intents.index(label) for label in self.labels], dtype=np.int32)
+        self.cache_dir = Path(cache_dir or Path(app_paths.data_root()) / "intent_router")
+        self.bank: np.ndarray | None = None
+
+    def _cache_stem(self) -> Path:
+        digest = hashlib.sha1(
+            json.dumps({"model": self.model, "labels": self.labels, "texts": self.texts}).encode("utf-8")
+        ).hexdigest()[:16]
+        return self.cache_dir / f"bank_{digest}"
+
+    def load(self) -> None:
+        """Memory-map the cached bank, or embed the examples once and write it."""
+        stem = self._cache_stem()
+        matrix_path = stem.with_suffix(".f32")
+        meta_path = stem.with_suffix(".json")
+        if matrix_path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            self.bank = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=tuple(meta["shape"]))
+            return
+
+        started = time.perf_counter()
+        vectors = _normalize_rows(self._embed(self.texts))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for old in self.cache_dir.glob("bank_*"):
+            old.unlink(missing_ok=True)
+        mm = np.memmap(matrix_path, dtype=np.float32, mode="w+", shape=vectors.shape)
+        mm[:] = vectors
+        mm.flush()
+        meta_path.write_text(json.dumps({"model": self.model, "shape": list(vectors.shape)}), encoding="utf-8")
+        self.bank = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=vectors.shape)
+        logger.info(
+            "intent_router bank built examples=%d dim=%d ms=%d",
+            vectors.shape[0],
+            vectors.shape[1],
+            int((time.perf_counter() - started) * 1000),
+        )
+
+    def route(self, text: str, k: int = 5) -> RouteResult:
+        if self.bank is None:
+            self.load()
+        query = self._embed([text])[0]
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.bank @ query
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        # Similarity-weighted vote among the k nearest examples.
+        weights = np.bincount(self._label_ids[top], weights=np.maximum(scores[top], 0.0), minlength=len(self._intents))
+        winner = int(np.argmax(weights))
+        votes = int(np.sum(self._label_ids[top] == winner))
+        # Report the nearest example's score only when it agrees with the vote.
+        score = float(scores[top[0]]) if self._label_ids[top[0]] == winner else 0.0
+        return RouteResult(intent=self._intents[winner], score=score, votes=votes, k=k)
+
+    def classify(self, text: str, threshold: float, k: int = 5) -> RouteResult | None:
+        """Routed intent when confident and routable, else None (caller uses IntentAgent)."""
+        result = self.route(text, k=k)
+        confident = result.score >= threshold
+        logger.info(
+            "intent_router intent=%s score=%.3f votes=%d/%d routed=%s",
+            result.intent,
+            result.score,
+            result.votes,
+            result.k,
+            confident and result.intent in ROUTABLE_INTENTS,
+        )
+        if not confident or result.intent not in ROUTABLE_INTENTS:
+            return None
+        return result
+
+
+class SemanticRouterWorker(QObject):
+    """
+    Owns the SemanticRouter on the router thread. Results carry the
+    controller's turn id so a late answer for an older request can be ignored.
+    """
+
+    ready = pyqtSignal(object)  # key (ollama url, model) of the warm router
+    failed = pyqtSignal(object, str)  # key, error
+    classified = pyqtSignal(int, object)  # turn id, RouteResult or None
+
+    def __init__(self, examples: dict[str, list[str]]):
+        super().__init__()
+        self._examples = examples
+        self._router: SemanticRouter | None = None
+        self._key: tuple[str, str] | None = None
+
+    def warm(self, key: tuple[str, str]) -> None:
+        if self._router is not None and self._key == key:
+            self.ready.emit(key)
+            return
+        base_url, model = key
+        started = time.perf_counter()
+        try:
+            router = SemanticRouter(self._examples, ollama_embedder(base_url, model), model)
+            # route() loads the bank and leaves the embedding model loaded in Ollama.
+            router.route("warmup")
+        except Exception as exc:
+            logger.warning("intent_router warmup failed model=%s: %s", model, exc)
+            self.failed.emit(key, str(exc))
+            return
+        self._router, self._key = router, key
+        logger.info("intent_router ready model=%s warm_ms=%d", model, int((time.perf_counter() - started) * 1000))
+        self.ready.emit(key)
+
+    def classify(self, turn_id: int, text: str, threshold: float) -> None:
+        result = None
+        try:
+            if self._router is not None:
+                result = self._router.classify(text, threshold)
+        except Exception as exc:
+            logger.warning("intent_router classify failed: %s", exc)
+            self.failed.emit(self._key, str(exc))
+        self.classified.emit(turn_id, result)
@@ -0,0 +1,48 @@
+"""
+Split streamed reply text into sentences for TTS.
+
+feed() returns the sentences completed by a chunk; flush() returns the rest
+once the stream ends. A boundary is ".", "!", "?" or "…" followed by
+whitespace, or a line break. A period after a single letter, a common
+abbreviation or a number ("e.g.", "z. B.", "Dr.", "am 3. Mai") is not treated
+as a boundary unless a line break follows.
+"""
+
+from __future__ import annotations
+
+import re
+
+_BOUNDARY = re.compile(r"([.!?…]+)[\"')\]]*\s+|\n+")
+_NO_BREAK_BEFORE_PERIOD = re.compile(
+    r"(?:\b\w|\b(?:dr|mr|mrs|ms|st|vs|nr|ca|bzw|ggf|inkl|prof|usw)|\d+)$", re.IGNORECASE
+)
+
+
+class SentenceStream:
+    def __init__(self, min_chars: int = 2):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text or ""
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            punct = match.group(1)
+            if (
+                punct == "."
+                and "\n" not in match.group(0)
+                and _NO_BREAK_BEFORE_PERIOD.search(self._buffer[start : match.start()])
+            ):
+                continue
+            sentence = self._buffer[start : match.end()].strip()
+            if len(sentence) < self.min_chars:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
@@ -0,0 +1,154 @@
+"""
+Deterministic slot grammar for home-control commands that carry a value or a
+delay, e.g. "set the heater to 5", "stell die Heizung auf 21",
+"turn off the lamp in 10 minutes", "schalte die Lampe um 22:30 aus".
+
+The grammar is compiled from the entity list (verbs x entity slot x value/delay
+slot) and yields complete _execute_action/_schedule_action payloads. Anything
+ambiguous (no or several matching entities, conflicting verbs, a value outside
+the entity's min/max) returns None so the caller falls back to the LLM.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+from .intent_utils import parse_delay_seconds
+from .phonetic_index import SERVICE_WORDS
+from .quick_commands import SAFE_AUTO_DOMAINS, _normalize_text, _tokenize
+
+_DELAY_RE = re.compile(
+    r"\b(?:in\s+\d+\s*(?:seconds?|secs?|sekunden?|minutes?|minuten?|mins?|hours?|hrs?|stunden?)"
+    r"|(?:at|um)\s*\d{1,2}[:.]\d{2}(?:\s*uhr)?"
+    r"|in\s+(?:half\s+an\s+hour|half\s+hour|einer\s+halben\s+stunde))\b",
+    re.IGNORECASE,
+)
+_VALUE_RE = re.compile(r"\b(?:to|auf)\s+(-?\d+(?:[.,]\d+)?)\b", re.IGNORECASE)
+
+
+@dataclass
+class SlotMatch:
+    action: dict[str, Any]
+    delay_seconds: int = 0
+    entity_name: str = ""
+
+
+@dataclass
+class _EntitySlot:
+    entity_id: str
+    domain: str
+    name: str
+    aliases: tuple[str, ...]
+
+
+class SlotGrammar:
+    def __init__(
+        self,
+        entities: list[dict[str, Any]],
+        attributes: Callable[[str], dict[str, Any]] | None = None,
+    ):
+        self._attributes = attributes
+        self._slots: list[_EntitySlot] = []
+        for entity in entities:
+            entity_id = str(entity.get("entity_id") or "")
+            domain = str(entity.get("domain") or entity_id.split(".", 1)[0])
+            if domain not in SAFE_AUTO_DOMAINS and domain != "input_number":
+                continue
+            aliases = {_normalize_text(str(entity.get("name") or ""))}
+            if "." in entity_id:
+                aliases.add(_normalize_text(entity_id.split(".", 1)[1].replace("_", " ")))
+            aliases.discard("")
+            if entity_id and aliases:
+                self._slots.append(_EntitySlot(entity_id, domain, str(entity.get("name") or entity_id), tuple(aliases)))
+
+    @staticmethod
+    def has_slots(text: str) -> bool:
+        """True when the utterance carries a value or delay the plain quick-command matcher would drop."""
+        return bool(_DELAY_RE.search(text or "") or _VALUE_RE.search(text or ""))
+
+    def _find_entity(self, norm: str, domains: set[str] | None) -> _EntitySlot | None:
+        padded = f" {norm} "
+        best_len = 0
+        best: list[_EntitySlot] = []
+        for slot in self._slots:
+            if domains and slot.domain not in domains:
+                continue
+            for alias in slot.aliases:
+                if f" {alias} " not in padded:
+                    continue
+                if len(alias) > best_len:
+                    best_len, best = len(alias), [slot]
+                elif len(alias) == best_len and slot not in best:
+                    best.append(slot)
+        return best[0] if len(best) == 1 else None
+
+    def _resolve_value(self, entity_id: str, value: float) -> float | int | None:
+        """Snap to the entity's step; None when the value lies outside min/max."""
+        attrs: dict[str, Any] = {}
+        if self._attributes is not None:
+            try:
+                attrs = self._attributes(entity_id) or {}
+            except Exception:
+                attrs = {}
+        min_val, max_val, step = attrs.get("min"), attrs.get("max"), attrs.get("step")
+        if isinstance(min_val, (int, float)) and value < min_val:
+            return None
+        if isinstance(max_val, (int, float)) and value > max_val:
+            return None
+        if isinstance(step, (int, float)) and step > 0:
+            base = min_val if isinstance(min_val, (int, float)) else 0
+            value = base + round((value - base) / step) * step
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return value
+
+    def match(self, text: str, now: datetime | None = None) -> SlotMatch | None:
+        raw = text or ""
+        delay = parse_delay_seconds(raw, now or datetime.now()) if _DELAY_RE.search(raw) else 0
+        value_match = _VALUE_RE.search(raw)
+        if not delay and not value_match:
+            return None
+
+        # Drop the delay/value spans so "um 22:30" or "auf 5" cannot read as verbs or names.
+        rest = _DELAY_RE.sub(" ", raw)
+        rest = _VALUE_RE.sub(" ", rest)
+        norm = _normalize_text(rest)
+        tokens = set(_tokenize(rest))
+
+        if value_match:
+            slot = self._find_entity(norm, {"input_number"})
+            if slot is None:
+                return None
+            value = self._resolve_value(slot.entity_id, float(value_match.group(1).replace(",", ".")))
+            if value is None:
+                return None
+            action = {"domain": slot.domain, "service": "set_value", "entity_id": slot.entity_id, "value": value}
+        else:
+            services = {svc for svc, words in SERVICE_WORDS.items() if tokens & words}
+            if len(services) != 1:
+                return None
+            slot = self._find_entity(norm, SAFE_AUTO_DOMAINS)
+            if slot is None:
+                return None
+            action = {"domain": slot.domain, "service": services.pop(), "entity_id": slot.entity_id}
+
+        if delay:
+            action["delay_seconds"] = delay
+        return SlotMatch(action=action, delay_seconds=delay, entity_name=slot.name)
+
+
+def describe_delay(seconds: int, locale: str | None = None) -> str:
+    is_de = locale == "de"
+    if seconds >= 3600 and seconds % 3600 == 0:
+        n = seconds // 3600
+        unit = ("Stunde" if n == 1 else "Stunden") if is_de else ("hour" if n == 1 else "hours")
+    elif seconds >= 60:
+        n = round(seconds / 60)
+        unit = ("Minute" if n == 1 else "Minuten") if is_de else ("minute" if n == 1 else "minutes")
+    else:
+        n = seconds
+        unit = ("Sekunde" if n == 1 else "Sekunden") if is_de else ("second" if n == 1 else "seconds")
+    return f"{n} {unit}"
@@ -0,0 +1,98 @@
+"""
+Pre-STT speech gate: trims leading/trailing silence with a frame-energy VAD and
+rejects recordings (or decoded segments) that contain no usable speech.
+
+Qt-free so it can run both on the STT thread and in helper processes.
+"""
+
+import re
+from typing import Any
+
+import numpy as np
+
+FRAME_MS = 30
+PAD_MS = 200
+MIN_SPEECH_MS = 150
+
+# Whisper's own fallback heuristics: a segment is silence when the model thinks
+# there is no speech AND it is not confident about the text it produced.
+DEFAULT_NO_SPEECH_THRESHOLD = 0.6
+DEFAULT_LOGPROB_THRESHOLD = -1.0
+
+# Phrases Whisper commonly hallucinates on silence/noise (EN + DE).
+HALLUCINATION_PHRASES = {
+    "thank you",
+    "thanks for watching",
+    "thank you for watching",
+    "please subscribe",
+    "you",
+    "bye",
+    "untertitel im auftrag des zdf für funk 2017",
+    "untertitel der amara org community",
+    "untertitel von stephanie geiges",
+    "vielen dank",
+    "danke fürs zuschauen",
+    "tschüss",
+}
+
+
+def _normalize(text: str) -> str:
+    txt = re.sub(r"[^\w\s]", " ", (text or "").lower(), flags=re.UNICODE)
+    return re.sub(r"\s+", " ", txt).strip()
+
+
+def frame_rms(audio: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> np.ndarray:
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.mean(np.square(frames), axis=1))
+
+
+def trim_silence(
+    audio: np.ndarray,
+    sample_rate: int,
+    energy_threshold: float,
+    *,
+    frame_ms: int = FRAME_MS,
+    pad_ms: int = PAD_MS,
+    min_speech_ms: int = MIN_SPEECH_MS,
+) -> np.ndarray | None:
+    """
+    Return the audio cut to the first..last voiced frame (plus padding),
+    or None when fewer than min_speech_ms of voiced frames were found.
+    The threshold adapts upward to the recording's noise floor.
+    """
+    rms = frame_rms(audio, sample_rate, frame_ms)
+    if rms.size == 0:
+        return None
+
+    noise_floor = float(np.percentile(rms, 20))
+    threshold = max(float(energy_threshold), noise_floor * 2.5)
+    voiced = np.flatnonzero(rms >= threshold)
+    if voiced.size * frame_ms < min_speech_ms:
+        return None
+
+    frame_len = int(sample_rate * frame_ms / 1000)
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, int(voiced[0]) * frame_len - pad)
+    end = min(len(audio), (int(voiced[-1]) + 1) * frame_len + pad)
+    return audio[start:end]
+
+
+def is_junk_segment(
+    segment: Any,
+    no_speech_threshold: float = DEFAULT_NO_SPEECH_THRESHOLD,
+    logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+) -> bool:
+    """Segment-level rejection using faster-whisper's no_speech_prob/avg_logprob."""
+    no_speech = float(getattr(segment, "no_speech_prob", 0.0) or 0.0)
+    avg_logprob = float(getattr(segment, "avg_logprob", 0.0) or 0.0)
+    if no_speech > no_speech_threshold and avg_logprob < logprob_threshold:
+        return True
+    text = _normalize(getattr(segment, "text", ""))
+    if not text:
+        return True
+    # Known silence hallucinations only count as junk when the model had doubts.
+    return text in HALLUCINATION_PHRASES and (no_speech > no_speech_threshold / 2 or avg_logprob < logprob_threshold)
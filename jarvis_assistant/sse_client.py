@@ -0,0 +1,173 @@
+"""
+Server-Sent Events streaming for the HTTP chat providers.
+
+OpenAI-compatible chat completions (OpenAI, LM Studio, opencode), the
+Anthropic-style messages endpoint (opencode's Claude / minimax models) and
+Gemini's streamGenerateContent all stream their reply as SSE. stream_chat()
+posts the request, hands every text delta to on_text as it arrives and returns
+the full text together with a ChatUsage record. Setting the abort event stops
+reading and closes the connection, which cancels generation server-side; the
+result is then None (like LLMWorker._ollama_chat).
+
+Each dialect is a parse function (event name, decoded data, usage) -> text
+delta that also fills in the token counts the provider reports.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+import requests
+
+from .utils import logger
+
+
+class SSEError(RuntimeError):
+    """Error event inside an otherwise successful (HTTP 200) stream."""
+
+
+@dataclass
+class ChatUsage:
+    """Provider-agnostic usage and timing of one streamed request."""
+
+    provider: str
+    model: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    first_token_ms: float | None = None
+    total_ms: float = 0.0
+    aborted: bool = False
+
+    def log(self) -> None:
+        logger.info(
+            "llm_stream provider=%s model=%s prompt_tokens=%s completion_tokens=%s first_token_ms=%s total_ms=%d aborted=%d",
+            self.provider,
+            self.model,
+            self.prompt_tokens,
+            self.completion_tokens,
+            "-" if self.first_token_ms is None else int(self.first_token_ms),
+            int(self.total_ms),
+            int(self.aborted),
+        )
+
+
+def iter_sse(response: requests.Response) -> Iterator[tuple[str, str]]:
+    """(event, data) pairs of an SSE response; multi-line data fields are joined with newlines."""
+    event, data = "", []
+    # Decoded here: requests assumes ISO-8859-1 for text/event-stream without a charset.
+    for raw in response.iter_lines():
+        line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+        if not line:
+            if data:
+                yield event or "message", "\n".join(data)
+            event, data = "", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+    if data:
+        yield event or "message", "\n".join(data)
+
+
+def openai_delta(event: str, data: dict[str, Any], usage: ChatUsage) -> str:
+    """chat.completion.chunk; usage arrives in a final chunk when stream_options.include_usage is set."""
+    if data.get("error"):
+        error = data["error"]
+        raise SSEError(error.get("message") if isinstance(error, dict) else str(error))
+    counts = data.get("usage") or {}
+    if counts:
+        usage.prompt_tokens = counts.get("prompt_tokens", usage.prompt_tokens)
+        usage.completion_tokens = counts.get("completion_tokens", usage.completion_tokens)
+    choices = data.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def anthropic_delta(event: str, data: dict[str, Any], usage: ChatUsage) -> str:
+    kind = data.get("type") or event
+    if kind == "message_start":
+        counts = (data.get("message") or {}).get("usage") or {}
+        usage.prompt_tokens = counts.get("input_tokens", usage.prompt_tokens)
+    elif kind == "content_block_delta":
+        return (data.get("delta") or {}).get("text") or ""
+    elif kind == "message_delta":
+        usage.completion_tokens = (data.get("usage") or {}).get("output_tokens", usage.completion_tokens)
+    elif kind == "error":
+        raise SSEError((data.get("error") or {}).get("message") or "stream error")
+    return ""
+
+
+def gemini_delta(event: str, data: dict[str, Any], usage: ChatUsage) -> str:
+    if data.get("error"):
+        raise SSEError((data["error"] or {}).get("message") or "stream error")
+    counts = data.get("usageMetadata") or {}
+    if counts:
+        usage.prompt_tokens = counts.get("promptTokenCount", usage.prompt_tokens)
+        usage.completion_tokens = counts.get("candidatesTokenCount", usage.completion_tokens)
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(p.get("text", "") for p in parts if isinstance(p, dict) and not p.get("thought"))
+
+
+def stream_chat(
+    url: str,
+    payload: dict[str, Any],
+    parse: Callable[[str, dict[str, Any], ChatUsage], str],
+    *,
+    provider: str,
+    model: str,
+    headers: dict[str, str] | None = None,
+    timeout: float = 120,
+    on_text: Callable[[str], None] | None = None,
+    abort: threading.Event | None = None,
+    http: Any = None,
+) -> tuple[str | None, ChatUsage]:
+    """
+    POST payload and read the SSE reply. Returns (text, usage); text is None when
+    abort was set mid-stream. HTTP errors raise requests.HTTPError (the response
+    is attached), error events inside the stream raise SSEError. http is anything
+    with requests' post() (a pooled ProviderClient); defaults to requests.
+    """
+    usage = ChatUsage(provider=provider, model=model)
+    started = time.perf_counter()
+    parts: list[str] = []
+    with (http or requests).post(url, json=payload, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code >= 400:
+            # Read the error body while the connection is open, so callers can show the provider's message.
+            response.content
+        response.raise_for_status()
+        for event, data in iter_sse(response):
+            if abort is not None and abort.is_set():
+                usage.aborted = True
+                break
+            if data.strip() == "[DONE]":
+                break
+            try:
+                decoded = json.loads(data)
+            except json.JSONDecodeError:
+                logger.debug(f"Skipping malformed SSE data from {provider}: {data[:80]!r}")
+                continue
+            text = parse(event, decoded, usage)
+            if not text:
+                continue
+            if usage.first_token_ms is None:
+                usage.first_token_ms = (time.perf_counter() - started) * 1000
+            parts.append(text)
+            if on_text is not None:
+                on_text(text)
+    usage.total_ms = (time.perf_counter() - started) * 1000
+    usage.log()
+    return (None if usage.aborted else "".join(parts)), usage
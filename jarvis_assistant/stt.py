@@ -5,59 +5,442 @@ except ImportError:
     print("WARNING: 'faster-whisper' not found. STT will be disabled.")
     whisper_available = False
 
+import time
+from collections import deque
+from dataclasses import dataclass
+
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot
+from . import speech_gate, stt_process, stt_profile
+from .command_grammar import CommandGrammar, GrammarRecognizer
 from .config import cfg
+from .utils import logger
+
+
+@dataclass
+class DecodeResult:
+    text: str
+    avg_logprob: float
+    elapsed: float
+    dropped_segments: int = 0
+    language: str | None = None
+    language_probability: float = 0.0
+
+
+class LanguagePrior:
+    """
+    Session-level language guess used when cfg.language is auto (None).
+
+    Once the last few confident detections agree, that language is passed to
+    Whisper directly and the per-utterance detection pass is skipped. Detection
+    runs again when a pinned decode comes back with low confidence, and the pin
+    is dropped as soon as the recent detection window disagrees.
+    """
+
+    def __init__(self, window: int = 3, min_probability: float = 0.8, redetect_logprob: float = -0.8):
+        self._recent: deque[str] = deque(maxlen=window)
+        self.min_probability = min_probability
+        self.redetect_logprob = redetect_logprob
+        self.language: str | None = None
+
+    def observe(self, language: str | None, probability: float) -> None:
+        if not language or probability < self.min_probability:
+            return
+        self._recent.append(language)
+        if len(set(self._recent)) == 1:
+            self.language = language
+        else:
+            self.language = None
+
+    def needs_redetect(self, avg_logprob: float) -> bool:
+        return avg_logprob < self.redetect_logprob
+
+    def reset(self) -> None:
+        self._recent.clear()
+        self.language = None
+
 
 class STTWorker(QObject):
     """
     Worker for running Faster-Whisper transcription.
+
+    When the cascade is enabled, a small model decodes first and a confident
+    transcript goes out on fast_transcript. The controller decides on the GUI
+    thread whether it is a fast-path hit (quick command / builtin); only on a
+    miss does it call transcribe_full(), so the configured model is never run
+    for a hit.
+
+    With cfg.stt_out_of_process the models live in a separate process
+    (see stt_process) so decoding does not contend with the GUI for the GIL;
+    the signal contract is the same either way.
     """
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    ready_state_changed = pyqtSignal(str)
+    fast_transcript = pyqtSignal(int, str)  # utterance id, first-pass text
+
+    STATE_UNAVAILABLE = "unavailable"
+    STATE_COLD = "cold"
+    STATE_LOADING = "loading"
+    STATE_READY = "ready"
+    STATE_ERROR = "error"
+
+    WARMUP_SECONDS = 0.5
+    SAMPLE_RATE = 16000
 
     def __init__(self):
         super().__init__()
         self.model = None
+        self._model_name = ""
+        self._model_key: tuple = ()
+        self.state = self.STATE_COLD if whisper_available else self.STATE_UNAVAILABLE
+        self.fast_model = None
+        self._fast_model_name = ""
+        self._fast_model_key: tuple = ()
+        # Gated audio of first-pass transcripts, kept until the controller decides (transcribe_full).
+        self._pending_full: dict[int, np.ndarray] = {}
+        self._utterance_id = 0
+        self._language_prior = LanguagePrior()
+        self._server: stt_process.STTServer | None = None
 
     def is_available(self):
         return whisper_available
 
+    def is_ready(self) -> bool:
+        return self.state == self.STATE_READY
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        self.ready_state_changed.emit(state)
+
+    def reset_language_prior(self) -> None:
+        """Forget the session language; called when cfg.language or the profile changes."""
+        self._language_prior.reset()
+
+    def _create_model(self, name: str):
+        # Profile defaults: device="cpu" is safer, compute_type="int8" is fast on CPU
+        kwargs = stt_profile.model_kwargs(cfg.stt_decoding_profile)
+        if cfg.stt_out_of_process:
+            if self._server is None:
+                self._server = stt_process.STTServer()
+            return stt_process.RemoteWhisperModel(self._server, name, kwargs)
+        self.shutdown()
+        return WhisperModel(name, **kwargs)
+
+    def _evict_stale_models(self) -> None:
+        """Unload server-side models other than the current first-pass and second-pass ones."""
+        if self._server is None:
+            return
+        models = (self.model, self.fast_model)
+        self._server.retain({m.key for m in models if isinstance(m, stt_process.RemoteWhisperModel)})
+
+    def _cache_key(self, name: str) -> tuple:
+        return stt_profile.model_cache_key(name, cfg.stt_decoding_profile) + (cfg.stt_out_of_process,)
+
+    def _model_is_current(self) -> bool:
+        return self.model is not None and self._model_key == self._cache_key(cfg.whisper_model)
+
+    def shutdown(self) -> None:
+        """Stop the STT server process, if one was started."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def _ensure_model(self) -> str | None:
+        """Load cfg.whisper_model if it is not the resident model. Returns an error string on failure."""
+        name = cfg.whisper_model
+        if self._model_is_current():
+            return None
+        profile = cfg.stt_decoding_profile
+        print(f"Loading Faster-Whisper model: {name} ({stt_profile.describe(profile)})...")
+        self.model = None
+        self._evict_stale_models()
+        self._set_state(self.STATE_LOADING)
+        try:
+            self.model = self._create_model(name)
+            self._model_name = name
+            self._model_key = self._cache_key(name)
+            print("Faster-Whisper model loaded.")
+            return None
+        except Exception as e:
+            self._set_state(self.STATE_ERROR)
+            return str(e)
+
     def load_model(self):
         if not whisper_available:
             self.error.emit("STT Disabled: 'faster-whisper' not found.")
             return
 
-        if self.model is None:
-            print(f"Loading Faster-Whisper model: {cfg.whisper_model}...")
-            try:
-                # device="cpu" is safer, compute_type="int8" is fast on CPU
-                self.model = WhisperModel(cfg.whisper_model, device="cpu", compute_type="int8")
-                print("Faster-Whisper model loaded.")
-            except Exception as e:
-                self.error.emit(f"Failed to load Faster-Whisper model: {e}")
+        err = self._ensure_model()
+        if err:
+            self.error.emit(f"Failed to load Faster-Whisper model: {err}")
+            return
+        self._set_state(self.STATE_READY)
 
-    def transcribe(self, audio_data: np.ndarray):
+    def warmup(self):
+        """
+        Load the configured model(s) and run one dummy decode so the first real
+        utterance does not pay construction and first-inference cost.
+        Runs on the STT thread; safe to call again after whisper_model changes.
+        """
         if not whisper_available:
+            self._set_state(self.STATE_UNAVAILABLE)
             return
 
-        if self.model is None:
-            self.load_model()
-        
-        if self.model is None:
+        started = time.perf_counter()
+        err = self._ensure_model()
+        if err:
+            logger.error("stt_warmup load failed model=%s error=%s", cfg.whisper_model, err)
+            return
+        loaded_at = time.perf_counter()
+
+        silence = np.zeros(int(self.SAMPLE_RATE * self.WARMUP_SECONDS), dtype=np.float32)
+        try:
+            self._decode(self.model, silence, fast=True, language=cfg.language)
+            if self._cascade_active():
+                fast_model = self._load_fast_model()
+                if fast_model is not None:
+                    self._decode(fast_model, silence, fast=True, language=cfg.language)
+        except Exception as exc:
+            # A failed dummy decode is not fatal; the model itself loaded.
+            logger.warning("stt_warmup dummy decode failed: %s", exc)
+
+        finished_at = time.perf_counter()
+        logger.info(
+            "stt_warmup model=%s load_ms=%d warm_ms=%d",
+            self._model_name,
+            int((loaded_at - started) * 1000),
+            int((finished_at - loaded_at) * 1000),
+        )
+        self._set_state(self.STATE_READY)
+
+    def _load_fast_model(self):
+        name = (cfg.stt_fast_model or "").strip()
+        if not name:
+            return None
+        key = self._cache_key(name)
+        if self.fast_model is not None and self._fast_model_key == key:
+            return self.fast_model
+        self.fast_model = None
+        self._evict_stale_models()
+        try:
+            logger.info("Loading Faster-Whisper fast-pass model: %s", name)
+            self.fast_model = self._create_model(name)
+            self._fast_model_name = name
+            self._fast_model_key = key
+        except Exception as exc:
+            logger.warning("stt_cascade fast model load failed model=%s error=%s", name, exc)
+            self.fast_model = None
+            self._fast_model_name = ""
+            self._fast_model_key = ()
+        return self.fast_model
+
+    def _cascade_active(self) -> bool:
+        if not cfg.stt_cascade_enabled:
+            return False
+        fast_name = (cfg.stt_fast_model or "").strip()
+        return bool(fast_name) and fast_name != cfg.whisper_model
+
+    def _decode(self, model, audio_data: np.ndarray, fast: bool = False, language: str | None = None) -> DecodeResult:
+        started = time.perf_counter()
+        options = stt_profile.decode_kwargs(cfg.stt_decoding_profile, fast=fast)
+        segments, info = model.transcribe(audio_data, language=language, **options)
+        # Segments are a lazy generator; materialize before reading timings.
+        segments = list(segments)
+        dropped = 0
+        if cfg.stt_speech_gate_enabled:
+            kept = [
+                seg for seg in segments
+                if not speech_gate.is_junk_segment(seg, cfg.stt_no_speech_threshold, cfg.stt_logprob_threshold)
+            ]
+            dropped = len(segments) - len(kept)
+            segments = kept
+        text = " ".join([segment.text for segment in segments]).strip()
+        if segments:
+            avg_logprob = sum(s.avg_logprob for s in segments) / len(segments)
+        else:
+            avg_logprob = float("-inf")
+        return DecodeResult(
+            text=text,
+            avg_logprob=avg_logprob,
+            elapsed=time.perf_counter() - started,
+            dropped_segments=dropped,
+            language=getattr(info, "language", None),
+            language_probability=float(getattr(info, "language_probability", 0.0) or 0.0),
+        )
+
+    def _decode_with_language(self, model, audio_data: np.ndarray, fast: bool = False) -> DecodeResult:
+        """
+        Decode using cfg.language, or the sticky session prior when language is auto.
+        Only the configured model's detections update the prior: the first-pass model's
+        guesses are less reliable, and on a fast-path miss its language is overridden anyway.
+        """
+        if cfg.language:
+            return self._decode(model, audio_data, fast=fast, language=cfg.language)
+
+        prior = self._language_prior
+        pinned = prior.language
+        result = self._decode(model, audio_data, fast=fast, language=pinned)
+        if pinned is None:
+            if not fast:
+                prior.observe(result.language, result.language_probability)
+            return result
+        # Fast-pass misses fall through to the full model anyway; only re-detect there.
+        if fast or not result.text or not prior.needs_redetect(result.avg_logprob):
+            return result
+
+        detected = self._decode(model, audio_data, fast=fast, language=None)
+        prior.observe(detected.language, detected.language_probability)
+        logger.info(
+            "stt_language redetect pinned=%s logprob=%.2f detected=%s p=%.2f logprob=%.2f now_pinned=%s",
+            pinned,
+            result.avg_logprob,
+            detected.language,
+            detected.language_probability,
+            detected.avg_logprob,
+            prior.language,
+        )
+        return detected if detected.avg_logprob > result.avg_logprob else result
+
+    def _gate(self, audio_data: np.ndarray) -> np.ndarray | None:
+        """Trim leading/trailing silence; None means the recording has no speech."""
+        if not cfg.stt_speech_gate_enabled:
+            return audio_data
+        trimmed = speech_gate.trim_silence(audio_data, self.SAMPLE_RATE, cfg.wake_vad_energy_threshold)
+        before_ms = int(len(audio_data) * 1000 / self.SAMPLE_RATE)
+        if trimmed is None:
+            logger.info("stt_gate no_speech duration_ms=%d -> skip decode", before_ms)
+            return None
+        logger.info(
+            "stt_gate trimmed duration_ms=%d -> %d",
+            before_ms,
+            int(len(trimmed) * 1000 / self.SAMPLE_RATE),
+        )
+        return trimmed
+
+    def _try_fast_pass(self, audio_data: np.ndarray) -> DecodeResult | None:
+        fast_model = self._load_fast_model()
+        if fast_model is None:
+            return None
+
+        fast = self._decode_with_language(fast_model, audio_data, fast=True)
+        confident = bool(fast.text) and fast.avg_logprob >= cfg.stt_fast_min_logprob
+        logger.info(
+            "stt_cascade pass=fast model=%s confident=%s logprob=%.2f fast_ms=%d text=%r",
+            self._fast_model_name,
+            confident,
+            fast.avg_logprob,
+            int(fast.elapsed * 1000),
+            fast.text,
+        )
+        return fast if confident else None
+
+    def transcribe(self, audio_data: np.ndarray):
+        if not whisper_available:
             return
 
         try:
             # Ensure float32
             if audio_data.dtype != np.float32:
                 audio_data = audio_data.astype(np.float32)
-                
+
             # Flatten if needed
             if len(audio_data.shape) > 1:
                 audio_data = audio_data.flatten()
-            
-            segments, info = self.model.transcribe(audio_data, beam_size=5, language=cfg.language)
-            text = " ".join([segment.text for segment in segments]).strip()
-            self.finished.emit(text)
+
+            audio_data = self._gate(audio_data)
+            if audio_data is None:
+                self.finished.emit("")
+                return
+
+            if self._cascade_active():
+                fast = self._try_fast_pass(audio_data)
+                if fast is not None:
+                    self._utterance_id += 1
+                    # Only the latest transcript can still be waiting for a decision.
+                    self._pending_full = {self._utterance_id: audio_data}
+                    self.fast_transcript.emit(self._utterance_id, fast.text)
+                    return
+
+            self._transcribe_full(audio_data)
         except Exception as e:
             self.error.emit(f"Transcription failed: {e}")
+
+    def transcribe_full(self, utterance_id: int):
+        """Second pass for a first-pass transcript that was not a fast-path hit."""
+        audio_data = self._pending_full.pop(utterance_id, None)
+        if audio_data is None:
+            logger.warning("stt_cascade utterance=%d no longer pending; skipping full pass", utterance_id)
+            self.finished.emit("")
+            return
+        try:
+            self._transcribe_full(audio_data)
+        except Exception as e:
+            self.error.emit(f"Transcription failed: {e}")
+
+    def _transcribe_full(self, audio_data: np.ndarray):
+        if not self._model_is_current():
+            self.load_model()
+
+        if self.model is None:
+            return
+
+        full = self._decode_with_language(self.model, audio_data)
+        logger.info(
+            "stt_cascade pass=full model=%s logprob=%.2f full_ms=%d dropped_segments=%d",
+            cfg.whisper_model,
+            full.avg_logprob,
+            int(full.elapsed * 1000),
+            full.dropped_segments,
+        )
+        self.finished.emit(full.text)
+
+
+class GrammarWorker(QObject):
+    """
+    Runs the grammar-constrained command recognizer on its own thread, in
+    parallel with STTWorker on the same audio. Results carry the controller's
+    turn id so a late answer for an older recording can be ignored.
+    """
+    matched = pyqtSignal(int, object)
+    missed = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self._grammar = CommandGrammar()
+        self._recognizer: GrammarRecognizer | None = None
+
+    def is_available(self) -> bool:
+        return GrammarRecognizer(cfg.grammar_model_path).is_available()
+
+    def set_grammar(self, grammar: CommandGrammar) -> None:
+        self._grammar = grammar or CommandGrammar()
+        logger.info("grammar_stt phrases=%d", len(self._grammar))
+
+    def recognize(self, turn_id: int, audio_data: np.ndarray) -> None:
+        started = time.perf_counter()
+        match = None
+        try:
+            path = cfg.grammar_model_path
+            if self._recognizer is None or self._recognizer.model_path != path:
+                self._recognizer = GrammarRecognizer(path)
+            audio = np.asarray(audio_data, dtype=np.float32).flatten()
+            match = self._recognizer.recognize(audio, self._grammar, cfg.grammar_min_confidence)
+        except Exception as exc:
+            logger.warning("grammar_stt failed: %s", exc)
+        elapsed = time.perf_counter() - started
+        if match is None:
+            logger.info("grammar_stt turn=%d miss grammar_ms=%d", turn_id, int(elapsed * 1000))
+            self.missed.emit(turn_id)
+            return
+        match.elapsed = elapsed
+        logger.info(
+            "grammar_stt turn=%d hit phrase=%r conf=%.2f grammar_ms=%d",
+            turn_id,
+            match.phrase,
+            match.confidence,
+            int(elapsed * 1000),
+        )
+        self.matched.emit(turn_id, match)
@@ -0,0 +1,220 @@
+"""
+Benchmark Whisper decoding profiles on recorded fixtures and pick the fastest
+profile whose word error rate stays within a budget of the current profile.
+
+Fixtures are 16 kHz mono WAV files, each with a sibling .txt reference transcript:
+
+    fixtures/
+        lamp_off.wav
+        lamp_off.txt
+
+Usage:
+    python -m jarvis_assistant.stt_benchmark path/to/fixtures [--budget 0.02] [--apply]
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from . import stt_profile
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class Fixture:
+    name: str
+    audio: np.ndarray
+    reference: str
+
+
+@dataclass
+class ProfileResult:
+    profile: dict[str, Any]
+    wer: float
+    decode_sec: float
+    per_fixture: dict[str, float] = field(default_factory=dict)
+
+
+def _read_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    if width == 2:
+        audio = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(raw, dtype=np.int32).astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        duration = len(audio) / float(rate)
+        target_len = int(duration * SAMPLE_RATE)
+        audio = np.interp(
+            np.linspace(0.0, duration, target_len, endpoint=False),
+            np.arange(len(audio)) / float(rate),
+            audio,
+        ).astype(np.float32)
+    return audio
+
+
+def load_fixtures(directory: str) -> list[Fixture]:
+    fixtures: list[Fixture] = []
+    for entry in sorted(os.listdir(directory)):
+        if not entry.lower().endswith(".wav"):
+            continue
+        wav_path = os.path.join(directory, entry)
+        ref_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(ref_path):
+            continue
+        with open(ref_path, "r", encoding="utf-8") as f:
+            reference = f.read().strip()
+        fixtures.append(Fixture(name=entry, audio=_read_wav(wav_path), reference=reference))
+    return fixtures
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"\w+", (text or "").lower(), flags=re.UNICODE)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref = _words(reference)
+    hyp = _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def candidate_profiles(base: dict[str, Any], cpu_count: int | None = None) -> list[dict[str, Any]]:
+    """A small grid around the base profile; kept small so tuning finishes in minutes."""
+    cores = max(1, cpu_count or os.cpu_count() or 1)
+    thread_options = sorted({max(1, cores // 2), cores, int(base.get("cpu_threads") or 0)})
+    compute_options = ["int8", "int8_float32"] if base.get("device", "cpu") == "cpu" else ["int8_float16", "float16"]
+
+    profiles = [dict(base)]
+    for compute_type, threads, beam, fallback in itertools.product(
+        compute_options, thread_options, (1, 2, 5), (False, True)
+    ):
+        profile = dict(base)
+        profile.update(
+            {
+                "compute_type": compute_type,
+                "cpu_threads": threads,
+                "beam_size": beam,
+                "best_of": beam,
+                "temperature_fallback": fallback,
+                "without_timestamps": True,
+            }
+        )
+        if profile not in profiles:
+            profiles.append(profile)
+    return profiles
+
+
+def benchmark_profile(model_name: str, profile: dict[str, Any], fixtures: list[Fixture]) -> ProfileResult:
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(model_name, **stt_profile.model_kwargs(profile))
+    options = stt_profile.decode_kwargs(profile)
+    # Warm up once so construction and first-inference cost are not measured.
+    segments, _ = model.transcribe(np.zeros(SAMPLE_RATE // 2, dtype=np.float32), **options)
+    list(segments)
+
+    total_errors = 0.0
+    total_words = 0
+    elapsed = 0.0
+    per_fixture: dict[str, float] = {}
+    for fixture in fixtures:
+        started = time.perf_counter()
+        segments, _ = model.transcribe(fixture.audio, **options)
+        text = " ".join(s.text for s in segments).strip()
+        elapsed += time.perf_counter() - started
+        wer = word_error_rate(fixture.reference, text)
+        per_fixture[fixture.name] = wer
+        words = max(1, len(_words(fixture.reference)))
+        total_errors += wer * words
+        total_words += words
+    return ProfileResult(
+        profile=profile,
+        wer=total_errors / max(1, total_words),
+        decode_sec=elapsed,
+        per_fixture=per_fixture,
+    )
+
+
+def pick_profile(results: list[ProfileResult], baseline: ProfileResult, wer_budget: float) -> ProfileResult:
+    allowed = [r for r in results if r.wer <= baseline.wer + wer_budget]
+    if not allowed:
+        return baseline
+    return min(allowed, key=lambda r: r.decode_sec)
+
+
+def tune(
+    model_name: str,
+    fixtures: list[Fixture],
+    base_profile: dict[str, Any],
+    wer_budget: float = 0.02,
+    candidates: list[dict[str, Any]] | None = None,
+) -> tuple[ProfileResult, list[ProfileResult]]:
+    if not fixtures:
+        raise ValueError("No fixtures found (need .wav files with matching .txt references).")
+    candidates = candidates or candidate_profiles(base_profile)
+    results: list[ProfileResult] = []
+    baseline: ProfileResult | None = None
+    for profile in candidates:
+        try:
+            result = benchmark_profile(model_name, profile, fixtures)
+        except Exception as exc:
+            print(f"skip {stt_profile.describe(profile)}: {exc}", file=sys.stderr)
+            continue
+        print(f"wer={result.wer:.3f} decode={result.decode_sec:.2f}s {stt_profile.describe(profile)}")
+        results.append(result)
+        if profile == base_profile:
+            baseline = result
+    if not results:
+        raise RuntimeError("No candidate profile could be benchmarked.")
+    baseline = baseline or results[0]
+    return pick_profile(results, baseline, wer_budget), results
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .config import cfg
+
+    parser = argparse.ArgumentParser(description="Pick the fastest Whisper decoding profile for this machine.")
+    parser.add_argument("fixtures", help="Directory with .wav fixtures and .txt references")
+    parser.add_argument("--model", default=None, help="Whisper model (default: configured whisper_model)")
+    parser.add_argument("--budget", type=float, default=0.02, help="Allowed absolute WER increase over the current profile")
+    parser.add_argument("--apply", action="store_true", help="Save the chosen profile to settings")
+    args = parser.parse_args(argv)
+
+    model_name = args.model or cfg.whisper_model
+    base = cfg.stt_decoding_profile
+    best, results = tune(model_name, load_fixtures(args.fixtures), base, wer_budget=args.budget)
+    print(f"\nbenchmarked {len(results)} profiles for model '{model_name}'")
+    print(f"chosen: wer={best.wer:.3f} decode={best.decode_sec:.2f}s {stt_profile.describe(best.profile)}")
+    if args.apply:
+        cfg.stt_decoding_profile = best.profile
+        cfg.save()
+        print("Saved to settings.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Out-of-process Faster-Whisper server.
+
+The GUI process hands audio to a resident worker process through a shared
+memory block and receives segments back over a pipe, so decoding never holds
+the GUI interpreter's GIL. The worker keeps loaded models resident and is
+restarted transparently if it dies. STTWorker unloads models that no longer
+match the configuration, so at most the first-pass and second-pass models stay
+resident.
+
+Kept free of Qt and cfg imports: this module is imported by the spawned child.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+from .utils import logger
+
+REQUEST_TIMEOUT_SEC = 180.0
+LOAD_TIMEOUT_SEC = 600.0
+START_TIMEOUT_SEC = 30.0
+
+
+def _serve(conn) -> None:
+    """Child process loop: keep models resident, answer load/unload/transcribe requests."""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as exc:
+        conn.send(("error", f"faster-whisper unavailable in STT process: {exc}"))
+        return
+
+    models: dict[str, Any] = {}
+    attached: dict[str, shared_memory.SharedMemory] = {}
+    conn.send(("ok", {"ready": True}))
+    while True:
+        try:
+            op, payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            if op == "shutdown":
+                conn.send(("ok", {}))
+                break
+            if op == "ping":
+                conn.send(("ok", {}))
+            elif op == "load":
+                key = payload["key"]
+                if key not in models:
+                    models[key] = WhisperModel(payload["model"], **payload["model_kwargs"])
+                conn.send(("ok", {}))
+            elif op == "unload":
+                for key in payload["keys"]:
+                    models.pop(key, None)
+                conn.send(("ok", {}))
+            elif op == "transcribe":
+                shm_name = payload["shm"]
+                shm = attached.get(shm_name)
+                if shm is None:
+                    for old in attached.values():
+                        old.close()
+                    attached.clear()
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                    attached[shm_name] = shm
+                audio = np.ndarray((payload["n"],), dtype=np.float32, buffer=shm.buf).copy()
+                segments, info = models[payload["key"]].transcribe(
+                    audio, language=payload.get("language"), **payload["options"]
+                )
+                rows = [
+                    {
+                        "text": seg.text,
+                        "avg_logprob": seg.avg_logprob,
+                        "no_speech_prob": seg.no_speech_prob,
+                    }
+                    for seg in segments
+                ]
+                conn.send(
+                    (
+                        "ok",
+                        {
+                            "segments": rows,
+                            "language": getattr(info, "language", None),
+                            "language_probability": getattr(info, "language_probability", 0.0),
+                        },
+                    )
+                )
+            else:
+                conn.send(("error", f"Unknown op '{op}'"))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    for shm in attached.values():
+        shm.close()
+
+
+class STTServerError(RuntimeError):
+    pass
+
+
+class STTServer:
+    """Parent-side handle for the STT worker process."""
+
+    def __init__(self):
+        self._ctx = mp.get_context("spawn")
+        self._proc = None
+        self._conn = None
+        self._shm: shared_memory.SharedMemory | None = None
+        self._lock = threading.Lock()
+        # key -> (model name, constructor kwargs); replayed after a restart.
+        self._loaded: dict[str, tuple[str, dict]] = {}
+        self.restarts = 0
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def _start(self) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_serve, args=(child_conn,), name="jarvis-stt", daemon=True)
+        proc.start()
+        child_conn.close()
+        self._proc = proc
+        self._conn = parent_conn
+        self._recv(START_TIMEOUT_SEC)
+        logger.info("stt_server started pid=%s", proc.pid)
+
+    def _kill(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        if self._proc is not None and self._proc.is_alive():
+            self._proc.kill()
+            self._proc.join(timeout=2)
+        self._proc = None
+        self._conn = None
+
+    def _recv(self, timeout: float) -> dict:
+        if not self._conn.poll(timeout):
+            raise TimeoutError(f"STT server did not answer within {timeout:.0f}s")
+        status, payload = self._conn.recv()
+        if status != "ok":
+            raise STTServerError(payload)
+        return payload
+
+    def _request(self, op: str, payload: dict, timeout: float) -> dict:
+        self._conn.send((op, payload))
+        return self._recv(timeout)
+
+    def _restart(self, reason: str) -> None:
+        logger.warning("stt_server restarting reason=%s", reason)
+        self._kill()
+        self.restarts += 1
+        self._start()
+        for key, (model_name, model_kwargs) in self._loaded.items():
+            self._request("load", {"key": key, "model": model_name, "model_kwargs": model_kwargs}, LOAD_TIMEOUT_SEC)
+
+    def _restart_in_background(self, reason: str) -> None:
+        with self._lock:
+            if self.is_alive():
+                return
+            try:
+                self._restart(reason)
+            except Exception as exc:
+                # The next request restarts it again.
+                logger.error("stt_server background restart failed: %s", exc)
+                self._kill()
+
+    def _call(self, op: str, payload: dict, timeout: float) -> dict:
+        """
+        Send one request. A dead worker is restarted and the request retried once;
+        a hung one is killed and restarted in the background while the request
+        fails right away, so one stuck decode does not block the STT thread for
+        the restart and model reloads as well.
+        """
+        with self._lock:
+            if not self.is_alive():
+                if self._proc is None:
+                    self._start()
+                else:
+                    self._restart("process exited")
+            try:
+                return self._request(op, payload, timeout)
+            except STTServerError:
+                raise
+            except TimeoutError as exc:
+                self._kill()
+                reason = f"{type(exc).__name__}: {exc}"
+                threading.Thread(target=self._restart_in_background, args=(reason,), daemon=True).start()
+                raise
+            except (EOFError, OSError) as exc:
+                self._restart(f"{type(exc).__name__}: {exc}")
+                return self._request(op, payload, timeout)
+
+    def load(self, key: str, model_name: str, model_kwargs: dict) -> None:
+        self._call("load", {"key": key, "model": model_name, "model_kwargs": model_kwargs}, LOAD_TIMEOUT_SEC)
+        self._loaded[key] = (model_name, model_kwargs)
+
+    def retain(self, keys: set[str]) -> None:
+        """Unload every model not in keys, in the worker and from the restart replay list."""
+        stale = [key for key in self._loaded if key not in keys]
+        if not stale:
+            return
+        for key in stale:
+            del self._loaded[key]
+        if self.is_alive():
+            self._call("unload", {"keys": stale}, REQUEST_TIMEOUT_SEC)
+        logger.info("stt_server unloaded models=%s", stale)
+
+    def _audio_block(self, n_samples: int) -> shared_memory.SharedMemory:
+        needed = max(1, n_samples) * 4
+        if self._shm is None or self._shm.size < needed:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            # Over-allocate so typical utterance lengths reuse one block.
+            self._shm = shared_memory.SharedMemory(create=True, size=max(needed, 16000 * 4 * 30))
+        return self._shm
+
+    def transcribe(self, key: str, audio: np.ndarray, language: str | None, options: dict) -> dict:
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        with self._lock:
+            shm = self._audio_block(len(audio))
+            np.ndarray((len(audio),), dtype=np.float32, buffer=shm.buf)[:] = audio
+            shm_name = shm.name
+        payload = {
+            "key": key,
+            "shm": shm_name,
+            "n": len(audio),
+            "language": language,
+            "options": options,
+        }
+        return self._call("transcribe", payload, REQUEST_TIMEOUT_SEC)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self.is_alive():
+                try:
+                    self._request("shutdown", {}, 2.0)
+                except Exception:
+                    pass
+                self._proc.join(timeout=2)
+            self._kill()
+            if self._shm is not None:
+                self._shm.close()
+                try:
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+                self._shm = None
+            self._loaded.clear()
+
+
+class RemoteWhisperModel:
+    """Drop-in stand-in for faster_whisper.WhisperModel backed by an STTServer."""
+
+    def __init__(self, server: STTServer, model_name: str, model_kwargs: dict):
+        self._server = server
+        self.key = f"{model_name}|{sorted(model_kwargs.items())}"
+        started = time.perf_counter()
+        server.load(self.key, model_name, model_kwargs)
+        logger.info(
+            "stt_server loaded model=%s load_ms=%d",
+            model_name,
+            int((time.perf_counter() - started) * 1000),
+        )
+
+    def transcribe(self, audio: np.ndarray, language: str | None = None, **options):
+        result = self._server.transcribe(self.key, audio, language, options)
+        segments = [SimpleNamespace(**row) for row in result.get("segments", [])]
+        info = SimpleNamespace(
+            language=result.get("language"),
+            language_probability=result.get("language_probability") or 0.0,
+        )
+        return segments, info
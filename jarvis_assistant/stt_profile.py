@@ -0,0 +1,53 @@
+"""
+Helpers that translate an STT decoding profile (see config.DEFAULT_STT_DECODING_PROFILE)
+into faster-whisper constructor and transcribe() keyword arguments.
+
+Kept free of Qt and cfg imports so benchmark tooling can use it standalone.
+"""
+
+from typing import Any
+
+MODEL_KEYS = ("device", "compute_type", "cpu_threads", "num_workers")
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+def model_kwargs(profile: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "device": profile.get("device") or "cpu",
+        "compute_type": profile.get("compute_type") or "int8",
+        "cpu_threads": int(profile.get("cpu_threads") or 0),
+        "num_workers": max(1, int(profile.get("num_workers") or 1)),
+    }
+
+
+def model_cache_key(model_name: str, profile: dict[str, Any]) -> tuple:
+    kwargs = model_kwargs(profile)
+    return (model_name,) + tuple(kwargs[k] for k in MODEL_KEYS)
+
+
+def decode_kwargs(profile: dict[str, Any], *, fast: bool = False) -> dict[str, Any]:
+    """
+    transcribe() options for a profile. The cascade fast pass always uses
+    greedy decoding without fallback regardless of the profile.
+    """
+    if fast:
+        return {
+            "beam_size": 1,
+            "best_of": 1,
+            "temperature": 0.0,
+            "without_timestamps": True,
+        }
+    temperature: float | tuple[float, ...] = DEFAULT_TEMPERATURES
+    if not profile.get("temperature_fallback", True):
+        temperature = 0.0
+    return {
+        "beam_size": max(1, int(profile.get("beam_size") or 1)),
+        "best_of": max(1, int(profile.get("best_of") or 1)),
+        "temperature": temperature,
+        "without_timestamps": bool(profile.get("without_timestamps", False)),
+    }
+
+
+def describe(profile: dict[str, Any]) -> str:
+    keys = MODEL_KEYS + ("beam_size", "best_of", "temperature_fallback", "without_timestamps")
+    return " ".join(f"{k}={profile.get(k)}" for k in keys)
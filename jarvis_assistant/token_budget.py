@@ -0,0 +1,132 @@
+"""
+Token budgets for LLM prompt assembly.
+
+A request has to fit the model's context window together with its reply:
+
+    num_ctx >= system + history + (memory + device states + extra + user input) + num_predict
+
+compile_prompt() keeps the system prompt and the current user input, clips
+oversized memory, per-turn extras (web-search summaries, action results) and
+pasted user text, and fills the remaining room with history newest-first,
+dropping the oldest turns. Otherwise Ollama silently truncates the prompt from
+the front, i.e. it drops the system instructions first.
+
+num_ctx is the same for every stage, because changing it makes Ollama reload
+the model. num_predict is set per stage and bounds the reply length; the
+llm_num_predict setting overrides it per stage (0 = no limit, e.g. for
+reasoning models that think before answering).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# Reply budget per stage: intents are short JSON (or a short conversational "reply"),
+# combined intents also carry an action list.
+STAGE_NUM_PREDICT = {"intent": 384, "combined": 512, "action": 384, "response": 512}
+DEFAULT_NUM_PREDICT = 512
+
+# Context window assumed when the provider does not report one.
+OLLAMA_SERVER_DEFAULT_CTX = 2048
+LMSTUDIO_DEFAULT_CTX = 4096
+REMOTE_CONTEXT_TOKENS = 16384
+
+# Chat-template tokens per message (role markers, separators).
+MESSAGE_OVERHEAD_TOKENS = 8
+# Largest share of the prompt room a single clipped section may take.
+MEMORY_SHARE = 0.2
+EXTRA_SHARE = 0.25
+USER_SHARE = 0.25
+HISTORY_MESSAGE_SHARE = 0.15
+_MIN_SECTION_TOKENS = 48
+CLIP_MARKER = "\n[...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast BPE estimate (~4 characters per token for English/German prose, JSON and entity ids)."""
+    return (len(text or "") + 3) // 4
+
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of text within max_tokens; the middle is replaced by CLIP_MARKER."""
+    text = text or ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Characters per token of this text, so the cut lands close to the budget.
+    ratio = len(text) / max(1, estimate_tokens(text))
+    keep = max(0, int((max_tokens - estimate_tokens(CLIP_MARKER)) * ratio))
+    head = keep * 2 // 3
+    tail = keep - head
+    return text[:head].rstrip() + CLIP_MARKER + (text[-tail:].lstrip() if tail else "")
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(str(message.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def fit_history(history: list[dict], max_tokens: int, max_message_tokens: int) -> tuple[list[dict], int]:
+    """
+    Newest-first selection of history within max_tokens; long messages are clipped
+    to max_message_tokens. Returns (kept messages in original order, dropped count).
+    """
+    kept: list[dict] = []
+    used = 0
+    for message in reversed(history):
+        content = str(message.get("content") or "")
+        if estimate_tokens(content) > max_message_tokens:
+            message = {**message, "content": clip_text(content, max_message_tokens)}
+        cost = message_tokens(message)
+        if used + cost > max_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    # A reply without its question confuses the model more than it helps.
+    while kept and kept[0].get("role") == "assistant":
+        kept.pop(0)
+    return kept, len(history) - len(kept)
+
+
+@dataclass
+class StageBudget:
+    stage: str
+    num_ctx: int
+    num_predict: int
+
+    @property
+    def prompt_tokens(self) -> int:
+        return max(0, self.num_ctx - (self.num_predict or DEFAULT_NUM_PREDICT))
+
+    def share(self, fraction: float) -> int:
+        return max(_MIN_SECTION_TOKENS, int(self.prompt_tokens * fraction))
+
+    def options(self) -> dict[str, int | str]:
+        """Generation options for LLMWorker (Ollama options; max_tokens for the other providers; stage for model routing)."""
+        options: dict[str, int | str] = {"stage": self.stage, "num_ctx": self.num_ctx}
+        if self.num_predict:
+            options["num_predict"] = self.num_predict
+        return options
+
+
+def context_window(provider: str | None = None) -> int:
+    """Context window of a provider (default: the configured one)."""
+    from .config import cfg
+
+    provider = provider or cfg.api_provider or "ollama"
+    if provider == "ollama":
+        return cfg.ollama_num_ctx or OLLAMA_SERVER_DEFAULT_CTX
+    if provider == "lmstudio":
+        return LMSTUDIO_DEFAULT_CTX
+    return REMOTE_CONTEXT_TOKENS
+
+
+def stage_budget(stage: str, num_ctx: int | None = None) -> StageBudget:
+    from .config import cfg
+    from .model_routing import stage_route
+
+    limits = {**STAGE_NUM_PREDICT, **cfg.llm_num_predict}
+    return StageBudget(
+        stage=stage,
+        num_ctx=num_ctx or context_window(stage_route(stage).provider),
+        num_predict=limits.get(stage, DEFAULT_NUM_PREDICT),
+    )
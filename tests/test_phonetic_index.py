@@ -0,0 +1,30 @@
+import pytest
+
+from jarvis_assistant.phonetic_index import _simple_metaphone, cologne_phonetic
+
+
+@pytest.mark.parametrize(
+    "word, code",
+    [
+        ("Müller-Lüdenscheidt", "65752682"),
+        ("Wikipedia", "3412"),
+        ("Breschnew", "17863"),
+        ("Meier", "67"),
+        ("Mayr", "67"),
+        ("Christ", "4782"),
+        ("Straße", "8278"),
+    ],
+)
+def test_cologne_phonetic_known_answers(word, code):
+    assert cologne_phonetic(word) == code
+
+
+def test_cologne_phonetic_word_edges():
+    assert cologne_phonetic("dt") == "2"
+    assert cologne_phonetic("Mac") == "68"
+    assert cologne_phonetic("Xaver") == "4837"
+
+
+def test_simple_metaphone_final_c_and_g():
+    assert _simple_metaphone("disc") == "TSK"
+    assert _simple_metaphone("gig") == "JK"
@@ -0,0 +1,40 @@
+import pytest
+
+from jarvis_assistant.prompt_compiler import (
+    PROMPT_TOKEN_CAPS,
+    PromptContext,
+    _reference_house,
+    compile_prompt,
+    template_report,
+)
+
+
+def _system(stage: str, structured: bool, **kwargs) -> str:
+    ctx = PromptContext(time_context="2026-01-05T17:00:00+01:00")
+    return compile_prompt(stage, ctx, "Hello", structured=structured, **kwargs).messages[0]["content"]
+
+
+def test_structured_intent_prompt_shows_conversation_examples_as_json():
+    system = _system("intent", structured=True)
+    assert '''User: 'Hello' -> {"intent": "conversation", "reply": "Hello! How can I help you today?"}''' in system
+    assert "-> 'Hello! How can I help you today?'" not in system
+
+
+def test_plain_intent_prompt_keeps_plain_text_conversation_examples():
+    system = _system("intent", structured=False)
+    assert "User: 'Hello' -> 'Hello! How can I help you today?'" in system
+
+
+@pytest.mark.parametrize("structured", [False, True])
+@pytest.mark.parametrize("top_k", [20, 0])
+def test_reference_house_prompts_stay_within_token_caps(structured, top_k):
+    reports = template_report(_reference_house(), top_k=top_k, structured=structured)
+    assert set(reports) == set(PROMPT_TOKEN_CAPS)
+    for stage, report in reports.items():
+        assert report["total"] <= PROMPT_TOKEN_CAPS[stage], (stage, report)
+
+
+@pytest.mark.parametrize("structured", [False, True])
+def test_reference_house_prompts_fit_default_context_window(structured):
+    for stage, report in template_report(_reference_house(), structured=structured).items():
+        assert report["total"] + report["num_predict"] <= report["num_ctx"], (stage, report)
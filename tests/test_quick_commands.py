@@ -0,0 +1,30 @@
+from jarvis_assistant.quick_commands import QuickCommand, QuickCommandMatcher
+
+
+def _cmd(phrase: str, service: str, source: str) -> QuickCommand:
+    return QuickCommand(
+        id=f"{source}_{service}",
+        phrases=[phrase],
+        action={"domain": "light", "service": service, "entity_id": "light.living_room_ceiling"},
+        meta={"source": source},
+    )
+
+
+def test_learned_command_does_not_fuzzy_match_opposite_service():
+    learned = _cmd("turn off the living room ceiling light", "turn_off", "learned")
+    matcher = QuickCommandMatcher([learned])
+    assert matcher.match("turn off the living room ceiling light") is learned
+    assert matcher.match("turn on the living room ceiling light") is None
+
+
+def test_learned_german_an_aus_pair():
+    learned = _cmd("mach das wohnzimmerlicht aus", "turn_off", "learned")
+    matcher = QuickCommandMatcher([learned])
+    assert matcher.match("mach das wohnzimmerlicht an") is None
+
+
+def test_fuzzy_match_rejects_conflicting_polarity():
+    generated = _cmd("turn off the living room ceiling light", "turn_off", "entity_snapshot")
+    matcher = QuickCommandMatcher([generated])
+    assert matcher.match("turn off the living room ceilng light") is generated
+    assert matcher.match("turn on the living room ceiling light") is None